@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent ledger of the evaluations of the WHRS optimizers
+
+@author: quevedo
+"""
+
+import numpy as np
+from PropSIStore import PropSIStore
+
+class EvaluationLedger(PropSIStore):
+    """
+    Stores each evaluation of an optimizer (see WHRSOptimizerBase ledger
+    param) in a SQLite database like PropSIStore: a row per evaluation with
+    a column for each input, output, the rank value and the seconds of the
+    simulation, keyed by the id of the run (see WHRSOptimizerBase.getRunId)
+    and the order of the evaluation in the run. The fluid of the run is
+    stored too.
+    By default each evaluation is written when it is recorded, so an
+    interrupted run loses none of them.
+    """
+    inputNames=['Load','JW_pump','RC_Superheat','RC_Subcool','ORC_Superheat',
+                'ORC_Subcool','ORC_Pump','P_chamber']
+    outputNames=['WHRS_cycle_output','CO2_red','EPC']
+    columns=['run','seq','fluid']+inputNames+outputNames+['target','seconds']
+    createSQL='CREATE TABLE IF NOT EXISTS evaluations (run TEXT, seq INTEGER, fluid TEXT, ' + \
+              ', '.join('{} REAL'.format(name) for name in inputNames+outputNames+['target','seconds']) + \
+              ', PRIMARY KEY (run,seq)) WITHOUT ROWID'
+    insertSQL='INSERT OR REPLACE INTO evaluations VALUES ({})'.format(','.join(['?']*len(columns)))
+
+    def __init__(self,fileName,batchSize=1,flushTime=0,verbose=0):
+        """
+        Params:
+            fileName  : SQLite database file
+            batchSize : see PropSIStore. Default=1 (each evaluation)
+            flushTime : see PropSIStore. Default=0
+            verbose   : int value in [0,2]. If >0 this class shows process' information.
+                        Default=0
+        """
+        PropSIStore.__init__(self,fileName,'WHRS evaluations 1',batchSize=batchSize,
+                             flushTime=flushTime,verbose=verbose)
+
+    def _row(self,Tup,value):
+        return Tup+tuple(value)
+
+    def record(self,run,seq,fluid,inputs,outputs,target,seconds):
+        """
+        Stores the evaluation seq of run: the 8 inputs, the 3 outputs of
+        WHRS, the rank value and the seconds of the simulation
+        """
+        self.put((run,seq),(fluid,)+tuple(float(v) for v in inputs)+
+                 tuple(float(v) for v in outputs)+(float(target),float(seconds)))
+        if self.needFlush():
+            self.flush()
+
+    def getRun(self,run):
+        """
+        Returns the stored evaluations of run in order, a list of tuples
+        (inputs,outputs,target,seconds)
+        """
+        nIn=len(self.inputNames)
+        nOut=len(self.outputNames)
+        with self.lock:
+            self.flush()
+            self._open()
+            rows=self.conn.execute('SELECT {} FROM evaluations WHERE run=? ORDER BY seq'
+                                   .format(','.join(self.columns[3:])),(run,)).fetchall()
+        return [(row[:nIn],row[nIn:nIn+nOut],row[nIn+nOut],row[nIn+nOut+1]) for row in rows]
+
+    def getColumns(self,run=None,fluid=None):
+        """
+        Returns a dict {column: numpy array} with the evaluations of run
+        and/or fluid (None: all)
+        """
+        where=[]
+        params=[]
+        for (name,value) in (('run',run),('fluid',fluid)):
+            if value!=None:
+                where.append('{}=?'.format(name))
+                params.append(value)
+        sql='SELECT {} FROM evaluations'.format(','.join(self.columns))
+        if len(where)>0:
+            sql=sql+' WHERE '+' AND '.join(where)
+        with self.lock:
+            self.flush()
+            self._open()
+            rows=self.conn.execute(sql+' ORDER BY run,seq',params).fetchall()
+        types={'run':object,'seq':int,'fluid':object}
+        return {name:np.array([row[i] for row in rows],dtype=types.get(name,float))
+                for (i,name) in enumerate(self.columns)}
+
+    def countRuns(self):
+        """
+        Returns a dict {run: (fluid, number of evaluations)}
+        """
+        with self.lock:
+            self.flush()
+            self._open()
+            rows=self.conn.execute('SELECT run,fluid,COUNT(*) FROM evaluations GROUP BY run').fetchall()
+        return {row[0]:(row[1],row[2]) for row in rows}
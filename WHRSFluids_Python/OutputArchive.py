@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archive of the outputs of the WHRS evaluations for re-scoring them with
+any rank model
+
+@author: quevedo
+"""
+
+import threading
+import numpy as np
+
+class OutputArchive:
+    """
+    Inputs and outputs (WHRS_cycle_output, CO2_red, EPC) of the evaluations
+    made by the optimizers (see WHRSOptimizerBase archive param) or stored
+    in an EvaluationLedger (see fromLedger).
+    The rank value is linear in the outputs, so the best archived design of
+    any weight vector W (or of many of them at once) is a matrix product
+    and an argmax over the archive, without new simulations (see best), and
+    the best designs can warm start an optimizer (see getWarmStart).
+    It is thread-safe.
+    """
+    def __init__(self):
+        # Model
+        self.inputs=[]
+        self.outputs=[]
+        self.fluids=[]
+        self.keys=set()  # (inputs,fluid) of the evaluations, see add
+        self.arrays=None # (X,O,fluids) built by _arrays
+        self.lock=threading.Lock()
+
+    @classmethod
+    def fromLedger(cls,ledger,fluid=None):
+        """
+        Archive with the evaluations of an EvaluationLedger (of fluid, a
+        CoolProp code, None: all)
+        """
+        archive=cls()
+        columns=ledger.getColumns(fluid=fluid)
+        X=np.column_stack([columns[name] for name in ledger.inputNames])
+        O=np.column_stack([columns[name] for name in ledger.outputNames])
+        for (x,o,fluid) in zip(X.tolist(),O.tolist(),columns['fluid'].tolist()):
+            archive.add(x,o,fluid)
+        return archive
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def add(self,inputs,outputs,fluid):
+        """
+        Adds an evaluation: the 8 inputs, the 3 outputs of WHRS and the
+        CoolProp code of the fluid. The outputs only depend on the inputs
+        and the fluid, so an evaluation already archived (ex: replayed from
+        a ledger) is not added again
+        """
+        inputs=tuple(float(v) for v in inputs)
+        with self.lock:
+            if (inputs,fluid) in self.keys:
+                return
+            self.keys.add((inputs,fluid))
+            self.inputs.append(inputs)
+            self.outputs.append(tuple(float(v) for v in outputs))
+            self.fluids.append(fluid)
+            self.arrays=None
+
+    def _arrays(self):
+        with self.lock:
+            if self.arrays==None:
+                X=np.array(self.inputs,dtype=float).reshape(-1,8)
+                O=np.array(self.outputs,dtype=float).reshape(-1,3)
+                self.arrays=(X,O,np.array(self.fluids,dtype=object))
+            return self.arrays
+
+    def _select(self,fluid=None,LoadInterval=None):
+        """
+        Returns (X,O) of the evaluations of fluid with Load in LoadInterval
+        (None: all)
+        """
+        (X,O,fluids)=self._arrays()
+        mask=np.all(np.isfinite(O),axis=1)
+        if fluid!=None:
+            mask=mask & (fluids==fluid)
+        if LoadInterval!=None:
+            mask=mask & (X[:,0]>=LoadInterval[0]) & (X[:,0]<=LoadInterval[1])
+        return (X[mask],O[mask])
+
+    def scores(self,W,fluid=None,LoadInterval=None):
+        """
+        Returns (X,O,S): the inputs, the outputs and the rank values (one
+        column per weight vector if W is a matrix) of the selected
+        evaluations (see _select)
+        """
+        (X,O)=self._select(fluid,LoadInterval)
+        return (X,O,O.dot(np.asarray(W,dtype=float).T))
+
+    def best(self,W,fluid=None,LoadInterval=None):
+        """
+        Best archived design of the weight vector W ([w0,w1,w2]) or of each
+        row of W (a matrix of weight vectors) among the evaluations of fluid
+        with Load in LoadInterval (None: all).
+        Returns (inputs,outputs,rank value), with a row for each weight
+        vector if W is a matrix, or None if there are no evaluations
+        """
+        (X,O,S)=self.scores(W,fluid,LoadInterval)
+        if len(X)==0:
+            return None
+        ibest=np.argmax(S,axis=0)
+        return (X[ibest],O[ibest],S[ibest] if S.ndim==1 else S[ibest,np.arange(S.shape[1])])
+
+    def getWarmStart(self,W,nPoints=5,fluid=None,LoadInterval=None):
+        """
+        Returns the params x0, y0 (the nPoints best evaluations of W) to
+        warm start an optimizer (see WHRSskoptBayesian x0 and y0), None if
+        there are no evaluations
+        """
+        (X,_,S)=self.scores(W,fluid,LoadInterval)
+        if len(X)==0:
+            return None
+        x0=[]
+        y0=[]
+        for i in np.argsort(S)[::-1]:
+            x=X[i].tolist()
+            if x not in x0: # The same design can be archived with several fluids
+                x0.append(x)
+                y0.append(float(S[i]))
+                if len(x0)==nPoints:
+                    break
+        return {'x0':x0,'y0':y0}
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-memory cache of the PropsSI calls of WHRS
+
+@author: quevedo
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+class PropSICache:
+    """
+    Dict-like cache (P1,P2,P3,P4,P5,P6)->value of PropsSI calls with:
+        - optional maximum size with LRU (least recently used) eviction
+        - optional quantization of the inputs P3 and P5
+        - hit, miss and eviction counters
+    It is thread-safe and it can be pickled.
+
+    Quantization: if the input name (P2 or P4) has a relative tolerance rtol,
+    its value v is snapped to the nearest point of the grid
+    sign(v)*(1+rtol)^k and the property is calculated at that point (use key
+    to get the snapped call). Then near calls share the same entry.
+    The relative perturbation of the input is at most rtol/2, so the error of
+    a property y is bounded by |dy/dv|*|v|*rtol/2 (to first order).
+    Ex: rtol=1e-6 on T, P and H gives relative errors of order 1e-6 on the
+    outputs for states far from the saturation curve.
+    """
+    def __init__(self,maxSize=None,quantization=None):
+        """
+        Params:
+            maxSize      : maximum number of entries. Default=None (unbounded)
+            quantization : dict {input name: relative tolerance}.
+                           Ex: {'T':1e-6,'P':1e-6,'H':1e-6}
+                           Default=None (no quantization, only bit-identical
+                           calls hit)
+        """
+        # Params
+        self.maxSize=maxSize
+        self.quantization=quantization if quantization!=None else {}
+        self.logBase={name:math.log1p(rtol) for name,rtol in self.quantization.items()}
+
+        # Model
+        self.entries=OrderedDict()
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+        self.lock=threading.Lock()
+
+    def __getstate__(self):
+        state=self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self.lock=threading.Lock()
+
+    def _quantize(self,name,v):
+        if name not in self.logBase or v==None or v==0:
+            return v
+        k=round(math.log(abs(v))/self.logBase[name])
+        return math.copysign(math.exp(k*self.logBase[name]),v)
+
+    def key(self,P1,P2,P3,P4,P5,P6):
+        """
+        Returns the (quantized) call that is stored
+        """
+        if len(self.logBase)==0:
+            return (P1,P2,P3,P4,P5,P6)
+        return (P1,P2,self._quantize(P2,P3),P4,self._quantize(P4,P5),P6)
+
+    def get(self,Tup,default=None):
+        """
+        Returns the value of the call Tup (counting a hit) or default
+        (counting a miss)
+        """
+        with self.lock:
+            v=self.entries.get(Tup)
+            if v==None:
+                self.misses=self.misses+1
+                return default
+            self.hits=self.hits+1
+            if self.maxSize!=None:
+                self.entries.move_to_end(Tup)
+            return v
+
+    def __setitem__(self,Tup,v):
+        with self.lock:
+            self.entries[Tup]=v
+            if self.maxSize!=None:
+                self.entries.move_to_end(Tup)
+                while len(self.entries)>self.maxSize:
+                    self.entries.popitem(last=False)
+                    self.evictions=self.evictions+1
+
+    def __getitem__(self,Tup):
+        return self.entries[Tup]
+
+    def __contains__(self,Tup):
+        return Tup in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def items(self):
+        with self.lock:
+            return list(self.entries.items())
+
+    def update(self,d):
+        for Tup,v in d.items():
+            self[Tup]=v
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def getStats(self):
+        """
+        Returns a dict with the size and the counters of the cache
+        """
+        with self.lock:
+            calls=self.hits+self.misses
+            return {'size':len(self.entries),'maxSize':self.maxSize,
+                    'hits':self.hits,'misses':self.misses,'evictions':self.evictions,
+                    'hitRate':self.hits/calls if calls>0 else None}
+
+    def resetStats(self):
+        with self.lock:
+            self.hits=0
+            self.misses=0
+            self.evictions=0
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent store of the PropsSI calls of WHRS
+
+@author: quevedo
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+
+class PropSIStore:
+    """
+    Stores the PropsSI calls (P1,P2,P3,P4,P5,P6)->value in a SQLite database
+    in WAL mode, indexed by the call.
+    The values are read on demand (get). The file is memory-mapped, so only
+    the pages of the index that are needed are read and the processes that
+    use the same file share them through the page cache.
+    New values are kept in memory and written in batches (write-behind) when
+    batchSize values are pending, flushTime seconds have passed from the last
+    write, flush() or close() are called, or the program exits.
+    Each batch is written in one transaction, so after a crash the database is
+    consistent and only the pending values are lost.
+    The database is tagged. A database created with another tag (CoolProp
+    version, backend) is never used.
+    It is thread-safe and several processes can share the same file: each
+    one reads the values written by the others (get) and the batches are
+    written with a write lock of SQLite (BEGIN IMMEDIATE).
+    The objects can be pickled (ex: sent to pool workers), the copy opens its
+    own connection and starts without pending values.
+    A subclass can store other records changing the SQL of the table (see
+    ResultStore).
+    """
+    # Table of the calls
+    createSQL='CREATE TABLE IF NOT EXISTS props (p1 TEXT, p2 TEXT, p3 REAL, p4 TEXT, p5 REAL, p6 TEXT, value REAL,' \
+              ' PRIMARY KEY (p1,p2,p3,p4,p5,p6)) WITHOUT ROWID'
+    selectSQL='SELECT value FROM props WHERE p1=? AND p2=? AND p3=? AND p4=? AND p5=? AND p6=?'
+    insertSQL='INSERT OR IGNORE INTO props VALUES (?,?,?,?,?,?,?)'
+
+    def __init__(self,fileName,tag,batchSize=1000,flushTime=30,mmapSize=2**30,verbose=0):
+        """
+        Params:
+            fileName  : SQLite database file
+            tag       : string that identifies how the values were calculated.
+                        Ex: 'CoolProp 6.4.1 PropsSI'
+            batchSize : number of pending values that forces a write.
+                        Default=1000
+            flushTime : seconds from the last write that force a write.
+                        Default=30
+            mmapSize  : maximum bytes of the file that are memory-mapped.
+                        Default=2**30 (1 GB)
+            verbose   : int value in [0,2]. If >0 this class shows process' information.
+                        Default=0
+        """
+        # Params
+        self.fileName=fileName
+        self.tag=tag
+        self.batchSize=batchSize
+        self.flushTime=flushTime
+        self.mmapSize=mmapSize
+        self.verbose=verbose
+
+        # Model
+        self.conn=None
+        self.pending={}
+        self.lastFlush=time.time()
+        self.hits=0
+        self.misses=0
+        self.lock=threading.RLock()
+
+    def __getstate__(self):
+        state=self.__dict__.copy()
+        del state['conn'],state['lock']
+        state['pending']={} # They are written by the original object
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self.conn=None
+        self.lock=threading.RLock()
+
+    def open(self):
+        with self.lock:
+            self._open()
+
+    def _open(self):
+        if self.conn!=None:
+            return
+        self.conn=sqlite3.connect(self.fileName,timeout=60,isolation_level=None,
+                                  check_same_thread=False) # Access serialized by self.lock
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA mmap_size={}'.format(int(self.mmapSize)))
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(self.createSQL)
+        self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('tag',?)",(self.tag,))
+        storedTag=self.conn.execute("SELECT value FROM meta WHERE name='tag'").fetchone()[0]
+        if storedTag!=self.tag:
+            self.conn.close()
+            self.conn=None
+            raise Exception('PropSIStore: {} was created with "{}" not with "{}"'
+                            .format(self.fileName,storedTag,self.tag))
+        atexit.register(self.close)
+        if self.verbose>=1:
+            print('Opened {} ({})'.format(self.fileName,self.tag))
+
+    def loadAll(self):
+        """
+        Returns a dict with all the stored calls (all the file is read)
+        """
+        d={}
+        with self.lock:
+            self._open()
+            for row in self.conn.execute('SELECT p1,p2,p3,p4,p5,p6,value FROM props'):
+                d[row[:6]]=row[6]
+        if self.verbose>=1:
+            print('Readed: {} calls from {}'.format(len(d),self.fileName))
+        return d
+
+    def get(self,Tup):
+        """
+        Returns the value of the call Tup (pending or stored, maybe by other
+        process) or None
+        """
+        with self.lock:
+            value=self.pending.get(Tup)
+            if value==None:
+                self._open()
+                row=self.conn.execute(self.selectSQL,Tup).fetchone()
+                value=row[0] if row!=None else None
+            if value==None:
+                self.misses=self.misses+1
+            else:
+                self.hits=self.hits+1
+            return value
+
+    def getStats(self):
+        """
+        Returns a dict with the hits and misses of get and the pending values
+        """
+        with self.lock:
+            calls=self.hits+self.misses
+            return {'hits':self.hits,'misses':self.misses,'pending':len(self.pending),
+                    'hitRate':self.hits/calls if calls>0 else None}
+
+    def countCalls(self):
+        """
+        Returns a dict {fluid (P6): number of stored calls}
+        """
+        with self.lock:
+            self._open()
+            return dict(self.conn.execute('SELECT p6,COUNT(*) FROM props GROUP BY p6').fetchall())
+
+    def _row(self,Tup,value):
+        """
+        Row of the table of a pending value
+        """
+        return Tup+(value,)
+
+    def put(self,Tup,value):
+        with self.lock:
+            self.pending[Tup]=value
+
+    def needFlush(self):
+        return len(self.pending)>=self.batchSize or \
+               (len(self.pending)>0 and time.time()-self.lastFlush>=self.flushTime)
+
+    def flush(self):
+        with self.lock:
+            if len(self.pending)>0:
+                self._open()
+                self.conn.execute('BEGIN IMMEDIATE') # Write lock, other processes wait (timeout)
+                try:
+                    self.conn.executemany(self.insertSQL,
+                                          [self._row(Tup,value) for Tup,value in self.pending.items()])
+                    self.conn.execute('COMMIT')
+                except:
+                    self.conn.execute('ROLLBACK')
+                    raise
+                if self.verbose>=1:
+                    print('Guardado en {} {} entradas'.format(self.fileName,len(self.pending)))
+                self.pending={}
+            self.lastFlush=time.time()
+
+    def close(self):
+        with self.lock:
+            if self.conn==None:
+                return
+            self.flush()
+            self.conn.close()
+            self.conn=None
+            atexit.unregister(self.close)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent store of the evaluations of WHRS
+
+@author: quevedo
+"""
+
+from PropSIStore import PropSIStore
+
+class ResultStore(PropSIStore):
+    """
+    Stores the WHRS evaluations key->values in a SQLite database like
+    PropSIStore (write-behind batches, reads on demand, shared by several
+    processes).
+    key is a digest (bytes) of all that the evaluation depends on (inputs,
+    fluid, constants and model, see WHRS._resultKey), so the store never
+    returns results of other model or constants. values are the bytes of
+    the float64 params of the evaluation.
+    """
+    createSQL='CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, value BLOB) WITHOUT ROWID'
+    selectSQL='SELECT value FROM results WHERE key=?'
+    insertSQL='INSERT OR IGNORE INTO results VALUES (?,?)'
+
+    def __init__(self,fileName,batchSize=100,flushTime=30,verbose=0):
+        """
+        Params:
+            fileName  : SQLite database file
+            batchSize : see PropSIStore. Default=100
+            flushTime : see PropSIStore. Default=30
+            verbose   : int value in [0,2]. If >0 this class shows process' information.
+                        Default=0
+        """
+        PropSIStore.__init__(self,fileName,'WHRS results 1',batchSize=batchSize,
+                             flushTime=flushTime,verbose=verbose)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saturation curve tables of the fluids of WHRS
+
+@author: quevedo
+"""
+
+import bisect
+import math
+import os
+import os.path
+import threading
+import numpy as np
+import CoolProp
+from scipy.interpolate import PchipInterpolator
+
+class SaturationTable:
+    """
+    Saturation curve of a pure fluid as monotone cubic splines (PCHIP) of
+    log(P_sat(T)), T_sat(P), h_f, h_g, s_f and s_g (SI units, as PropsSI) built
+    once with CoolProp between the minimum and the critical temperature.
+
+    The splines use the variable u=1-sqrt((xc-x)/(xc-x0)) (x=T or log(P), xc
+    its critical value) that removes the square root behaviour of h and s
+    near the critical point. The knots are uniform in u.
+    Queries out of the table (or too near to the critical point) return NaN,
+    the caller must calculate them with CoolProp.
+
+    The knots are built the first time and stored in fileName (if it is not
+    None), later they are loaded from it.
+    It is thread-safe and it can be pickled.
+    """
+    def __init__(self,fluid,fileName=None,nKnots=2000,uMax=0.99,verbose=0):
+        """
+        Params:
+            fluid    : fluid with its backend, 'fluid' (HEOS) or 'BACKEND::fluid'
+            fileName : .npz file where the knots are stored.
+                       Default=None (not stored)
+            nKnots   : number of knots of the splines. Default=2000
+            uMax     : maximum value of u, the table ends at
+                       Tc-(1-uMax)^2*(Tc-Tmin). Default=0.99
+            verbose  : int value in [0,2]. If >0 this class shows process' information.
+                       Default=0
+        """
+        # Params
+        self.fluid=fluid
+        self.fileName=fileName
+        self.nKnots=nKnots
+        self.uMax=uMax
+        self.verbose=verbose
+        self.tag='CoolProp {} {}'.format(CoolProp.__version__,fluid)
+
+        # Model
+        self.splines=None # Built by _load
+        self.coefs={}     # Breakpoints and coefficients of the splines (scalar calls)
+        self.ranges={}    # input ('T' or 'P') and Q -> (x0,xc,min,max)
+        self.lock=threading.Lock()
+
+    def __getstate__(self):
+        state=self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self.lock=threading.Lock()
+
+    def _buildAbstractState(self):
+        if '::' in self.fluid:
+            (backend,name)=self.fluid.split('::')
+        else:
+            (backend,name)=('HEOS',self.fluid)
+        return CoolProp.AbstractState(backend,name)
+
+    def _calculateKnots(self):
+        """
+        Returns a dict with the arrays T, P0, H0, S0, P1, H1, S1 (0: saturated
+        liquid, 1: saturated vapor) and the critical point Tc, Pc
+        """
+        AS=self._buildAbstractState()
+        (Tmin,Tc,Pc)=(AS.Tmin(),AS.T_critical(),AS.p_critical())
+        u=np.linspace(0,self.uMax,self.nKnots)
+        T=Tc-(Tc-Tmin)*(1-u)**2
+        knots={'T':[],'P0':[],'H0':[],'S0':[],'P1':[],'H1':[],'S1':[]}
+        for t in T:
+            try:
+                row={'T':t}
+                for Q in (0,1):
+                    AS.update(CoolProp.QT_INPUTS,Q,t)
+                    row['P{}'.format(Q)]=AS.p()
+                    row['H{}'.format(Q)]=AS.hmass()
+                    row['S{}'.format(Q)]=AS.smass()
+            except Exception: # CoolProp raises ValueError or IndexError
+                continue # Point not calculated (near the triple or the critical point)
+            for name in knots:
+                knots[name].append(row[name])
+        knots={name:np.array(v) for name,v in knots.items()}
+        knots['Tc']=np.array(Tc)
+        knots['Pc']=np.array(Pc)
+        return knots
+
+    def _load(self):
+        knots=None
+        if self.fileName!=None and os.path.isfile(self.fileName):
+            with np.load(self.fileName) as data:
+                if str(data['tag'])==self.tag:
+                    knots={name:data[name] for name in data.files if name!='tag'}
+                    if self.verbose>=1:
+                        print('Saturation table of {} readed from {}'.format(self.fluid,self.fileName))
+        if knots==None:
+            if self.verbose>=1:
+                print('Building saturation table of {}'.format(self.fluid))
+            knots=self._calculateKnots()
+            if self.fileName!=None:
+                tmpName='{}.{}.tmp.npz'.format(self.fileName,os.getpid())
+                np.savez(tmpName,tag=self.tag,**knots)
+                os.replace(tmpName,self.fileName) # Other processes never read a partial file
+                if self.verbose>=1:
+                    print('Saturation table of {} saved in {}'.format(self.fluid,self.fileName))
+
+        splines={}
+        T=knots['T']
+        for Q in (0,1):
+            P=knots['P{}'.format(Q)]
+            for (P2,x,xc) in (('T',T,float(knots['Tc'])),('P',np.log(P),np.log(float(knots['Pc'])))):
+                keep=x<xc # Pseudo-pure fluids can reach the critical pressure before Tc
+                self.ranges[(P2,Q)]=(x[0],xc,x[0],x[keep][-1])
+                u=self._u(P2,Q,x[keep])
+                for P1 in ('T','P','H','S'):
+                    if P1==P2:
+                        continue
+                    y=T if P1=='T' else knots['{}{}'.format(P1,Q)]
+                    if P1=='P':
+                        y=np.log(y) # P_sat(T) is interpolated in log scale
+                    spline=PchipInterpolator(u,y[keep],extrapolate=False)
+                    splines[(P2,Q,P1)]=spline
+                    self.coefs[(P2,Q,P1)]=(spline.x.tolist(),spline.c.T.tolist())
+        self.splines=splines # The last one, the table is ready
+
+    def _u(self,P2,Q,x):
+        (x0,xc,_,_)=self.ranges[(P2,Q)]
+        return 1-np.sqrt((xc-x)/(xc-x0))
+
+    def __call__(self,P1,P2,v,Q):
+        """
+        Value of the property P1 ('T','P','H' or 'S') of the saturated state
+        with quality Q (0 or 1) and P2 ('T' or 'P') = v. v can be an array.
+        Returns NaN for the values of v out of the table and None if the
+        query is not supported
+        """
+        if P2 not in ('T','P') or P1 not in ('T','P','H','S') or Q not in (0,1):
+            return None
+        if self.splines==None:
+            with self.lock:
+                if self.splines==None:
+                    self._load()
+        if P1==P2:
+            return v
+        if np.isscalar(v):
+            return self._scalarCall(P1,P2,v,Q)
+        x=np.log(v) if P2=='P' else np.asarray(v,dtype=float)
+        (_,_,xMin,xMax)=self.ranges[(P2,Q)]
+        inside=(x>=xMin) & (x<=xMax)
+        u=self._u(P2,Q,np.where(inside,x,xMin))
+        y=np.where(inside,self.splines[(P2,Q,P1)](u),np.nan)
+        if P1=='P':
+            y=np.exp(y)
+        return y
+
+    def _scalarCall(self,P1,P2,v,Q):
+        """
+        Like __call__ for a scalar v, without numpy (a few microseconds)
+        """
+        x=math.log(v) if P2=='P' else v
+        (x0,xc,xMin,xMax)=self.ranges[(P2,Q)]
+        if not (xMin<=x<=xMax):
+            return math.nan
+        u=1-math.sqrt((xc-x)/(xc-x0))
+        (X,C)=self.coefs[(P2,Q,P1)]
+        i=min(max(bisect.bisect_right(X,u)-1,0),len(X)-2)
+        dx=u-X[i]
+        c=C[i]
+        y=((c[0]*dx+c[1])*dx+c[2])*dx+c[3]
+        if P1=='P':
+            return math.exp(y)
+        return y
@@ -11,16 +11,31 @@ New in version 2:
 """
 
 
+import hashlib
+import inspect
 import math
 import pickle
+import sys
+import threading
 import os.path
+import numpy as np
+import CoolProp
 import CoolProp.CoolProp as CP
+from PropSIStore import PropSIStore
+from PropSICache import PropSICache
+from ResultStore import ResultStore
+from SaturationTable import SaturationTable
+from WHRSProfiler import WHRSProfiler
 
 class WHRS():
-    def __init__(self,PropsSIStore='file',verbose=0):
+    def __init__(self,PropsSIStore='file',verbose=0,PropsSIBackend='PropsSI',
+                 TabularBackend=None,tablesDir='CoolPropTables',WaterBackend='HEOS',
+                 PropsSICacheSize=None,PropsSIQuantization=None,StageCacheSize=10000,
+                 SaturationTables=False,ResultStore=None,ResultCacheSize=100000,
+                 Profile=False):
         """
         Params:
-            PropsSIStore : possible values: 'none','memory','file'
+            PropsSIStore : possible values: 'none','memory','file','shared'
                             What to do with PropsSI calls
                             'none'   : no store. All times a value is required 
                                        a call to PropsSI method is executed
@@ -29,15 +44,130 @@ class WHRS():
                                        PropsSI(P) is later called the value stored
                                        will be used (only 1 call per parameters' value')
                             'file'   : like memory but all the calls are stored 
-                                       in a file and loaded at the begining of 
-                                       the execution
+                                       in a file. The file is a SQLite
+                                       database (see PropSIStore) tagged with
+                                       the CoolProp version and PropsSIBackend.
+                                       It is not loaded, the calls not found
+                                       in memory are looked for in its index.
+                                       The file is memory-mapped, only the
+                                       pages needed are read and they are
+                                       shared by the processes through the
+                                       page cache.
+                                       New calls are written in batches, use
+                                       flush(), close() or a with statement to
+                                       force the writing
+                            'shared' : like file but for several processes
+                                       (ex: pool workers) that use the same
+                                       file at the same time. The new calls
+                                       are written in small batches (100
+                                       calls or 5 s) so the others can use
+                                       them soon
                             Default='file'
             verbose      : int value in [0,2]. If >0 this class shows process' information.
                          Default=0
+            PropsSIBackend : possible values: 'PropsSI','AbstractState'
+                            How the properties not stored are calculated
+                            'PropsSI'       : high-level CoolProp PropsSI
+                                              function. A flash per output
+                            'AbstractState' : a CoolProp AbstractState per fluid
+                                              is kept. The properties of the
+                                              same state are calculated with
+                                              only one flash (update)
+                            Default='PropsSI'
+            TabularBackend : None, 'BICUBIC', 'TTSE' or a dict {fluid Id: 'BICUBIC'|'TTSE'}
+                            CoolProp tabular backend (BICUBIC&HEOS or TTSE&HEOS)
+                            used for the ORC fluids instead of HEOS. A string
+                            selects it for all the ORC fluids, a dict only for
+                            its fluids. Requires PropsSIBackend='AbstractState'.
+                            The tables are faster but less accurate, see
+                            tabularAccuracyReport.
+                            Default=None (HEOS for all the fluids)
+            tablesDir    : directory where CoolProp stores the tables, they are
+                            built the first time a fluid is used and loaded from
+                            this directory later.
+                            Default='CoolPropTables'
+            WaterBackend : possible values: 'HEOS','IF97'
+                            Backend of all the water and sea water properties.
+                            'IF97' uses the CoolProp IAPWS-IF97 backend, faster
+                            than HEOS. The ORC fluids are not affected.
+                            See waterAccuracyReport.
+                            Default='HEOS'
+            PropsSICacheSize : maximum number of PropsSI calls of each fluid
+                            (water and each ORC fluid have their own cache)
+                            stored in memory. The least recently used are
+                            evicted.
+                            Default=None (unbounded)
+            PropsSIQuantization : dict {input name: relative tolerance}. The
+                            inputs are snapped to a grid so near calls reuse
+                            the stored value, the relative error of the input
+                            is at most tolerance/2 (see PropSICache).
+                            Ex: {'T':1e-6,'P':1e-6,'H':1e-6}
+                            Default=None (no quantization)
+            StageCacheSize : maximum number of results stored for each stage
+                            of the model (see self.stages). The least recently
+                            used are evicted.
+                            Default=10000
+            SaturationTables : if True the saturation calls (PropsSI with
+                            'Q'=0 or 1 and 'T' or 'P' as input) are calculated
+                            with splines of the saturation curve of each fluid
+                            (see SaturationTable) instead of CoolProp. The
+                            tables are built the first time a fluid is used
+                            and stored in files next to the PropsSI file
+                            (PropsSIStore='file' or 'shared'). See
+                            saturationAccuracyReport.
+                            Default=False
+            ResultStore  : possible values: 'none','memory','file'
+                            What to do with the whole evaluations (the 26
+                            params). They are stored with a key (see
+                            _resultKey) of the inputs, the fluid, the
+                            constants (see constantNames) and a hash of the
+                            code of the model and its options, and they are
+                            looked for before any PropsSI call.
+                            'none'   : no store
+                            'memory' : store in memory
+                            'file'   : like memory but they are stored in
+                                       the file WHRSResults.sqlite too (see
+                                       ResultStore), shared by the runs and
+                                       processes. The file is written in
+                                       batches, use flush(), close() or a
+                                       with statement to force the writing
+                            See getResultCacheStats.
+                            Default=None: 'file' if PropsSIStore is 'file'
+                            or 'shared', else 'memory' (the objects that do
+                            not write the PropsSI file do not write files)
+            ResultCacheSize : maximum number of evaluations stored in memory.
+                            The least recently used are evicted.
+                            Default=100000
+            Profile      : if True the wall time of the sections of the
+                            evaluations (Inputs, Desalination, RC, ORC, TEG,
+                            Seawater, Performance), the stages and the
+                            CoolProp calculations, the property calls of each
+                            call site and the hits and misses of the caches
+                            are measured in self.profiler (see WHRSProfiler
+                            and getProfileStats). If False there is no cost.
+                            Default=False
         """
         # Params
         self.verbose=verbose
+        if PropsSIStore not in ('none','memory','file','shared'):
+            raise Exception('WHRS constructor: PropsSIStore={} is not valid'.format(PropsSIStore))
         self.PropsSIStore=PropsSIStore
+        if PropsSIBackend not in ('PropsSI','AbstractState'):
+            raise Exception('WHRS constructor: PropsSIBackend={} is not valid'.format(PropsSIBackend))
+        self.PropsSIBackend=PropsSIBackend
+        if TabularBackend!=None and PropsSIBackend!='AbstractState':
+            raise Exception('WHRS constructor: TabularBackend requires PropsSIBackend=\'AbstractState\'')
+        self.TabularBackend=TabularBackend
+        self.tablesDir=tablesDir
+        if WaterBackend not in ('HEOS','IF97'):
+            raise Exception('WHRS constructor: WaterBackend={} is not valid'.format(WaterBackend))
+        self.WaterBackend=WaterBackend
+        self.SaturationTables=SaturationTables
+        if ResultStore==None:
+            ResultStore='file' if PropsSIStore in ('file','shared') else 'memory'
+        if ResultStore not in ('none','memory','file'):
+            raise Exception('WHRS constructor: ResultStore={} is not valid'.format(ResultStore))
+        self.ResultStore=ResultStore
         
 
         
@@ -60,6 +190,12 @@ class WHRS():
         self.T_des_surface_Constan=60+273.15   # DESALINATION
         self.N_TEG_Constant=100         # TEG
         self.TEG_hot_Constant=61.965+273.15
+        self.m_jw_Constant=16.685       # ENGINE JW
+        self.Cp_jw_Constant=4.05        # ENGINE JW
+        self.m_sw_Constant=11.62        # SW PUMP
+        self.T_env_Constant=298.15      # AMBIENT
+        self.Turb_eff_RC_Constant=0.8   # RC TURBINE
+        self.Turb_eff_ORC_Constant=0.8  # ORC TURBINE
         
         # Fluid Names and Codes
                              # Name                  Code                   Id
@@ -83,8 +219,28 @@ class WHRS():
         self.defaultFluidId=1 # Cyclohexane
         
         # Stored PropSI
-        self.filePropSI='PropSI.dump'
-        self.dictPropSI={}
+        self.filePropSI='PropSI_CoolProp{}_{}.sqlite'.format(CoolProp.__version__,self.PropsSIBackend)
+        self.PropsSICacheSize=PropsSICacheSize
+        self.PropsSIQuantization=PropsSIQuantization
+        self.dictPropSI={} # fluid with backend -> PropSICache of its calls
+        self.storePropSI=None
+        
+        # CoolProp AbstractStates (one per thread, they are not thread-safe)
+        # and constants (Tcrit,...) of each fluid
+        self.threadLocal=threading.local()
+        self.lock=threading.RLock() # Creation of the shared caches and tables
+        self.dictFluidConstant={}
+        self.dictParamIndex={}
+        self.dictFluidBackend={} # fluid code -> 'BACKEND::code' if it is not HEOS
+        self.TabularBackends={'BICUBIC':'BICUBIC&HEOS','TTSE':'TTSE&HEOS'}
+        self.dictSaturationTable={} # fluid with backend -> SaturationTable (loaded when it is used)
+        if self.TabularBackend!=None:
+            self._setTabularBackend(self.TabularBackend)
+        if self.WaterBackend!='HEOS':
+            self.dictFluidBackend["Water"]='{}::Water'.format(self.WaterBackend)
+        if self.PropsSIBackend=='AbstractState':
+            self._buildAbstractState("Water")
+            self._buildAbstractState(self._getDefaultFluidCode())
         
         # Input parameters' ranges
         self.params_range={'Load'         :[50   ,100   ], # [50,100] Beta(a=2,b=2)*50+50 <- entre 75-80
@@ -127,61 +283,456 @@ class WHRS():
                                ('EPC','o')               #25
                               ]
         
+        # Stages of the model: name -> (declared inputs, fixed params, function)
+        # The result of a stage only depends on its inputs and the fixed
+        # params (self.*_Constant) it reads, and it is stored in its cache
+        # with the values of both (see _runStage)
+        self.stages={'Seawater'    :([],
+                                     ['T_sw_in_Constant','P_sw_in_Constant'],
+                                     self._seawaterStage),
+                     'Desalination':(['HT_pump','P_chamber'],
+                                     ['T_D2_Constant','Pinch_point_des_Constant','T_des_surface_Constan',
+                                      'm_jw_Constant','Cp_jw_Constant','T_env_Constant'],
+                                     self._desalinationStage),
+                     'RC'          :(['HT_pump','RC_Superheat','RC_Subcool'],
+                                     ['T_D2_Constant','T_Pump_eff_Constant','m_jw_Constant',
+                                      'Cp_jw_Constant','T_env_Constant','Turb_eff_RC_Constant'],
+                                     self._rcStage),
+                     'ORC'         :(['Fluid','ORC_Superheat','ORC_Subcool','ORC_Pump'],
+                                     ['T_sw_in_Constant','ORC_Pump_eff_Constant','Turb_eff_ORC_Constant'],
+                                     self._orcStage)
+                    }
+        self.stageCache={name:PropSICache(StageCacheSize) for name in self.stages}
+        
+        self.inputNames=[NT[0] for NT in self.params_name_type if NT[1]=='i'] # Inputs of _evaluate
+        
+        self.resultDtype=np.dtype([(NT[0],'f8') for NT in self.params_name_type]) # See evaluate
+        
+        # Stored evaluations (see _evaluate)
+        # The key depends on the constants and tables (their current values)
+        # and on the code of the model and the options that change the results
+        self.constantNames=sorted(name for name in vars(self) if name.endswith(('_Constant','_Constan')))
+        self.tableNames=['EngineLoad','FOConsumption','TempEG','MaxFlowRate','FO_consumption_WO',
+                         'Engine_blockLoad','Engine_block']
+        source=''.join(inspect.getsource(cls) for cls in (type(self),SaturationTable,PropSICache))
+        options=(CoolProp.__version__,CoolProp.__gitrevision__,self.PropsSIBackend,self.TabularBackend,
+                 self.WaterBackend,self.SaturationTables,self.PropsSIQuantization)
+        self.modelHash=hashlib.sha1((source+repr(options)).encode()).hexdigest()
+        self.fileResult='WHRSResults.sqlite'
+        self.resultCache=PropSICache(ResultCacheSize) if self.ResultStore!='none' else None
+        self.storeResult=None
+        
+        # Profiler (see Profile)
+        self.profiler=WHRSProfiler(self._getAllCacheStats) if Profile else None
+        
         # Model
         self.params_value=[None]*len(self.params_name_type) 
 
+    def __getstate__(self):
+        """
+        The objects can be pickled (ex: sent to pool workers). The copy has
+        its own AbstractStates and locks
+        """
+        state=self.__dict__.copy()
+        del state['threadLocal'],state['lock']
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self.threadLocal=threading.local()
+        self.lock=threading.RLock()
+
     def _loadPropSI(self):
-        if self.PropsSIStore!='file':
+        if self.PropsSIStore not in ('file','shared') or self.storePropSI!=None:
             return
-        if len(self.dictPropSI)==0: # No loaded data
-            if self.verbose>=1:
-                print('There are no PropSI data')
-            if not os.path.isfile(self.filePropSI): # No file
-                if self.verbose>=1:
-                    print('Not exist file: {}'.format(self.filePropSI))
-                return 
-            # There is file
-            if self.verbose>=1:
-                print('Reading from file: {}'.format(self.filePropSI))
-            with open(self.filePropSI, 'rb') as f:
-                self.dictPropSI=pickle.load(f)  # self.dictPropSI
-                if self.verbose>=1:
-                    print('Readed: {} calls'.format(len(self.dictPropSI)))
+        with self.lock:
+            if self.storePropSI==None: # No loaded data
+                tag='CoolProp {} {}'.format(CoolProp.__version__,self.PropsSIBackend)
+                if self.PropsSIStore=='shared':
+                    store=PropSIStore(self.filePropSI,tag,batchSize=100,flushTime=5,verbose=self.verbose)
+                else:
+                    store=PropSIStore(self.filePropSI,tag,verbose=self.verbose)
+                store.open() # The calls are read on demand (see _getStoredPropSI)
+                self.storePropSI=store
                     
     def _savePropSI(self):
-        if self.PropsSIStore!='file':
-            return
-        with open(self.filePropSI, 'wb') as f:
-            pickle.dump(self.dictPropSI,f)  # dictPropSI
+        if self.storePropSI!=None and self.storePropSI.needFlush():
+            self.storePropSI.flush()
+
+    def _getPropSICache(self,fluid):
+        """
+        Cache of the PropsSI calls of fluid (with its backend)
+        """
+        cache=self.dictPropSI.get(fluid)
+        if cache==None:
+            with self.lock:
+                if fluid not in self.dictPropSI:
+                    self.dictPropSI[fluid]=PropSICache(self.PropsSICacheSize,self.PropsSIQuantization)
+                cache=self.dictPropSI[fluid]
+        return cache
+
+    def _getStoredPropSI(self,cache,Tup):
+        """
+        Value of the call Tup stored in cache or in the file (it is copied to
+        cache). None if it is not stored
+        """
+        v=cache.get(Tup)
+        if v==None and self.storePropSI!=None:
+            v=self.storePropSI.get(Tup)
+            if v!=None:
+                cache[Tup]=v
+        return v
+
+    def clearPropSICaches(self):
+        """
+        Removes the PropsSI calls stored in memory (not the ones of the file)
+        """
+        for cache in list(self.dictPropSI.values()):
+            cache.clear()
+
+    def _setPropSI(self,Tup,prop):
+        self._getPropSICache(Tup[5])[Tup]=prop # Store in dict
+        if self.storePropSI!=None:
+            self.storePropSI.put(Tup,prop)
+
+    def getCacheStats(self):
+        """
+        Returns a dict with the size and the hits, misses and evictions of the
+        in-memory PropsSI caches (the sum of all the fluids) and in 'fluids'
+        a dict {fluid: stats of its cache}. With a file, in 'store' the
+        stats of the file (PropSIStore.getStats)
+        """
+        fluids={fluid:cache.getStats() for fluid,cache in self.dictPropSI.items()}
+        stats={name:sum(fs[name] for fs in fluids.values()) for name in ('size','hits','misses','evictions')}
+        calls=stats['hits']+stats['misses']
+        stats['maxSize']=self.PropsSICacheSize
+        stats['hitRate']=stats['hits']/calls if calls>0 else None
+        stats['fluids']=fluids
+        if self.storePropSI!=None:
+            stats['store']=self.storePropSI.getStats()
+        return stats
+
+    def flush(self):
+        """
+        Writes the pending PropsSI calls to the file (PropsSIStore='file' or
+        'shared') and the pending evaluations to its file (ResultStore='file')
+        """
+        if self.storePropSI!=None:
+            self.storePropSI.flush()
+        if self.storeResult!=None:
+            self.storeResult.flush()
+
+    def close(self):
+        """
+        Writes the pending PropsSI calls and evaluations and closes the files
+        """
+        if self.storePropSI!=None:
+            self.storePropSI.close()
+            self.storePropSI=None
+        if self.storeResult!=None:
+            self.storeResult.close()
+            self.storeResult=None
+
+    def _resultKey(self,inputs,fluid):
+        """
+        Digest of the evaluation of inputs (the 8 input params) with fluid:
+        the inputs, the fluid code, the current constants and tables and the
+        hash of the model (modelHash)
+        """
+        constants=tuple(getattr(self,name) for name in self.constantNames)
+        tables=tuple(tuple(getattr(self,name)) for name in self.tableNames)
+        key=(self.modelHash,self.getFluidCode(fluid),tuple(float(v) for v in inputs),constants,tables)
+        return hashlib.sha1(repr(key).encode()).digest()
+
+    def getModelKey(self,fluid=None):
+        """
+        Hex digest of what the evaluations with fluid depend on except the
+        inputs: the fluid code, the current constants and tables and the
+        hash of the model (see _resultKey)
+        """
+        return self._resultKey([0.0]*8,fluid).hex()
+
+    def _getStoredResult(self,key):
+        """
+        Params of the evaluation key stored in memory or in the file
+        (ResultStore='file'). None if it is not stored
+        """
+        values=self.resultCache.get(key)
+        if values==None and self.ResultStore=='file':
+            if self.storeResult==None:
+                with self.lock:
+                    if self.storeResult==None:
+                        self.storeResult=ResultStore(os.path.join(os.path.dirname(self.filePropSI),self.fileResult),
+                                                     verbose=self.verbose)
+            values=self.storeResult.get((key,))
+            if values!=None:
+                values=tuple(np.frombuffer(values,dtype='f8').tolist())
+                self.resultCache[key]=values
+        return values
+
+    def _setResult(self,key,values):
+        values=tuple(values)
+        self.resultCache[key]=values
+        if self.storeResult!=None:
+            self.storeResult.put((key,),np.array(values,dtype='f8').tobytes())
+            if self.storeResult.needFlush():
+                self.storeResult.flush()
+
+    def getResultCacheStats(self):
+        """
+        Returns a dict with the size, hits, misses, evictions and hitRate of
+        the stored evaluations in memory and, with ResultStore='file', in
+        'store' the stats of the file (PropSIStore.getStats)
+        """
+        if self.resultCache==None:
+            return None
+        stats=self.resultCache.getStats()
+        if self.storeResult!=None:
+            stats['store']=self.storeResult.getStats()
+        return stats
+
+    def countStoredPropSI(self):
+        """
+        Returns a dict {fluid code: number of PropsSI calls in the file}
+        (PropsSIStore='file' or 'shared'). The pending calls are written first
+        """
+        self._loadPropSI()
+        if self.storePropSI==None:
+            return {}
+        self.flush()
+        counts={}
+        for fluid,n in self.storePropSI.countCalls().items():
+            code=fluid.split('::')[-1] # Without backend
+            counts[code]=counts.get(code,0)+n
+        return counts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close()
+
+    def importPropSIDump(self,fileName='PropSI.dump'):
+        """
+        Adds the calls of a pickle file of the version 2 (PropSI.dump) to the
+        stored calls. The file is not checked, it must be created with the
+        same CoolProp version
+        """
+        self._loadPropSI()
+        with open(fileName,'rb') as f:
+            dictPropSI=pickle.load(f)
+        for Tup,prop in dictPropSI.items():
+            if Tup[2]!=None: # Constants are not stored
+                if self.storePropSI!=None:
+                    self.storePropSI.put(Tup,prop) # The stored calls are not replaced
+                else:
+                    self._getPropSICache(Tup[5])[Tup]=prop
+        self.flush()
         if self.verbose>=1:
-            print('Guardado en {} {} entradas de PropSI'
-                  .format(self.filePropSI,len(self.dictPropSI)))
+            print('Imported {} calls from {}'.format(len(dictPropSI),fileName))
+
+    def _setTabularBackend(self,TabularBackend):
+        if type(TabularBackend)==dict:
+            fluidTabular=TabularBackend
+        else:
+            fluidTabular={fluid:TabularBackend for fluid in range(len(self.FluidNameCode))}
+        for fluid,tabular in fluidTabular.items():
+            if tabular not in self.TabularBackends:
+                raise Exception('WHRS constructor: TabularBackend={} is not in {}'
+                                .format(tabular,list(self.TabularBackends.keys())))
+            fluidCode=self.FluidNameCode[fluid][1]
+            self.dictFluidBackend[fluidCode]='{}::{}'.format(self.TabularBackends[tabular],fluidCode)
+        # CoolProp saves (and later loads) the tables in this directory
+        if not os.path.isdir(self.tablesDir):
+            os.makedirs(self.tablesDir)
+        CP.set_config_string(CP.ALTERNATIVE_TABLES_DIRECTORY,os.path.join(os.path.abspath(self.tablesDir),''))
+
+    def _backendFluid(self,fluid):
+        """
+        Returns the fluid with its backend: 'fluid' (HEOS) or 'BACKEND::fluid'
+        """
+        return self.dictFluidBackend.get(fluid,fluid)
+
+    def _isTabularFluid(self,fluid):
+        return fluid.split('::')[0] in self.TabularBackends.values()
+
+    def _buildAbstractState(self,fluid):
+        """
+        AbstractState of the fluid for the current thread
+        """
+        fluid=self._backendFluid(fluid)
+        dictAbstractState=self.threadLocal.__dict__.setdefault('dictAbstractState',{})
+        if fluid not in dictAbstractState:
+            if '::' in fluid:
+                (backend,name)=fluid.split('::')
+            else:
+                (backend,name)=('HEOS',fluid)
+            if self.verbose>=1:
+                print('Building {} AbstractState for {}'.format(backend,name))
+            dictAbstractState[fluid]=CoolProp.AbstractState(backend,name)
+        return dictAbstractState[fluid]
+
+    def _paramIndex(self,name):
+        if name not in self.dictParamIndex:
+            self.dictParamIndex[name]=CP.get_parameter_index(name)
+        return self.dictParamIndex[name]
+
+    def _getFluidConstant(self,P1,fluid):
+        """
+        Constant of a fluid (P1='Tcrit',...). It is calculated only once
+        """
+        fluid=self._backendFluid(fluid)
+        Tup=(P1,fluid)
+        if Tup not in self.dictFluidConstant:
+            if self.PropsSIBackend=='AbstractState':
+                AS=self._buildAbstractState(fluid)
+                self.dictFluidConstant[Tup]=AS.keyed_output(self._paramIndex(P1))
+            else:
+                self.dictFluidConstant[Tup]=CP.PropsSI(P1,fluid)
+        return self.dictFluidConstant[Tup]
+
+    def _getSaturationTable(self,fluid):
+        fluid=self._backendFluid(fluid)
+        if fluid not in self.dictSaturationTable:
+            with self.lock:
+                if fluid not in self.dictSaturationTable:
+                    fileName=None
+                    if self.PropsSIStore in ('file','shared'):
+                        fileName=os.path.join(os.path.dirname(self.filePropSI),'SatTable_CoolProp{}_{}.npz'
+                                              .format(CoolProp.__version__,fluid.replace('::','_').replace('&','_')))
+                    self.dictSaturationTable[fluid]=SaturationTable(fluid,fileName,verbose=self.verbose)
+        return self.dictSaturationTable[fluid]
+
+    def _saturationTableProp(self,P1,P2,P3,P4,P5,P6):
+        """
+        Saturation call (P2 or P4 = 'Q') calculated with the saturation table
+        of the fluid P6. The value of 'T' or 'P' can be an array.
+        Returns None if it is not a call supported by the table or
+        SaturationTables=False, and NaN for the values out of the table
+        """
+        if not self.SaturationTables:
+            return None
+        if P2=='Q':
+            (P2,P3,P4,P5)=(P4,P5,P2,P3)
+        if P4!='Q' or not np.isscalar(P5):
+            return None
+        return self._getSaturationTable(P6)(P1,P2,P3,P5)
+
+    def _calculatePropsSI(self,Outputs,P2,P3,P4,P5,P6):
+        """
+        Calculates the Outputs of the state (P2=P3,P4=P5) of the fluid P6
+        with the selected backend (without storing them)
+        """
+        if self.profiler!=None:
+            self.profiler.push('CoolProp')
+        try:
+            if self.PropsSIBackend=='AbstractState':
+                AS=self._buildAbstractState(P6)
+                AS.update(*CP.generate_update_pair(self._paramIndex(P2),P3,self._paramIndex(P4),P5))
+                props=[AS.keyed_output(self._paramIndex(P1)) for P1 in Outputs]
+            else:
+                props=[CP.PropsSI(P1,P2,P3,P4,P5,P6) for P1 in Outputs]
+        except ValueError:
+            print('Error en: CP.PropsSI({},{},{},{},{},{}'.format(Outputs,P2,P3,P4,P5,P6))
+            raise
+        finally:
+            if self.profiler!=None:
+                self.profiler.pop()
+        if self.verbose>=2:
+            print('({} {} {} {} {} {}) -> {}'.format(Outputs,P2,P3,P4,P5,P6,props))
+        return props
 
     def _py_CoolProp_CoolProp_PropsSI(self,P1,P2,P3=None,P4=None,P5=None,P6=None):#('P','T',T_cond_ORC,'Q',1,self._getDefaultFluidCode()) 
-        Tup=(P1,P2,P3,P4,P5,P6)
-        if Tup in self.dictPropSI:
-            v=self.dictPropSI[Tup]
+        if P3==None:
+            return self._getFluidConstant(P1,P2)
+        if self.profiler!=None:
+            self._countCallSite('PropsSI')
+        
+        prop=self._saturationTableProp(P1,P2,P3,P4,P5,P6)
+        if prop!=None and not math.isnan(prop):
+            return prop
+        
+        P6=self._backendFluid(P6)
+        cache=self._getPropSICache(P6)
+        Tup=cache.key(P1,P2,P3,P4,P5,P6)
+        v=self._getStoredPropSI(cache,Tup)
+        if v!=None:
             if self.verbose>=2:
                 print('Stored: {} -> {}'.format(Tup,v))
             return v
         
-        try:
-            if P3==None:
-                prop = CP.PropsSI(P1,P2)
-            else:
-                prop = CP.PropsSI(P1,P2,P3,P4,P5,P6)
-            if self.verbose>=2:
-                print('({} {} {} {} {} {}) -> {}'.format(P1,P2,P3,P4,P5,P6,prop))
-        except ValueError:
-            print('Error en: CP.PropsSI({},{},{},{},{},{}'.format(P1,P2,P3,P4,P5,P6))
-            raise
-            
-            
+        prop=self._calculatePropsSI((P1,),*Tup[1:])[0]
         
-        self.dictPropSI[Tup]=prop # Store in dict
+        self._setPropSI(Tup,prop)
         
         return prop
+
+    def _py_CoolProp_CoolProp_StateSI(self,Outputs,P2,P3,P4,P5,P6):#(('H','S','D'),'T',T_ORC1,'P',P_ORC1,self._getDefaultFluidCode()) 
+        """
+        Like _py_CoolProp_CoolProp_PropsSI but returns a tuple with several 
+        outputs of the same state. Each output is stored as a PropsSI call.
+        With the 'AbstractState' backend the outputs not stored are calculated
+        with only one flash
+        """
+        if self.profiler!=None:
+            self._countCallSite('StateSI')
+        props=[self._saturationTableProp(P1,P2,P3,P4,P5,P6) for P1 in Outputs]
+        if None not in props and not any(math.isnan(prop) for prop in props):
+            return tuple(props)
+        P6=self._backendFluid(P6)
+        cache=self._getPropSICache(P6)
+        (_,P2,P3,P4,P5,P6)=cache.key(None,P2,P3,P4,P5,P6)
+        props=[self._getStoredPropSI(cache,(P1,P2,P3,P4,P5,P6)) for P1 in Outputs]
+        if None in props:
+            if self.PropsSIBackend=='AbstractState':
+                props=self._calculatePropsSI(Outputs,P2,P3,P4,P5,P6)
+                for P1,prop in zip(Outputs,props):
+                    self._setPropSI((P1,P2,P3,P4,P5,P6),prop)
+            else:
+                for i in range(len(Outputs)):
+                    if props[i]==None:
+                        props[i]=self._calculatePropsSI((Outputs[i],),P2,P3,P4,P5,P6)[0]
+                        self._setPropSI((Outputs[i],P2,P3,P4,P5,P6),props[i])
+        elif self.verbose>=2:
+            print('Stored: {} {} -> {}'.format(Outputs,(P2,P3,P4,P5,P6),props))
+        return tuple(props)
             
+    def _countCallSite(self,method):
+        frame=sys._getframe(2) # The caller of the PropsSI method
+        self.profiler.count('{} {}:{}'.format(method,frame.f_code.co_name,frame.f_lineno))
+
+    def _section(self,name):
+        """
+        Starts the section name of the evaluation (None: ends the last one)
+        in the profiler
+        """
+        if self.profiler!=None:
+            self.profiler.section(name)
+
+    def _getAllCacheStats(self):
+        """
+        Stats of all the caches {name: stats} (see WHRSProfiler)
+        """
+        stats={'PropsSI':self.getCacheStats()}
+        for name,cacheStats in self.getStageStats().items():
+            stats['Stage '+name]=cacheStats
+        stats['Results']=self.getResultCacheStats()
+        if self.storePropSI!=None:
+            stats['PropsSI file']=self.storePropSI.getStats()
+        if self.storeResult!=None:
+            stats['Results file']=self.storeResult.getStats()
+        return stats
+
+    def getProfileStats(self):
+        """
+        Returns the stats of the profiler (see WHRSProfiler.getStats and
+        Profile in __init__) or None if it is not enabled. Use
+        self.profiler.saveJSON, saveSpeedscope or saveCollapsed to export them
+        """
+        if self.profiler==None:
+            return None
+        return self.profiler.getStats()
+
     def _warndlg(self,msg1,msg2):
         print('Warning:',msg1,msg2)
         
@@ -228,12 +779,17 @@ class WHRS():
     def _calculateFO_consumption_WO(self,Load):
         return self._interpolate(Load,self.EngineLoad,self.FO_consumption_WO,'FO_consumption_WO')
         
-    def setDefaultFluid(self,fluid):
+    def _checkFluid(self,fluid,method):
         if type(fluid)!=int:
-            raise Exception('WHRS.setDefaultFluid(fluid), fluid is not an integer')
+            raise Exception('WHRS.{}, fluid is not an integer'.format(method))
         if fluid<0 or fluid>=len(self.FluidNameCode):
-            raise Exception('WHRS.setDefaultFluid(fluid), fluid is not in [0,{}]'.format(len(self.FluidNameCode)-1))
+            raise Exception('WHRS.{}, fluid is not in [0,{}]'.format(method,len(self.FluidNameCode)-1))
+
+    def setDefaultFluid(self,fluid):
+        self._checkFluid(fluid,'setDefaultFluid(fluid)')
         self.defaultFluidId=fluid
+        if self.PropsSIBackend=='AbstractState':
+            self._buildAbstractState(self._getDefaultFluidCode())
         if self.verbose>=1:
             print('Fluid used: {}({})'.format(self.FluidNameCode[fluid][0],self.FluidNameCode[fluid][1]))
         
@@ -246,78 +802,63 @@ class WHRS():
     def _getDefaultFluidCode(self):
         return self.FluidNameCode[self.defaultFluidId][1]
     
-    def __call__(self,Load,JW_pump,
-                      RC_Superheat,RC_Subcool,
-                      ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid=None):
-        self._loadPropSI() # Load stored calls to PropSI
-        # 0. INPUT DATA
-        
-        # Diesel engine
-        self._checkParam(Load,'Load')
-        self._checkParam(JW_pump,'JW_pump')
-        
-        
-        
-        FO_Consumption = self._calculateFOC(Load)         # ENGINE FO
-        Exh_in         = self._calculateTempEG(Load)      # ENGINE EXH
-        m_exh          = self._calculateMaxFlowRate(Load) # ENGINE EXH
-        T_D2           = self.T_D2_Constant               # ENGINE JW
-        HT_pump        = JW_pump * 100000                 # JW PUMP
-        Pump_eff       = self.T_Pump_eff_Constant         # JW PUMP
-        Heat_block     = self._calculateEngine_block(Load)# ENGINE BLOCK, CAC AND LOC 
-        T_sw_in        = self.T_sw_in_Constant            # TSW PUMP
-        P_sw_in        = self.P_sw_in_Constant * 100000   # PSW PUMP
-        Power          = 3000 * (Load/100)                # ENGINE POWER
-        
-        # Waste Heat Recovery System
-        
-        self._checkParam(RC_Superheat,'RC_Superheat')  # ENGINE JW
-        self._checkParam(RC_Subcool,'RC_Subcool')      # ENGINE JW
-        self._checkParam(ORC_Superheat,'ORC_Superheat')# ORC FLUID
-        self._checkParam(ORC_Subcool,'ORC_Subcool')    # ORC FLUID
-        self._checkParam(ORC_Pump,'ORC_Pump')          # ORC PUMP
-        self._checkParam(P_chamber,'P_chamber')        # DESALINATION
-        
-        ORC_Pump        = ORC_Pump * 100000 # ORC PUMP
-        ORC_Pump_eff    = self.ORC_Pump_eff_Constant # ORC PUMP
-        P_chamber       = P_chamber * 100000 # DESALINATION
-        Pinch_point_des = self.Pinch_point_des_Constant # DESALINATION
-        T_des_surface   = self.T_des_surface_Constan# DESALINATION
-        N_TEG           = self.N_TEG_Constant # TEG
-        TEG_hot         = self.TEG_hot_Constant # TEG hot side temperature (NOT VALID)
-        # TEG_cold      will be calculated afterwards
-        
+    def getFluidName(self,fluid=None):
+        """
+        Name of the fluid Id (see FluidNameCode). Default=None, the default fluid
+        """
+        return self.FluidNameCode[self.defaultFluidId if fluid==None else fluid][0]
+    
+    def getFluidCode(self,fluid=None):
+        """
+        CoolProp code of the fluid Id (see FluidNameCode). Default=None, the default fluid
+        """
+        return self.FluidNameCode[self.defaultFluidId if fluid==None else fluid][1]
+    
+    def _runStage(self,name,*inputs):
+        """
+        Returns the result of the stage name for the values of its declared
+        inputs (see self.stages). It is calculated only the first time for
+        these inputs and the current values of the fixed params of the stage
+        """
+        (_,constants,function)=self.stages[name]
+        key=(inputs,tuple(getattr(self,constant) for constant in constants))
+        cache=self.stageCache[name]
+        result=cache.get(key)
+        if result==None:
+            if self.verbose>=1:
+                print('Stage {}{}'.format(name,inputs))
+            if self.profiler!=None:
+                self.profiler.push('Stage '+name)
+            result=function(*inputs)
+            if self.profiler!=None:
+                self.profiler.pop()
+            cache[key]=result
+        return result
 
-        
-        # Hot source 1 - Exhaust gas
-        if (Exh_in <= 595):
-            self._warndlg ({'Exhaust gas temperature introduced is too low.'},'Warning') # Exhaust gas temperature below W6L32 data at 30# MCR
-        
-        if (Exh_in >= 750):
-            self._warndlg ({'Exhaust gas temperature introduced is too high.'},'Warning') # Exhaust gas temperature above W6L32 data at 110# MCR
-        
-        Exh_out = 413 # Desired exhaust gas temp outlet of RC Evaporator - OPERATIONAL CONDITION
-        Exh_min = 403.15 # Min temp to avoid cold corrosion, reference point, K - ACID DEW POINT LIMIT
-        if (m_exh <= 2):
-            self._warndlg('Exhaust gas mass flow introduced is too low.','Warning') # Exhaust gas mass flow below engine data at 30# MCR
-        
-        if (m_exh >= 7.5):
-            self._warndlg('Exhaust gas mass flow introduced is too high.','Warning') # Exhaust gas mass flow over engine data at 110# MCR
-        
-        Cp_exh = 1.185 # kJ/kg·K - KOSHY, 2015.
-        
-        # Hot source 2 - Jacket water
-        m_jw = 16.685 # kg/s - W6L32 data
-        Cp_jw = 4.05 # kJ/kg·K - Sample analysis
-        if (T_D2 <= 323.15):
-            self._warndlg ({'Jacket Water temperature is too low.'},'Warning') # Minimum temperature of JW at the engine outlet: 50 ºC - ENGINE ALARM
-        
-        if (T_D2 >= 388.15):
-            self._warndlg ({'Jacket Water temperature is too high.'},'Warning') # Maximum temperature of JW at the engine outlet: 115 ºC - ENGINE ALARM (113 ºC)
-        
-        
-        # Cold source - Sea water
-        m_sw = 11.62 # kg/s - OPERATIONAL CONDITION - FACET J100 and SW Pump ITUR Normabloc N2-40/160B/7.5-2900 rpm (40.8 m3/h at 2.4 bar)
+    def getStageStats(self):
+        """
+        Returns a dict {stage name: size, hits, misses and evictions of its cache}
+        """
+        return {name:cache.getStats() for name,cache in self.stageCache.items()}
+
+    def clearStageCaches(self):
+        """
+        Removes the stored results of all the stages (ex: to measure the
+        calculation of the stages). A change of a fixed param
+        (self.*_Constant) does not require it, the results are stored with
+        their values
+        """
+        for cache in self.stageCache.values():
+            cache.clear()
+
+    def _seawaterStage(self):
+        """
+        Stage 'Seawater': sea water at the inlet of the WHRS. Only depends on
+        the fixed params.
+        Returns (Cp_sw,H_sw_in,S_sw_in)
+        """
+        T_sw_in = self.T_sw_in_Constant          # TSW PUMP
+        P_sw_in = self.P_sw_in_Constant * 100000 # PSW PUMP
         if (T_sw_in <= 273.15):
             self._warndlg({'Sea water temperature introduced is too low.'},'Warning') # Sea water at 0ºC
         
@@ -331,20 +872,25 @@ class WHRS():
             self._warndlg({'Sea water pressure introduced is too high.'},'Warning') # Sea water at 5 bar
         
         Cp_sw = self._py_CoolProp_CoolProp_PropsSI('Cpmass','T',T_sw_in,'Q',0,"Water")/1000 # Cp Sea water, kJ/kg·K - LLAMADA A BASE DE DATOS COOLPROP (TODAS LAS ESTRUCTURAS DEL TIPO self._py_CoolProp_CoolProp_PropsSI SON LLAMADAS A LA BASE DE DATOS)
-        Sw_density = 1025 # Sea water density, kg/m3 - STANDARD VALUE
-        Sw_pump_eff = 0.8
-        
-        # Ambient conditions
-        T_env = 298.15 # K - ISO 15550:2002
-        Press_env = 100000 # Pa - ISO 15550:2002
-        
-        # TEG Limits
-        if (TEG_hot >= 473):
-            self._warndlg ({'Thermoelectric modules cannot withstand temperatures over 200 ºC.'},'Warning') # Limit of Bi2Te3 TEG continuous operation
-        
-     
+        (H_sw_in,S_sw_in) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'P',P_sw_in,'T',T_sw_in,"Water")
+        H_sw_in = H_sw_in/1000 # Enthalpy of sea water at the inlet of the condenser, kJ/kg
+        S_sw_in = S_sw_in/1000 # Entropy of sea water at the inlet of the condenser, kJ/kg
+        return (Cp_sw,H_sw_in,S_sw_in)
+
+    def _desalinationStage(self,HT_pump,P_chamber):
+        """
+        Stage 'Desalination': jacket water used by the desalination system and
+        evaporation of the sea water. HT_pump and P_chamber in Pa.
+        Returns (T_des,m_jw_cycles,Q_jw_des,Q_sw_des,Q_sw_des_equivalent,
+                 H_sw_DES_3_f,H_sw_DES_3_g,I_des_jw)
+        """
+        T_D2            = self.T_D2_Constant            # ENGINE JW
+        Pinch_point_des = self.Pinch_point_des_Constant # DESALINATION
+        T_des_surface   = self.T_des_surface_Constan    # DESALINATION
+        m_jw            = self.m_jw_Constant
+        Cp_jw           = self.Cp_jw_Constant
+        T_env           = self.T_env_Constant
         
-        # 1. DESALINATION SYSTEM
         # Operational desired conditions
         Kjw = 25.6 # Constant for one phase evaporator
         Des_area = 4.8 # Desalinator surface area, m2
@@ -375,12 +921,36 @@ class WHRS():
         Q_radiation_des = (0.84 * 5.67 * 1e-8 * (T_des_surface)**4 * Des_area)/1000 # Heat radiated to environment (Emissivity * Stefan-Boltzmann constant * Desalinator temp * Des area), kJ EQ 3 - DOC 3
         Q_sw_des = Q_jw_des - Q_radiation_des # Available heat for fresh water generation, kJ/s EQ 4 - DOC 3
         Q_sw_des_equivalent = Q_sw_des * (1 - (T_env / T_des)) # Equivalent amount of power, according to GUDE, 2009 EQ 5 - DOC 3
-        H_D2 = (self._py_CoolProp_CoolProp_PropsSI('H','T',T_D2,'P',PD2,"Water"))/1000 # Enthalpy of jacket water at the inlet of the desalination, kJ/kg
-        S_D2 = (self._py_CoolProp_CoolProp_PropsSI('S','T',T_D2,'P',PD2,"Water"))/1000 # Entropy of jacket water at the inlet of the desalination, kJ/kg·K
-        H_D3 = (self._py_CoolProp_CoolProp_PropsSI('H','T',T_D3,'P',PD3,"Water"))/1000 # Enthalpy of jacket water at the outlet of the desalination, kJ/kg
-        S_D3 = (self._py_CoolProp_CoolProp_PropsSI('S','T',T_D3,'P',PD3,"Water"))/1000 # Enthalpy of jacket water at the outlet of the desalination, kJ/kg·K
+        (H_D2,S_D2) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'T',T_D2,'P',PD2,"Water")
+        H_D2 = H_D2/1000 # Enthalpy of jacket water at the inlet of the desalination, kJ/kg
+        S_D2 = S_D2/1000 # Entropy of jacket water at the inlet of the desalination, kJ/kg·K
+        (H_D3,S_D3) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'T',T_D3,'P',PD3,"Water")
+        H_D3 = H_D3/1000 # Enthalpy of jacket water at the outlet of the desalination, kJ/kg
+        S_D3 = S_D3/1000 # Enthalpy of jacket water at the outlet of the desalination, kJ/kg·K
+        # Sea water evaporated in the chamber
+        H_sw_DES_3_f = (self._py_CoolProp_CoolProp_PropsSI('H','P',P_chamber,'Q',0,"Water"))/1000 # kJ/kg
+        H_sw_DES_3_g = (self._py_CoolProp_CoolProp_PropsSI('H','P',P_chamber,'Q',1,"Water"))/1000 # kJ/kg
+        # Jacket water irreversibilities
+        T_avg_des = (T_D2 - T_D3) / math.log (T_D2 / T_D3) # Average temperature of jacket water inside desalination system, K
+        I_des_jw = Q_jw_des * (1 - (T_env / T_avg_des)) # Irreversibilities of jacket water, kJ/s
+        return (T_des,m_jw_cycles,Q_jw_des,Q_sw_des,Q_sw_des_equivalent,H_sw_DES_3_f,H_sw_DES_3_g,I_des_jw)
+
+    def _rcStage(self,HT_pump,RC_Superheat,RC_Subcool):
+        """
+        Stage 'RC': states of the steam Rankine cycle and the quantities per
+        kg of jacket water. HT_pump in Pa.
+        The mass flow of the RC depends on Load (exhaust gas heat), it is
+        calculated in __call__ with q_jw_RC (heat per kg of jacket water).
+        Returns (T_1,H_1,S_1,S_2,H_2c,S_2c,W_pump_real,I_pump_RC,Q_engine,
+                 q_jw_RC,H_RC3,S_RC3,H_RC4s,H_RC4,T_RC4,S_RC4)
+        """
+        T_D2        = self.T_D2_Constant       # ENGINE JW
+        Pump_eff    = self.T_Pump_eff_Constant # JW PUMP
+        m_jw        = self.m_jw_Constant
+        Cp_jw       = self.Cp_jw_Constant
+        T_env       = self.T_env_Constant
+        Turb_eff_RC = self.Turb_eff_RC_Constant
         
-        # 2. STEAM RANKINE CYCLE
         # Operational desired conditions
         if (RC_Superheat < 0):
             self._warndlg ({'Rankine Superheating is too low.'},'Warning') # Minimum superheating: 0 K
@@ -401,19 +971,16 @@ class WHRS():
         if (Pump_eff > 1):
             self._warndlg ({'Pump efficiency is too high.'},'Warning')
         
-        # Turbine Conditions
-        Turb_eff_RC = 0.8 # Turbine efficiency - OPERATIONAL CONDITION
-        Gen_eff_RC = 0.96 # Alternator efficiency - OPERATIONAL CONDITION
         # Condenser inside (Saturated liquid, RC1)
         T_RC1 = (55 + 273.15) + RC_Subcool # K
-        P_RC1 = self._py_CoolProp_CoolProp_PropsSI('P','T',T_RC1,'Q',0,"Water") # Pa
-        S_RC1 = self._py_CoolProp_CoolProp_PropsSI('S','T',T_RC1,'Q',0,"Water")/1000 # kJ/kg·K
+        (P_RC1,S_RC1) = self._py_CoolProp_CoolProp_StateSI(('P','S'),'T',T_RC1,'Q',0,"Water") # Pa
+        S_RC1 = S_RC1/1000 # kJ/kg·K
         # Condenser outlet (Subcooled liquid before engine, 1)
         T_1 = 55 + 273.15 # Temperature of jacket water at the inlet of the engine, K - OPERATIONAL CONDITION
         P_1 = P_RC1 # Pa
-        H_1 = self._py_CoolProp_CoolProp_PropsSI('H','T',T_1,'P',P_1,"Water")/1000 # kJ/kg
-        S_1 = self._py_CoolProp_CoolProp_PropsSI('S','T',T_1,'P',P_1,"Water")/1000 # kJ/kg·K
-        D_1 = self._py_CoolProp_CoolProp_PropsSI('D','T',T_1,'P',P_1,"Water") # kg/m3
+        (H_1,S_1,D_1) = self._py_CoolProp_CoolProp_StateSI(('H','S','D'),'T',T_1,'P',P_1,"Water") # D_1 in kg/m3
+        H_1 = H_1/1000 # kJ/kg
+        S_1 = S_1/1000 # kJ/kg·K
         SpecVol_RC1 = 1/D_1 # m3/kg
         # Pump (Liquid pumped, 2s and 2)
         P_2 = P_1 + HT_pump  # Jacket water pump raises pressure, Pa
@@ -424,60 +991,61 @@ class WHRS():
         W_pump_real = W_pump_ideal / Pump_eff # Real work needed by the pump, kJ/s EQ 10 - DOC 3
         H_2 = ((H_2s - H_1)/Pump_eff) + H_1 # Enthalpy at point 2, kJ/kg
         H_2_joules = H_2 * 1000 # Enthalpy in J/kg for the correct calculation of T_2 and S_2
-        T_2 = self._py_CoolProp_CoolProp_PropsSI('T','P',P_2,'H',H_2_joules,"Water") # Temperature of the jacket water at the outlet of the pump, K
-        S_2 = self._py_CoolProp_CoolProp_PropsSI('S','P',P_2,'H',H_2_joules,"Water")/1000 # Entropy of the jacket water at the outlet of the pump, kJ/kg·K
+        (T_2,S_2) = self._py_CoolProp_CoolProp_StateSI(('T','S'),'P',P_2,'H',H_2_joules,"Water") # Temperature of the jacket water at the outlet of the pump, K
+        S_2 = S_2/1000 # Entropy of the jacket water at the outlet of the pump, kJ/kg·K
         I_pump_RC = m_jw * T_env * (S_2 - S_1) # Irreversibilities on the pumping process, kJ/s EQ 11 - DOC 3
         # Engine (Liquid heated with pressure drop - First heat source, 2c)
         T_2c = T_D2 # Temperature of jacket water at the outlet of the engine (W6L32 data), K
         P_2c = P_2 - 55000 # Loss of pressure on engine, Pa - 0,55 bar - OPERATIONAL CONDITION
-        H_2c = self._py_CoolProp_CoolProp_PropsSI('H','T',T_2c,'P',P_2c,"Water")/1000 # kJ/kg
-        S_2c = self._py_CoolProp_CoolProp_PropsSI('S','T',T_2c,'P',P_2c,"Water")/1000 # kJ/kg·K
+        (H_2c,S_2c) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'T',T_2c,'P',P_2c,"Water")
+        H_2c = H_2c/1000 # kJ/kg
+        S_2c = S_2c/1000 # kJ/kg·K
         Q_engine = m_jw * Cp_jw * (T_2c - T_2) # Heat supplied to the cycle by the engine, kJ/s EQ 12 - DOC 3
         I_engine = m_jw * T_env * (S_2c - S_2) # Irreversibilities due to engine heating and loss of pressure, kJ/s EQ 13 - DOC 3
-        # Mass flow of jacket water used for RC and ORC
-        Q_exh = m_exh * Cp_exh * (Exh_in - Exh_out) # Heat available from exhaust gas, kJ/s EQ 6 - DOC 3
-        T_evap_RC = self._py_CoolProp_CoolProp_PropsSI('T','P',P_2c,'Q',0,"Water") # Vaporization temperature of jacket water at P_2c, K
+        # Heat per kg of jacket water used for RC
+        (T_evap_RC,H_sat_liq_RC) = self._py_CoolProp_CoolProp_StateSI(('T','H'),'P',P_2c,'Q',0,"Water") # Vaporization temperature of jacket water at P_2c, K
         T_RC2 = T_D2 # Temperature of jacket water at the inlet of the evaporator, K
         H_sat_vap_RC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_2c,'Q',1,"Water")/1000 # Enthalpy of water saturated vapor at P_2c, kJ/kg
-        H_sat_liq_RC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_2c,'Q',0,"Water")/1000 # Enthalpy of water saturated liquid at P_2c, kJ/kg
-        m_jw_RC = Q_exh / ((Cp_jw * (T_evap_RC - T_RC2)) + (H_sat_vap_RC - H_sat_liq_RC) + (Cp_jw * RC_Superheat) ) # Mass of jacket water for the RC (three steps method), kg/s EQ 9 - DOC 3
-        m_jw_ORC = m_jw_cycles - m_jw_RC # Mass of jacket water available for ORC, kg/s EQ 14 - DOC 3 se obtiene m_jw_ORC
-        I_engine_RC = m_jw_RC * T_env * (S_2c - S_2) # Irreversibilities due to engine heating and loss of pressure accounting for the RC, kJ/s
+        H_sat_liq_RC = H_sat_liq_RC/1000 # Enthalpy of water saturated liquid at P_2c, kJ/kg
+        q_jw_RC = (Cp_jw * (T_evap_RC - T_RC2)) + (H_sat_vap_RC - H_sat_liq_RC) + (Cp_jw * RC_Superheat) # Heat per kg of jacket water for the RC (three steps method), kJ/kg EQ 9 - DOC 3
         # Evaporator (Counterflow Exh Gas / JW - Second heat source, RC2 and RC3)
-        H_RC2 = H_2c # kJ/kg
-        S_RC2 = S_2c # kJ/kg·K
         T_RC3 = T_evap_RC + RC_Superheat # Expected outlet temperature of jacket water at evaporator, K
         P_RC3 = P_2c - 10000 # Loss of pressure in evaporator, Pa - OPERATIONAL CONDITION
-        H_RC3 = self._py_CoolProp_CoolProp_PropsSI('H','T',T_RC3,'P',P_RC3,"Water")/1000 # kJ/kg
-        S_RC3 = self._py_CoolProp_CoolProp_PropsSI('S','T',T_RC3,'P',P_RC3,"Water")/1000 # kJ/kg
-        T_avg_exh = (Exh_in - Exh_out) / math.log (Exh_in/Exh_out) # Exhaust average temperature inside the evaporator, K
-        I_evap_exh_RC = Q_exh * (1 - (T_env / T_avg_exh)) # Irreversibilities of the exhaust gas on evaporator, kJ/s EQ 15 - DOC 3
-        I_evap_jw_RC = m_jw_RC * (H_RC3 - H_RC2 - (T_env * (S_RC3 - S_RC2))) # Irreversibilities of the jacket water on evaporator, kJ/s EQ 16 - DOC 3
-        I_evap_RC_total = I_evap_exh_RC + I_evap_jw_RC # Total irreversibilities on evaporator, kJ/s EQ 17 - DOC 3
+        (H_RC3,S_RC3) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'T',T_RC3,'P',P_RC3,"Water")
+        H_RC3 = H_RC3/1000 # kJ/kg
+        S_RC3 = S_RC3/1000 # kJ/kg
         # Turbine (Expansion, 4s and 4)
         P_RC4 = P_RC1 + 10000 # Loss of pressure in condenser, Pa - OPERATIONAL CONDITION
         S_RC4s = S_RC3 # Isentropic process, kJ/kg·K
-        S_RC_P4_f = self._py_CoolProp_CoolProp_PropsSI('S','P',P_RC4,'Q',0,"Water")/1000 # kJ/kg·K
-        S_RC_P4_g = self._py_CoolProp_CoolProp_PropsSI('S','P',P_RC4,'Q',1,"Water")/1000 # kJ/kg·K
+        (S_RC_P4_f,H_RC_P4_f) = self._py_CoolProp_CoolProp_StateSI(('S','H'),'P',P_RC4,'Q',0,"Water")
+        (S_RC_P4_g,H_RC_P4_g,T_cond_RC) = self._py_CoolProp_CoolProp_StateSI(('S','H','T'),'P',P_RC4,'Q',1,"Water") # T_cond_RC: Condensation temperature of jacket water at P_4, K
+        S_RC_P4_f = S_RC_P4_f/1000 # kJ/kg·K
+        S_RC_P4_g = S_RC_P4_g/1000 # kJ/kg·K
         X_RC4s = (S_RC4s - S_RC_P4_f) / (S_RC_P4_g - S_RC_P4_f) # Steam quality at state 4s
-        H_RC_P4_f = self._py_CoolProp_CoolProp_PropsSI('H','P',P_RC4,'Q',0,"Water")/1000 # kJ/kg
-        H_RC_P4_g = self._py_CoolProp_CoolProp_PropsSI('H','P',P_RC4,'Q',1,"Water")/1000 # kJ/kg
+        H_RC_P4_f = H_RC_P4_f/1000 # kJ/kg
+        H_RC_P4_g = H_RC_P4_g/1000 # kJ/kg
         H_RC4s = H_RC_P4_f + (X_RC4s * (H_RC_P4_g - H_RC_P4_f)) # kJ/kg
-        W_turbine_ideal_RC = (m_jw_RC * (H_RC3 - H_RC4s)) # Ideal work delivered by the turbine, kJ/s
         H_RC4 = H_RC3 + (Turb_eff_RC * (H_RC4s - H_RC3)) # kJ/kg
         H_RC4_joules = H_RC4 * 1000 # Enthalpy in J/kg for calculations
-        T_RC4 = self._py_CoolProp_CoolProp_PropsSI('T','P',P_RC4,'H',H_RC4_joules,"Water") # K
-        S_RC4 = self._py_CoolProp_CoolProp_PropsSI('S','P',P_RC4,'H',H_RC4_joules,"Water")/1000 # kJ/kg·K
+        (T_RC4,S_RC4) = self._py_CoolProp_CoolProp_StateSI(('T','S'),'P',P_RC4,'H',H_RC4_joules,"Water") # K
+        S_RC4 = S_RC4/1000 # kJ/kg·K
         X_RC4 = (S_RC4 - S_RC_P4_f) / (S_RC_P4_g - S_RC_P4_f) # Steam quality at state 4
-        W_turbine_real_RC = W_turbine_ideal_RC * Turb_eff_RC # Real work delivered by the turbine, kJ/s EQ 18 - DOC 3
-        Gen_power_RC = W_turbine_real_RC * Gen_eff_RC # Electrical power delivered to the grid by the RC, kJ/s EQ 18 - DOC 3
-        I_turbine_RC = m_jw_RC * T_env * (S_RC4 - S_RC3) # Irreversibilities of turbine, kJ/s EQ 19 - DOC 3
-        # Condenser (Counterflow JW / SW - Cool source, 4 and RC1)
-        T_cond_RC = self._py_CoolProp_CoolProp_PropsSI('T','P',P_RC4,'Q',1,"Water") # Condensation temperature of jacket water at P_4, K
-        Q_cond_jw_RC = m_jw_RC * Cp_jw * (T_RC4 - T_1) # Heat to disipate into Sea Water in order to fully condense Jacket Water, kJ/s
-        Q_cond_RC = m_jw_RC * (H_RC4 - H_1) # Total heat on condenser, kJ/s EQ 20 - DOC 3
+        return (T_1,H_1,S_1,S_2,H_2c,S_2c,W_pump_real,I_pump_RC,Q_engine,
+                q_jw_RC,H_RC3,S_RC3,H_RC4s,H_RC4,T_RC4,S_RC4)
+
+    def _orcStage(self,fluid,ORC_Superheat,ORC_Subcool,ORC_Pump):
+        """
+        Stage 'ORC': states of the organic Rankine cycle with the fluid code
+        fluid and the quantities per kg of ORC fluid. ORC_Pump in Pa.
+        The mass flow of the ORC depends on the jacket water left by the RC, it
+        is calculated in __call__ with q_ORC (heat per kg of ORC fluid).
+        Returns (H_ORC1,S_ORC1,w_spec_pump_ORC_ideal,H_ORC2,S_ORC2,q_ORC,
+                 H_ORC3,S_ORC3,H_ORC4s,H_ORC4,S_ORC4,q_cond_ORC)
+        """
+        T_sw_in      = self.T_sw_in_Constant      # TSW PUMP
+        ORC_Pump_eff = self.ORC_Pump_eff_Constant # ORC PUMP
+        Turb_eff_ORC = self.Turb_eff_ORC_Constant
         
-        # 3. ORC
         # Operational desired conditions
         if (ORC_Superheat < 0):
             self._warndlg ({'Organic Rankine Superheating is too low.'},'Warning') # Minimum superheating: 0 K
@@ -492,18 +1060,15 @@ class WHRS():
             self._warndlg ({'Organic Rankine Subcooling is too high.'},'Warning') # Maximum subcooling: 25 K
         
         # Operation conditions
-        T_evap_jw_ORC_in = T_D2 # Jacket water temperature at the inlet of ORC evaporator, K
-        T_evap_jw_ORC_out = 55 + 273.15 # Jacket water temperature at the outlet of the ORC evaporator, K
         T_cond_ORC = T_sw_in + 5 # Estimated temperature of condensation for the ORC, K - OPERATIONAL CONDITION
-        P_cond_ORC = self._py_CoolProp_CoolProp_PropsSI('P','T',T_cond_ORC,'Q',1,self._getDefaultFluidCode()) # Condensation pressure of ORC at the estimated T_cond_ORC, Pa
-        Cp_ORC = self._py_CoolProp_CoolProp_PropsSI('Cpmass','T',T_cond_ORC,'Q',0,self._getDefaultFluidCode())/1000 # Cp of ORC fluid, kJ/kg·K
-        Q_evap_jw_ORC = m_jw_ORC * Cp_jw * (T_evap_jw_ORC_in - T_evap_jw_ORC_out) # Available heat for ORC on jacket water, kJ/s
+        P_cond_ORC = self._py_CoolProp_CoolProp_PropsSI('P','T',T_cond_ORC,'Q',1,fluid) # Condensation pressure of ORC at the estimated T_cond_ORC, Pa
+        Cp_ORC = self._py_CoolProp_CoolProp_PropsSI('Cpmass','T',T_cond_ORC,'Q',0,fluid)/1000 # Cp of ORC fluid, kJ/kg·K
         # ORC Condenser outlet (Subcooled liquid before pump, 1)
         T_ORC1 = T_cond_ORC - ORC_Subcool # Temperature at state 1 of ORC, K
         P_ORC1 = P_cond_ORC # Pressure at state 1 of ORC, Pa
-        H_ORC1 = self._py_CoolProp_CoolProp_PropsSI('H','T',T_ORC1,'P',P_ORC1,self._getDefaultFluidCode())/1000 # kJ/kg
-        S_ORC1 = self._py_CoolProp_CoolProp_PropsSI('S','T',T_ORC1,'P',P_ORC1,self._getDefaultFluidCode())/1000 # kJ/kg·K
-        D_ORC1 = self._py_CoolProp_CoolProp_PropsSI('D','T',T_ORC1,'P',P_ORC1,self._getDefaultFluidCode()) # kg/m3
+        (H_ORC1,S_ORC1,D_ORC1) = self._py_CoolProp_CoolProp_StateSI(('H','S','D'),'T',T_ORC1,'P',P_ORC1,fluid) # D_ORC1 in kg/m3
+        H_ORC1 = H_ORC1/1000 # kJ/kg
+        S_ORC1 = S_ORC1/1000 # kJ/kg·K
         SpecVol_ORC1 = 1/D_ORC1 # m3/kg
         # ORC Pump (Liquid pumped, ORC2s and ORC2)
         P_ORC2 = P_ORC1 + ORC_Pump # Pa
@@ -512,53 +1077,232 @@ class WHRS():
         H_ORC2s = w_spec_pump_ORC_ideal + H_ORC1 # Enthalpy at state 2s of ORC, kJ/kg
         H_ORC2 = ((H_ORC2s - H_ORC1)/ORC_Pump_eff) + H_ORC1 # Enthalpy at state 2 of ORC, kJ/kg
         H_ORC2_joules = H_ORC2 * 1000 # Enthalpy in J/kg for the correct calculation of T_ORC2 and S_ORC2
-        T_ORC2 = self._py_CoolProp_CoolProp_PropsSI('T','P',P_ORC2,'H',H_ORC2_joules,self._getDefaultFluidCode()) # Temperature of the jacket water at the outlet of the pump, K
-        S_ORC2 = self._py_CoolProp_CoolProp_PropsSI('S','P',P_ORC2,'H',H_ORC2_joules,self._getDefaultFluidCode())/1000 # Entropy of the jacket water at the outlet of the pump, kJ/kg·K
-        T_evap_ORC = self._py_CoolProp_CoolProp_PropsSI('T','P',P_ORC2,'Q',0,self._getDefaultFluidCode()) # Vaporization temperature of ORC fluid, K
+        (T_ORC2,S_ORC2) = self._py_CoolProp_CoolProp_StateSI(('T','S'),'P',P_ORC2,'H',H_ORC2_joules,fluid) # Temperature of the jacket water at the outlet of the pump, K
+        S_ORC2 = S_ORC2/1000 # Entropy of the jacket water at the outlet of the pump, kJ/kg·K
+        T_evap_ORC = self._py_CoolProp_CoolProp_PropsSI('T','P',P_ORC2,'Q',0,fluid) # Vaporization temperature of ORC fluid, K
         T_ORC3 = T_evap_ORC + ORC_Superheat # Temperature of ORC fluid at the outlet of evaporator, K
-        T_crit = self._py_CoolProp_CoolProp_PropsSI('Tcrit',self._getDefaultFluidCode()) # Critical temperature of the ORC fluid
+        T_crit = self._getFluidConstant('Tcrit',fluid) # Critical temperature of the ORC fluid
         if (T_crit < T_ORC3):
             self._warndlg ({'Organic Rankine Cycle is on Supercritical state.'},'Warning')
         
         P_ORC3 = P_ORC2 - 10000 # Drop of pressure inside ORC evaporator, Pa
-        H_ORC3 = self._py_CoolProp_CoolProp_PropsSI('H','T',T_ORC3,'P',P_ORC3,self._getDefaultFluidCode())/1000 # kJ/kg
-        m_ORC = Q_evap_jw_ORC / ((Cp_ORC * (T_evap_ORC - T_ORC2)) + (H_ORC3 - H_ORC2) + (Cp_ORC * ORC_Superheat)) # Mass flow of ORC fluid inside the circuit, kg/s
+        (H_ORC3,S_ORC3) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'T',T_ORC3,'P',P_ORC3,fluid)
+        H_ORC3 = H_ORC3/1000 # kJ/kg
+        q_ORC = (Cp_ORC * (T_evap_ORC - T_ORC2)) + (H_ORC3 - H_ORC2) + (Cp_ORC * ORC_Superheat) # Heat per kg of ORC fluid on the evaporator, kJ/kg
+        # ORC Evaporator (Counterflow JW / ORC fluid, ORC3)
+        S_ORC3 = S_ORC3/1000 # kJ/kg·K
+        # ORC Turbine (Expansion, ORC4)
+        P_ORC4 = P_ORC1 + 10000 # Loss of pressure in condenser, Pa - OPERATIONAL CONDITION
+        S_ORC4s = S_ORC3 # Isentropic process, kJ/kg·K
+        (S_P4_f_ORC,H_P4_f_ORC) = self._py_CoolProp_CoolProp_StateSI(('S','H'),'P',P_ORC4,'Q',0,fluid)
+        (S_P4_g_ORC,H_P4_g_ORC) = self._py_CoolProp_CoolProp_StateSI(('S','H'),'P',P_ORC4,'Q',1,fluid)
+        S_P4_f_ORC = S_P4_f_ORC/1000 # kJ/kg·K
+        S_P4_g_ORC = S_P4_g_ORC/1000 # kJ/kg·K
+        X_ORC4s = (S_ORC4s - S_P4_f_ORC) / (S_P4_g_ORC - S_P4_f_ORC) # Steam quality at state 4s
+        S_ORC4s_joules = S_ORC3 * 1000 # Entropy in J/kg·K for calculations
+        H_P4_f_ORC = H_P4_f_ORC/1000 # kJ/kg
+        H_P4_g_ORC = H_P4_g_ORC/1000 # kJ/kg
+        H_ORC4s = H_P4_f_ORC + (X_ORC4s * (H_P4_g_ORC - H_P4_f_ORC)) # kJ/kg
+        H_ORC4 = H_ORC3 + (Turb_eff_ORC * (H_ORC4s - H_ORC3))/1000 # kJ/kg
+        H_ORC4_joules = H_ORC4 * 1000 # Enthalpy in J/kg for calculations
+        (T_ORC4,S_ORC4) = self._py_CoolProp_CoolProp_StateSI(('T','S'),'P',P_ORC4,'H',H_ORC4_joules,fluid) # K
+        S_ORC4 = S_ORC4/1000 # kJ/kg·K
+        X_ORC4 = (S_ORC4 - S_P4_f_ORC) / (S_P4_g_ORC - S_P4_f_ORC) # Steam quality at state 4
+        # ORC Condenser (Liquid, ORC1)
+        H_sat_vap_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',1,fluid)/1000 # Enthalpy of ORC saturated vapor at P_2c, kJ/kg
+        H_sat_liq_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',0,fluid)/1000 # Enthalpy of ORC saturated liquid at P_2c, kJ/kg
+        q_cond_ORC = (Cp_ORC * (T_ORC4 - T_cond_ORC)) + (H_sat_vap_ORC - H_sat_liq_ORC) + (Cp_ORC * ORC_Subcool) # Heat per kg of ORC fluid on condenser, kJ/kg EQ 36 - DOC 3
+        return (H_ORC1,S_ORC1,w_spec_pump_ORC_ideal,H_ORC2,S_ORC2,q_ORC,
+                H_ORC3,S_ORC3,H_ORC4s,H_ORC4,S_ORC4,q_cond_ORC)
+
+    def _evaluate(self,Load,JW_pump,
+                      RC_Superheat,RC_Subcool,
+                      ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid=None):
+        """
+        Evaluates the WHRS and returns the list of params (see params_name_type).
+        It does not change the object.
+        fluid is the ORC fluid Id (see FluidNameCode). Default=None, the
+        default fluid (see setDefaultFluid). Each fluid has its own
+        AbstractState, constants and PropsSI cache, so the calls with
+        different fluids can be interleaved.
+        The evaluations are stored (see ResultStore in __init__), a stored
+        one is returned without any calculation (nor warnings), but the
+        inputs are always checked against params_range
+        """
+        if fluid==None:
+            fluid=self.defaultFluidId
+        else:
+            self._checkFluid(fluid,'evaluate(...,fluid)')
+        inputs=(Load,JW_pump,RC_Superheat,RC_Subcool,ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)
+        for (name,v) in zip(self.inputNames,inputs):
+            self._checkParam(v,name)
+        if self.profiler==None:
+            return self._storedEvaluation(inputs,fluid)
+        depth=self.profiler.push('evaluate')
+        try:
+            return self._storedEvaluation(inputs,fluid)
+        finally:
+            self.profiler.popTo(depth)
+
+    def _storedEvaluation(self,inputs,fluid):
+        if self.resultCache==None:
+            return self._simulate(*inputs,fluid)
+        key=self._resultKey(inputs,fluid)
+        values=self._getStoredResult(key)
+        if values==None:
+            values=self._simulate(*inputs,fluid)
+            self._setResult(key,values)
+        elif self.verbose>=2:
+            print('Stored evaluation: {} {}'.format(inputs,fluid))
+        return list(values)
+
+    def _simulate(self,Load,JW_pump,
+                      RC_Superheat,RC_Subcool,
+                      ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid):
+        """
+        Calculates the params of the WHRS (see _evaluate). The subsystems are
+        calculated by stages (see self.stages) whose results are stored, so
+        when only the params of a subsystem change the other subsystems are
+        not calculated again.
+        The warnings of a stage are only shown the first time it is calculated.
+        """
+        self._loadPropSI() # Load stored calls to PropSI
+        # 0. INPUT DATA
+        self._section('Inputs')
+        
+        # Diesel engine (the inputs are checked in _evaluate)
+        
+        
+        
+        FO_Consumption = self._calculateFOC(Load)         # ENGINE FO
+        Exh_in         = self._calculateTempEG(Load)      # ENGINE EXH
+        m_exh          = self._calculateMaxFlowRate(Load) # ENGINE EXH
+        T_D2           = self.T_D2_Constant               # ENGINE JW
+        HT_pump        = JW_pump * 100000                 # JW PUMP
+        Pump_eff       = self.T_Pump_eff_Constant         # JW PUMP
+        Heat_block     = self._calculateEngine_block(Load)# ENGINE BLOCK, CAC AND LOC 
+        T_sw_in        = self.T_sw_in_Constant            # TSW PUMP
+        P_sw_in        = self.P_sw_in_Constant * 100000   # PSW PUMP
+        Power          = 3000 * (Load/100)                # ENGINE POWER
+        
+        # Waste Heat Recovery System
+        
+        ORC_Pump        = ORC_Pump * 100000 # ORC PUMP
+        ORC_Pump_eff    = self.ORC_Pump_eff_Constant # ORC PUMP
+        P_chamber       = P_chamber * 100000 # DESALINATION
+        Pinch_point_des = self.Pinch_point_des_Constant # DESALINATION
+        T_des_surface   = self.T_des_surface_Constan# DESALINATION
+        N_TEG           = self.N_TEG_Constant # TEG
+        TEG_hot         = self.TEG_hot_Constant # TEG hot side temperature (NOT VALID)
+        # TEG_cold      will be calculated afterwards
+        
+
+        
+        # Hot source 1 - Exhaust gas
+        if (Exh_in <= 595):
+            self._warndlg ({'Exhaust gas temperature introduced is too low.'},'Warning') # Exhaust gas temperature below W6L32 data at 30# MCR
+        
+        if (Exh_in >= 750):
+            self._warndlg ({'Exhaust gas temperature introduced is too high.'},'Warning') # Exhaust gas temperature above W6L32 data at 110# MCR
+        
+        Exh_out = 413 # Desired exhaust gas temp outlet of RC Evaporator - OPERATIONAL CONDITION
+        Exh_min = 403.15 # Min temp to avoid cold corrosion, reference point, K - ACID DEW POINT LIMIT
+        if (m_exh <= 2):
+            self._warndlg('Exhaust gas mass flow introduced is too low.','Warning') # Exhaust gas mass flow below engine data at 30# MCR
+        
+        if (m_exh >= 7.5):
+            self._warndlg('Exhaust gas mass flow introduced is too high.','Warning') # Exhaust gas mass flow over engine data at 110# MCR
+        
+        Cp_exh = 1.185 # kJ/kg·K - KOSHY, 2015.
+        
+        # Hot source 2 - Jacket water
+        m_jw = self.m_jw_Constant # kg/s - W6L32 data
+        Cp_jw = self.Cp_jw_Constant # kJ/kg·K - Sample analysis
+        if (T_D2 <= 323.15):
+            self._warndlg ({'Jacket Water temperature is too low.'},'Warning') # Minimum temperature of JW at the engine outlet: 50 ºC - ENGINE ALARM
+        
+        if (T_D2 >= 388.15):
+            self._warndlg ({'Jacket Water temperature is too high.'},'Warning') # Maximum temperature of JW at the engine outlet: 115 ºC - ENGINE ALARM (113 ºC)
+        
+        
+        # Cold source - Sea water
+        m_sw = self.m_sw_Constant # kg/s - OPERATIONAL CONDITION - FACET J100 and SW Pump ITUR Normabloc N2-40/160B/7.5-2900 rpm (40.8 m3/h at 2.4 bar)
+        (Cp_sw,H_sw_in,S_sw_in) = self._runStage('Seawater')
+        Sw_density = 1025 # Sea water density, kg/m3 - STANDARD VALUE
+        Sw_pump_eff = 0.8
+        
+        # Ambient conditions
+        T_env = self.T_env_Constant # K - ISO 15550:2002
+        Press_env = 100000 # Pa - ISO 15550:2002
+        
+        # TEG Limits
+        if (TEG_hot >= 473):
+            self._warndlg ({'Thermoelectric modules cannot withstand temperatures over 200 ºC.'},'Warning') # Limit of Bi2Te3 TEG continuous operation
+        
+     
+        
+        # 1. DESALINATION SYSTEM
+        self._section('Desalination')
+        (T_des,m_jw_cycles,Q_jw_des,Q_sw_des,Q_sw_des_equivalent,
+         H_sw_DES_3_f,H_sw_DES_3_g,I_des_jw) = self._runStage('Desalination',HT_pump,P_chamber)
+        
+        # 2. STEAM RANKINE CYCLE
+        self._section('RC')
+        (T_1,H_1,S_1,S_2,H_2c,S_2c,W_pump_real,I_pump_RC,Q_engine,
+         q_jw_RC,H_RC3,S_RC3,H_RC4s,H_RC4,T_RC4,S_RC4) = self._runStage('RC',HT_pump,RC_Superheat,RC_Subcool)
+        Turb_eff_RC = self.Turb_eff_RC_Constant # Turbine efficiency - OPERATIONAL CONDITION
+        Gen_eff_RC = 0.96 # Alternator efficiency - OPERATIONAL CONDITION
+        # Mass flow of jacket water used for RC and ORC
+        Q_exh = m_exh * Cp_exh * (Exh_in - Exh_out) # Heat available from exhaust gas, kJ/s EQ 6 - DOC 3
+        m_jw_RC = Q_exh / q_jw_RC # Mass of jacket water for the RC (three steps method), kg/s EQ 9 - DOC 3
+        m_jw_ORC = m_jw_cycles - m_jw_RC # Mass of jacket water available for ORC, kg/s EQ 14 - DOC 3 se obtiene m_jw_ORC
+        I_engine_RC = m_jw_RC * T_env * (S_2c - S_2) # Irreversibilities due to engine heating and loss of pressure accounting for the RC, kJ/s
+        # Evaporator (Counterflow Exh Gas / JW - Second heat source, RC2 and RC3)
+        H_RC2 = H_2c # kJ/kg
+        S_RC2 = S_2c # kJ/kg·K
+        T_avg_exh = (Exh_in - Exh_out) / math.log (Exh_in/Exh_out) # Exhaust average temperature inside the evaporator, K
+        I_evap_exh_RC = Q_exh * (1 - (T_env / T_avg_exh)) # Irreversibilities of the exhaust gas on evaporator, kJ/s EQ 15 - DOC 3
+        I_evap_jw_RC = m_jw_RC * (H_RC3 - H_RC2 - (T_env * (S_RC3 - S_RC2))) # Irreversibilities of the jacket water on evaporator, kJ/s EQ 16 - DOC 3
+        I_evap_RC_total = I_evap_exh_RC + I_evap_jw_RC # Total irreversibilities on evaporator, kJ/s EQ 17 - DOC 3
+        # Turbine (Expansion, 4s and 4)
+        W_turbine_ideal_RC = (m_jw_RC * (H_RC3 - H_RC4s)) # Ideal work delivered by the turbine, kJ/s
+        W_turbine_real_RC = W_turbine_ideal_RC * Turb_eff_RC # Real work delivered by the turbine, kJ/s EQ 18 - DOC 3
+        Gen_power_RC = W_turbine_real_RC * Gen_eff_RC # Electrical power delivered to the grid by the RC, kJ/s EQ 18 - DOC 3
+        I_turbine_RC = m_jw_RC * T_env * (S_RC4 - S_RC3) # Irreversibilities of turbine, kJ/s EQ 19 - DOC 3
+        # Condenser (Counterflow JW / SW - Cool source, 4 and RC1)
+        Q_cond_jw_RC = m_jw_RC * Cp_jw * (T_RC4 - T_1) # Heat to disipate into Sea Water in order to fully condense Jacket Water, kJ/s
+        Q_cond_RC = m_jw_RC * (H_RC4 - H_1) # Total heat on condenser, kJ/s EQ 20 - DOC 3
+        
+        # 3. ORC
+        self._section('ORC')
+        (H_ORC1,S_ORC1,w_spec_pump_ORC_ideal,H_ORC2,S_ORC2,q_ORC,
+         H_ORC3,S_ORC3,H_ORC4s,H_ORC4,S_ORC4,q_cond_ORC) = self._runStage('ORC',self.FluidNameCode[fluid][1],
+                                                                        ORC_Superheat,ORC_Subcool,ORC_Pump)
+        # Operation conditions
+        T_evap_jw_ORC_in = T_D2 # Jacket water temperature at the inlet of ORC evaporator, K
+        T_evap_jw_ORC_out = 55 + 273.15 # Jacket water temperature at the outlet of the ORC evaporator, K
+        Q_evap_jw_ORC = m_jw_ORC * Cp_jw * (T_evap_jw_ORC_in - T_evap_jw_ORC_out) # Available heat for ORC on jacket water, kJ/s
+        m_ORC = Q_evap_jw_ORC / q_ORC # Mass flow of ORC fluid inside the circuit, kg/s
         W_pump_ideal_ORC = (m_ORC * w_spec_pump_ORC_ideal) # Work ideally needed by the ORC pump, kJ/s EQ 28 - DOC 3
         W_pump_real_ORC = W_pump_ideal_ORC / ORC_Pump_eff # Work introduced on the ORC pump, kJ/s EQ 28 - DOC 3
         I_pump_ORC = m_ORC * T_env * (S_ORC2 - S_ORC1) # Irreversibilities on the ORC pumping process, kJ/s EQ 29 - DOC 3
         # ORC Evaporator (Counterflow JW / ORC fluid, ORC3)
-        S_ORC3 = self._py_CoolProp_CoolProp_PropsSI('S','T',T_ORC3,'P',P_ORC3,self._getDefaultFluidCode())/1000 # kJ/kg·K
         T_avg_ORC = (T_evap_jw_ORC_in - T_evap_jw_ORC_out) / math.log (T_evap_jw_ORC_in / T_evap_jw_ORC_out) # Exhaust average temperature inside the evaporator, K
         I_evap_jw_ORC = Q_evap_jw_ORC * (1 - (T_env / T_avg_ORC)) # Irreversibilities of the jacket water on ORC evaporator, kJ/s EQ 31 - DOC 3
         I_evap_ORC = m_ORC * (H_ORC3 - H_ORC2 - (T_env * (S_ORC3 - S_ORC2))) # Irreversibilities of the ORC fluid on ORC evaporator, kJ/s EQ 32 - DOC 3
         I_evap_ORC_total = I_evap_jw_ORC + I_evap_ORC # Total irreversibilities on ORC evaporator, kJ/s EQ 33 - DOC 3
         # ORC Turbine (Expansion, ORC4)
-        Turb_eff_ORC = 0.8 # ORC Turbine efficiency - OPERATIONAL CONDITION
+        Turb_eff_ORC = self.Turb_eff_ORC_Constant # ORC Turbine efficiency - OPERATIONAL CONDITION
         Gen_eff_ORC = 0.96 # ORC Generator efficiency - OPERATIONAL CONDITION
-        P_ORC4 = P_ORC1 + 10000 # Loss of pressure in condenser, Pa - OPERATIONAL CONDITION
-        S_ORC4s = S_ORC3 # Isentropic process, kJ/kg·K
-        S_P4_f_ORC = self._py_CoolProp_CoolProp_PropsSI('S','P',P_ORC4,'Q',0,self._getDefaultFluidCode())/1000 # kJ/kg·K
-        S_P4_g_ORC = self._py_CoolProp_CoolProp_PropsSI('S','P',P_ORC4,'Q',1,self._getDefaultFluidCode())/1000 # kJ/kg·K
-        X_ORC4s = (S_ORC4s - S_P4_f_ORC) / (S_P4_g_ORC - S_P4_f_ORC) # Steam quality at state 4s
-        S_ORC4s_joules = S_ORC3 * 1000 # Entropy in J/kg·K for calculations
-        H_P4_f_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',0,self._getDefaultFluidCode())/1000 # kJ/kg
-        H_P4_g_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',1,self._getDefaultFluidCode())/1000 # kJ/kg
-        H_ORC4s = H_P4_f_ORC + (X_ORC4s * (H_P4_g_ORC - H_P4_f_ORC)) # kJ/kg
         W_turbine_ideal_ORC = (m_ORC * (H_ORC3 - H_ORC4s)) # Ideal work delivered by ORC turbine, kJ/s
-        H_ORC4 = H_ORC3 + (Turb_eff_ORC * (H_ORC4s - H_ORC3))/1000 # kJ/kg
-        H_ORC4_joules = H_ORC4 * 1000 # Enthalpy in J/kg for calculations
-        T_ORC4 = self._py_CoolProp_CoolProp_PropsSI('T','P',P_ORC4,'H',H_ORC4_joules,self._getDefaultFluidCode()) # K
-        S_ORC4 = self._py_CoolProp_CoolProp_PropsSI('S','P',P_ORC4,'H',H_ORC4_joules,self._getDefaultFluidCode())/1000 # kJ/kg·K
-        X_ORC4 = (S_ORC4 - S_P4_f_ORC) / (S_P4_g_ORC - S_P4_f_ORC) # Steam quality at state 4
         W_turbine_real_ORC = W_turbine_ideal_ORC * Turb_eff_ORC # Real work delivered by the ORC turbine, kJ/s EQ 34 - DOC 3
         Gen_power_ORC = W_turbine_real_ORC * Gen_eff_ORC # Electrical power delivered to the grid by the ORC, kJ/s EQ 34 - DOC 3
         I_turbine_ORC = m_ORC * T_env * (S_ORC4 - S_ORC3) # Irreversibilities on the turbine, kJ/s EQ 35 - DOC 3
         # ORC Condenser (Liquid, ORC1)
-        H_sat_vap_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',1,self._getDefaultFluidCode())/1000 # Enthalpy of ORC saturated vapor at P_2c, kJ/kg
-        H_sat_liq_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',0,self._getDefaultFluidCode())/1000 # Enthalpy of ORC saturated liquid at P_2c, kJ/kg
-        Q_cond_ORC = m_ORC * ((Cp_ORC * (T_ORC4 - T_cond_ORC)) + (H_sat_vap_ORC - H_sat_liq_ORC) + (Cp_ORC * ORC_Subcool)) # Total heat on condenser, kJ/s EQ 36 - DOC 3
+        Q_cond_ORC = m_ORC * q_cond_ORC # Total heat on condenser, kJ/s EQ 36 - DOC 3
         
         # 4. THERMOELECTRIC GENERATORS
+        self._section('TEG')
         A_TEG = 0.0016 # Area of a 40x40 mm TEG module, m2
         A_engine = 35.81 # Area of engine block + CAC + LOC, m2
         Occup_factor = ((N_TEG * A_TEG) / A_engine) * 100 # Occupancy ratio of the TEG module inside the engine
@@ -568,34 +1312,36 @@ class WHRS():
 
         
         # 5. SEA WATER CONDITIONS
-        H_sw_in = self._py_CoolProp_CoolProp_PropsSI('H','P',P_sw_in,'T',T_sw_in,"Water")/1000 # Enthalpy of sea water at the inlet of the condenser, kJ/kg
-        S_sw_in = self._py_CoolProp_CoolProp_PropsSI('S','P',P_sw_in,'T',T_sw_in,"Water")/1000 # Entropy of sea water at the inlet of the condenser, kJ/kg
+        self._section('Seawater')
         T_sw_out_ORC_1 = T_sw_in + (Q_cond_ORC / (m_sw * Cp_sw)) # Sea water temperature at the outlet of ORC condenser, K
         P_sw_out_ORC_1 = P_sw_in - 10000 # Loss of pressure on ORC condenser, Pa
-        H_sw_out_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_sw_out_ORC_1,'T',T_sw_out_ORC_1,"Water")/1000 # Enthalpy of sea water at the outlet of ORC condenser, kJ/kg
-        S_sw_out_ORC = self._py_CoolProp_CoolProp_PropsSI('S','P',P_sw_out_ORC_1,'T',T_sw_out_ORC_1,"Water")/1000 # Entropy of sea water at the outlet of ORC condenser, kJ/kg·K
+        (H_sw_out_ORC,S_sw_out_ORC) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'P',P_sw_out_ORC_1,'T',T_sw_out_ORC_1,"Water")
+        H_sw_out_ORC = H_sw_out_ORC/1000 # Enthalpy of sea water at the outlet of ORC condenser, kJ/kg
+        S_sw_out_ORC = S_sw_out_ORC/1000 # Entropy of sea water at the outlet of ORC condenser, kJ/kg·K
         T_sw_in_RC_2 = T_sw_out_ORC_1
         P_sw_in_RC_2 = P_sw_out_ORC_1
-        H_sw_in_RC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_sw_in_RC_2,'T',T_sw_in_RC_2,"Water")/1000 # Enthalpy of sea water at the inlet of RC condenser, kJ/kg
-        S_sw_in_RC = self._py_CoolProp_CoolProp_PropsSI('S','P',P_sw_in_RC_2,'T',T_sw_in_RC_2,"Water")/1000 # Entropy of sea water at the inlet of RC condenser, kJ/kg·K
+        (H_sw_in_RC,S_sw_in_RC) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'P',P_sw_in_RC_2,'T',T_sw_in_RC_2,"Water")
+        H_sw_in_RC = H_sw_in_RC/1000 # Enthalpy of sea water at the inlet of RC condenser, kJ/kg
+        S_sw_in_RC = S_sw_in_RC/1000 # Entropy of sea water at the inlet of RC condenser, kJ/kg·K
         T_sw_out_RC_2 = T_sw_in_RC_2 + (Q_cond_jw_RC / (m_sw * Cp_sw)) # Sea water temp at the outlet of the evaporator, K
         P_sw_out_RC_2 = P_sw_in_RC_2 - 10000 # Loss of pressure on RC condenser, Pa
-        H_sw_out_RC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_sw_out_RC_2,'T',T_sw_out_RC_2,"Water")/1000 # Enthalpy of sea water at the outlet of RC condenser, kJ/kg
-        S_sw_out_RC = self._py_CoolProp_CoolProp_PropsSI('S','P',P_sw_out_RC_2,'T',T_sw_out_RC_2,"Water")/1000 # Entropy of sea water at the outlet of RC condenser, kJ/kg·K
+        (H_sw_out_RC,S_sw_out_RC) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'P',P_sw_out_RC_2,'T',T_sw_out_RC_2,"Water")
+        H_sw_out_RC = H_sw_out_RC/1000 # Enthalpy of sea water at the outlet of RC condenser, kJ/kg
+        S_sw_out_RC = S_sw_out_RC/1000 # Entropy of sea water at the outlet of RC condenser, kJ/kg·K
         T_sw_in_DES_3 = T_sw_out_RC_2
         P_sw_in_DES_3 = P_sw_out_RC_2
-        H_sw_in_DES_3 = self._py_CoolProp_CoolProp_PropsSI('H','P',P_sw_in_DES_3,'T',T_sw_in_DES_3,"Water")/1000 # Enthalpy of sea water at the inlet of the desalination, kJ/kg
-        S_sw_in_DES_3 = self._py_CoolProp_CoolProp_PropsSI('S','P',P_sw_in_DES_3,'T',T_sw_in_DES_3,"Water")/1000 # Entropy of sea water at the inlet of the desalination, kJ/kg·K
+        (H_sw_in_DES_3,S_sw_in_DES_3) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'P',P_sw_in_DES_3,'T',T_sw_in_DES_3,"Water")
+        H_sw_in_DES_3 = H_sw_in_DES_3/1000 # Enthalpy of sea water at the inlet of the desalination, kJ/kg
+        S_sw_in_DES_3 = S_sw_in_DES_3/1000 # Entropy of sea water at the inlet of the desalination, kJ/kg·K
         P_sw_out_DES_3 = P_sw_in_DES_3 - 10000 # Loss of pressure on desalination condenser, Pa
         T_sw_out_DES_3 = T_sw_in_DES_3 # Sea water general outlet from desalination, K - ASSUMED ALL HEAT GOES INTO EVAPORATION
         T_sw_out_DES_3_distillate = T_D2 - Pinch_point_des # Sea water outlet temperature according to Pinch Point, K
         if (T_des >= T_sw_out_DES_3_distillate):
             self._warndlg ({'The vaporization temperature of the desalination process is higher than the pinch point selected.'},'Error')
         
-        H_sw_out_DES_3 = self._py_CoolProp_CoolProp_PropsSI('H','P',P_sw_out_DES_3,'T',T_sw_out_DES_3,"Water")/1000 # Enthalpy of sea water at the outlet of the desalination, kJ/kg
-        S_sw_out_DES_3 = self._py_CoolProp_CoolProp_PropsSI('S','P',P_sw_out_DES_3,'T',T_sw_out_DES_3,"Water")/1000 # Entropy of sea water at the outlet of the desalination, kJ/kg·K
-        H_sw_DES_3_f = (self._py_CoolProp_CoolProp_PropsSI('H','P',P_chamber,'Q',0,"Water"))/1000 # kJ/kg
-        H_sw_DES_3_g = (self._py_CoolProp_CoolProp_PropsSI('H','P',P_chamber,'Q',1,"Water"))/1000 # kJ/kg
+        (H_sw_out_DES_3,S_sw_out_DES_3) = self._py_CoolProp_CoolProp_StateSI(('H','S'),'P',P_sw_out_DES_3,'T',T_sw_out_DES_3,"Water")
+        H_sw_out_DES_3 = H_sw_out_DES_3/1000 # Enthalpy of sea water at the outlet of the desalination, kJ/kg
+        S_sw_out_DES_3 = S_sw_out_DES_3/1000 # Entropy of sea water at the outlet of the desalination, kJ/kg·K
         m_sw_distillate = Q_sw_des / ((Cp_sw * (T_des - T_sw_in_DES_3)) + (H_sw_DES_3_g - H_sw_DES_3_f) + (Cp_sw * (T_sw_out_DES_3_distillate - T_des))) # Mass flow of distillate, kg/s
         m_sw_distillate_hour = m_sw_distillate * 3600 # Mass flow of distillate, kg/s
         m_sw_out_DES_3 = m_sw - m_sw_distillate # Not vaporized sea water, kg/s
@@ -646,6 +1392,7 @@ class WHRS():
         
         
         # 6. WHRS PERFORMANCE
+        self._section('Performance')
         # Rankine cycle performance
         Heat_input_RC = (Q_engine * (m_jw_RC / m_jw)) + Q_exh # Heat available from hot current, kJ/s
         Cycle_output_RC = W_turbine_real_RC - W_pump_real # Total work on the cycle, kJ/s
@@ -667,8 +1414,6 @@ class WHRS():
         Exergy_eff_TEG = (TEG_output_kW / (TEG_output_kW + I_TEG))*100 # Exergy efficiency of TEG system EQ 44 - DOC 3
         # Desalination performance
         Desalination_eff = (Q_sw_des_equivalent / (Q_jw_des + W_des_pump))*100 # Efficiency of the desalination process
-        T_avg_des = (T_D2 - T_D3) / math.log (T_D2 / T_D3) # Average temperature of jacket water inside desalination system, K
-        I_des_jw = Q_jw_des * (1 - (T_env / T_avg_des)) # Irreversibilities of jacket water, kJ/s
         I_des_sw = m_sw * (H_sw_in_DES_3 - H_sw_out_DES_3 - (T_env * (S_sw_in_DES_3 - S_sw_out_DES_3))) # Irreversibilities of sea water, kJ/s
         I_des = I_des_jw + I_des_sw # Total irreversibilities on desalination process, kJ/s
         Exergy_eff_DES = (Q_sw_des_equivalent / (Q_jw_des + I_des))*100 # Exergy efficiency of desalination system
@@ -720,37 +1465,427 @@ class WHRS():
             
         # Save dictPropSI
         self._savePropSI()
+        self._section(None)
         
-        # Store params
-        self.params_value[0]=Load
-        self.params_value[1]=FO_Consumption
-        self.params_value[2]=Exh_in
-        self.params_value[3]=m_exh
-        self.params_value[4]=T_D2
-        self.params_value[5]=JW_pump
-        self.params_value[6]=Pump_eff
-        self.params_value[7]=Heat_block
-        self.params_value[8]=T_sw_in
-        self.params_value[9]=P_sw_in
-        self.params_value[10]=Power
-        self.params_value[11]=RC_Superheat
-        self.params_value[12]=RC_Subcool
-        self.params_value[13]=ORC_Superheat
-        self.params_value[14]=ORC_Subcool
-        self.params_value[15]=ORC_Pump / 100000
-        self.params_value[16]=ORC_Pump_eff
-        self.params_value[17]=P_chamber / 100000
-        self.params_value[18]=Pinch_point_des
-        self.params_value[19]=T_des_surface 
-        self.params_value[20]=N_TEG
-        self.params_value[21]=TEG_hot   
-        self.params_value[22]=TEG_cold   
-        self.params_value[23]=WHRS_cycle_output  
-        self.params_value[24]=CO2_red   
-        self.params_value[25]=EPC        
-        
-        return (WHRS_cycle_output,CO2_red,EPC)
+        # Params (same order than params_name_type)
+        values=[Load,FO_Consumption,Exh_in,m_exh,T_D2,JW_pump,Pump_eff,
+                Heat_block,T_sw_in,P_sw_in,Power,RC_Superheat,RC_Subcool,
+                ORC_Superheat,ORC_Subcool,ORC_Pump / 100000,ORC_Pump_eff,
+                P_chamber / 100000,Pinch_point_des,T_des_surface,N_TEG,
+                TEG_hot,TEG_cold,WHRS_cycle_output,CO2_red,EPC]
         
+        return values
+
+    def evaluate(self,Load,JW_pump,
+                      RC_Superheat,RC_Subcool,
+                      ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid=None):
+        """
+        Reentrant version of __call__: the object is not changed (params_value
+        is not written) and the caches are thread-safe, so one WHRS object can
+        be shared by several threads.
+        Params: see __call__
+        Returns:
+            immutable (read-only) numpy structured row with a float field per
+            name in params_name_type, like a row of evaluate_batch.
+            Ex: R=rs.evaluate(...); R['EPC']; R.tolist()
+        """
+        R=np.array([tuple(self._evaluate(Load,JW_pump,
+                                         RC_Superheat,RC_Subcool,
+                                         ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid))],
+                   dtype=self.resultDtype)
+        R.flags.writeable=False
+        return R[0]
+
+    def __call__(self,Load,JW_pump,
+                      RC_Superheat,RC_Subcool,
+                      ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid=None):
+        """
+        Evaluates the WHRS and stores the params in params_value (see
+        getValues). Returns (WHRS_cycle_output,CO2_red,EPC).
+        Not reentrant, use evaluate from several threads.
+        """
+        values=self._evaluate(Load,JW_pump,
+                              RC_Superheat,RC_Subcool,
+                              ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid)
+        self.params_value=values
+        return (values[23],values[24],values[25])
+
+    def _batchPropsSI(self,valid,P1,P2,P3,P4,P5,P6):
+        """
+        Vectorized PropsSI call over the points where valid is True.
+        P3 and P5 can be scalars or arrays with the shape of valid.
+        The points whose value is not finite (CoolProp returns inf when a flash
+        fails) are marked as not valid. valid is updated in place.
+        """
+        v=np.full(valid.shape,np.nan)
+        idx=np.flatnonzero(valid)
+        if len(idx)==0:
+            return v
+        sat=self._saturationTableProp(P1,P2,np.broadcast_to(P3,valid.shape)[idx] if P2!='Q' else P3,
+                                      P4,np.broadcast_to(P5,valid.shape)[idx] if P4!='Q' else P5,P6)
+        if sat is not None: # The values out of the table are calculated with CoolProp
+            v[idx]=sat
+            idx=idx[np.isnan(sat)]
+            if len(idx)==0:
+                return v
+        V3=np.broadcast_to(np.asarray(P3,dtype=float),valid.shape)[idx]
+        V5=np.broadcast_to(np.asarray(P5,dtype=float),valid.shape)[idx]
+        P6=self._backendFluid(P6)
+        if self._isTabularFluid(P6): # Tabular backends are not allowed in PropsSI
+            AS=self._buildAbstractState(P6)
+            (i2,i4,i1)=(self._paramIndex(P2),self._paramIndex(P4),self._paramIndex(P1))
+            for k,v3,v5 in zip(idx,V3,V5):
+                try:
+                    AS.update(*CP.generate_update_pair(i2,v3,i4,v5))
+                    v[k]=AS.keyed_output(i1)
+                except ValueError:
+                    pass # v[k] is NaN
+        else:
+            try:
+                v[idx]=CP.PropsSI(P1,P2,V3,P4,V5,P6)
+            except ValueError: # One point fails all the call, they are calculated one by one
+                if self.verbose>=1:
+                    print('Error en: CP.PropsSI({},{},[...],{},[...],{})'.format(P1,P2,P4,P6))
+                for k,v3,v5 in zip(idx,V3,V5):
+                    try:
+                        v[k]=CP.PropsSI(P1,P2,v3,P4,v5,P6)
+                    except ValueError:
+                        pass # v[k] is NaN
+        valid&=np.isfinite(v)
+        return v
+
+    def evaluate_batch(self,Load,JW_pump,
+                            RC_Superheat,RC_Subcool,
+                            ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid=None):
+        """
+        Vectorized version of __call__. Evaluates N design points at once.
+        Params:
+            Load,...,P_chamber : arrays (or scalars, that are broadcasted) with
+                                 the same meaning and units than in __call__
+            fluid              : ORC fluid Id (see FluidNameCode).
+                                 Default=None, the default fluid is used
+        Returns:
+            structured numpy array of N rows with a float field per name in
+             params_name_type (the same values that getValues returns after
+             __call__).
+            The points out of params_range or where a CoolProp flash fails are
+             not raised. They are marked as not valid and their calculated and
+             output fields are NaN (use numpy.isnan(R['EPC']) as mask).
+
+        Only the properties that are needed for the 26 params are evaluated and
+         there are no warnings. The results match __call__ up to the CoolProp
+         solver tolerance (relative differences < 1e-8).
+        """
+        if fluid==None:
+            fluid=self.defaultFluidId
+        fluidCode=self.FluidNameCode[fluid][1]
+
+        # 0. INPUT DATA
+        (Load,JW_pump,RC_Superheat,RC_Subcool,
+         ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)=np.broadcast_arrays(
+             *[np.asarray(x,dtype=float).ravel() for x in
+               (Load,JW_pump,RC_Superheat,RC_Subcool,
+                ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)])
+        N=len(Load)
+
+        # Mask of valid points (instead of _checkParam)
+        valid=np.ones(N,dtype=bool)
+        for v,name in ((Load,'Load'),(JW_pump,'JW_pump'),
+                       (RC_Superheat,'RC_Superheat'),(RC_Subcool,'RC_Subcool'),
+                       (ORC_Superheat,'ORC_Superheat'),(ORC_Subcool,'ORC_Subcool'),
+                       (ORC_Pump,'ORC_Pump'),(P_chamber,'P_chamber')):
+            Range=self.params_range[name]
+            valid&=np.isfinite(v) & (v>=Range[0]) & (v<=Range[1])
+
+        R=np.full(N,np.nan,dtype=self.resultDtype)
+        R['Load']=Load
+        R['JW_pump']=JW_pump
+        R['RC_Superheat']=RC_Superheat
+        R['RC_Subcool']=RC_Subcool
+        R['ORC_Superheat']=ORC_Superheat
+        R['ORC_Subcool']=ORC_Subcool
+        R['ORC_Pump']=ORC_Pump
+        R['P_chamber']=P_chamber
+
+        with np.errstate(all='ignore'):
+            FO_Consumption = np.interp(Load,self.EngineLoad,self.FOConsumption)
+            Exh_in         = np.interp(Load,self.EngineLoad,self.TempEG)
+            m_exh          = np.interp(Load,self.EngineLoad,self.MaxFlowRate)
+            T_D2           = self.T_D2_Constant
+            HT_pump        = JW_pump * 100000
+            Pump_eff       = self.T_Pump_eff_Constant
+            Heat_block     = np.interp(Load,self.Engine_blockLoad,self.Engine_block)
+            T_sw_in        = self.T_sw_in_Constant
+            P_sw_in        = self.P_sw_in_Constant * 100000
+            Power          = 3000 * (Load/100)
+
+            ORC_Pump_Pa     = ORC_Pump * 100000
+            ORC_Pump_eff    = self.ORC_Pump_eff_Constant
+            P_chamber_Pa    = P_chamber * 100000
+            Pinch_point_des = self.Pinch_point_des_Constant
+            T_des_surface   = self.T_des_surface_Constan
+            N_TEG           = self.N_TEG_Constant
+            TEG_hot         = self.TEG_hot_Constant
+
+            Exh_out = 413
+            Cp_exh = 1.185
+            m_jw = self.m_jw_Constant
+            Cp_jw = self.Cp_jw_Constant
+            m_sw = self.m_sw_Constant
+            Cp_sw = self._py_CoolProp_CoolProp_PropsSI('Cpmass','T',T_sw_in,'Q',0,"Water")/1000
+            T_env = self.T_env_Constant
+
+            # 1. DESALINATION SYSTEM
+            Kjw = 25.6
+            Des_area = 4.8
+            Daily_cap = 22
+            T_D3 = 55 + 273.15
+            T_des = self._batchPropsSI(valid,'T','Q',1,'P',P_chamber_Pa,"Water")
+            m_jw_des = (((Kjw*Daily_cap) / (T_D2 - T_D3)) * 1.025) / 3.6
+            m_jw_cycles = m_jw - m_jw_des
+            Q_jw_des = m_jw_des * Cp_jw * (T_D2 - T_D3)
+            Q_radiation_des = (0.84 * 5.67 * 1e-8 * (T_des_surface)**4 * Des_area)/1000
+            Q_sw_des = Q_jw_des - Q_radiation_des
+            Q_sw_des_equivalent = Q_sw_des * (1 - (T_env / T_des))
+
+            # 2. STEAM RANKINE CYCLE
+            Turb_eff_RC = self.Turb_eff_RC_Constant
+            Gen_eff_RC = 0.96
+            T_RC1 = (55 + 273.15) + RC_Subcool
+            P_RC1 = self._batchPropsSI(valid,'P','T',T_RC1,'Q',0,"Water")
+            T_1 = 55 + 273.15
+            P_1 = P_RC1
+            H_1 = self._batchPropsSI(valid,'H','T',T_1,'P',P_1,"Water")/1000
+            D_1 = self._batchPropsSI(valid,'D','T',T_1,'P',P_1,"Water")
+            SpecVol_RC1 = 1/D_1
+            P_2 = P_1 + HT_pump
+            w_spec_pump_ideal = (SpecVol_RC1 * (P_2 - P_1))/1000
+            W_pump_ideal = (m_jw * w_spec_pump_ideal)
+            W_pump_real = W_pump_ideal / Pump_eff
+            P_2c = P_2 - 55000
+            Q_exh = m_exh * Cp_exh * (Exh_in - Exh_out)
+            T_evap_RC = self._batchPropsSI(valid,'T','P',P_2c,'Q',0,"Water")
+            T_RC2 = T_D2
+            H_sat_vap_RC = self._batchPropsSI(valid,'H','P',P_2c,'Q',1,"Water")/1000
+            H_sat_liq_RC = self._batchPropsSI(valid,'H','P',P_2c,'Q',0,"Water")/1000
+            m_jw_RC = Q_exh / ((Cp_jw * (T_evap_RC - T_RC2)) + (H_sat_vap_RC - H_sat_liq_RC) + (Cp_jw * RC_Superheat) )
+            m_jw_ORC = m_jw_cycles - m_jw_RC
+            T_RC3 = T_evap_RC + RC_Superheat
+            P_RC3 = P_2c - 10000
+            H_RC3 = self._batchPropsSI(valid,'H','T',T_RC3,'P',P_RC3,"Water")/1000
+            S_RC3 = self._batchPropsSI(valid,'S','T',T_RC3,'P',P_RC3,"Water")/1000
+            P_RC4 = P_RC1 + 10000
+            S_RC4s = S_RC3
+            S_RC_P4_f = self._batchPropsSI(valid,'S','P',P_RC4,'Q',0,"Water")/1000
+            S_RC_P4_g = self._batchPropsSI(valid,'S','P',P_RC4,'Q',1,"Water")/1000
+            X_RC4s = (S_RC4s - S_RC_P4_f) / (S_RC_P4_g - S_RC_P4_f)
+            H_RC_P4_f = self._batchPropsSI(valid,'H','P',P_RC4,'Q',0,"Water")/1000
+            H_RC_P4_g = self._batchPropsSI(valid,'H','P',P_RC4,'Q',1,"Water")/1000
+            H_RC4s = H_RC_P4_f + (X_RC4s * (H_RC_P4_g - H_RC_P4_f))
+            W_turbine_ideal_RC = (m_jw_RC * (H_RC3 - H_RC4s))
+            H_RC4 = H_RC3 + (Turb_eff_RC * (H_RC4s - H_RC3))
+            H_RC4_joules = H_RC4 * 1000
+            T_RC4 = self._batchPropsSI(valid,'T','P',P_RC4,'H',H_RC4_joules,"Water")
+            W_turbine_real_RC = W_turbine_ideal_RC * Turb_eff_RC
+            Gen_power_RC = W_turbine_real_RC * Gen_eff_RC
+            Q_cond_jw_RC = m_jw_RC * Cp_jw * (T_RC4 - T_1)
+
+            # 3. ORC
+            T_evap_jw_ORC_in = T_D2
+            T_evap_jw_ORC_out = 55 + 273.15
+            T_cond_ORC = T_sw_in + 5
+            P_cond_ORC = self._py_CoolProp_CoolProp_PropsSI('P','T',T_cond_ORC,'Q',1,fluidCode)
+            Cp_ORC = self._py_CoolProp_CoolProp_PropsSI('Cpmass','T',T_cond_ORC,'Q',0,fluidCode)/1000
+            Q_evap_jw_ORC = m_jw_ORC * Cp_jw * (T_evap_jw_ORC_in - T_evap_jw_ORC_out)
+            T_ORC1 = T_cond_ORC - ORC_Subcool
+            P_ORC1 = P_cond_ORC
+            H_ORC1 = self._batchPropsSI(valid,'H','T',T_ORC1,'P',P_ORC1,fluidCode)/1000
+            D_ORC1 = self._batchPropsSI(valid,'D','T',T_ORC1,'P',P_ORC1,fluidCode)
+            SpecVol_ORC1 = 1/D_ORC1
+            P_ORC2 = P_ORC1 + ORC_Pump_Pa
+            w_spec_pump_ORC_ideal = (SpecVol_ORC1 * (P_ORC2 - P_ORC1))/1000
+            H_ORC2s = w_spec_pump_ORC_ideal + H_ORC1
+            H_ORC2 = ((H_ORC2s - H_ORC1)/ORC_Pump_eff) + H_ORC1
+            H_ORC2_joules = H_ORC2 * 1000
+            T_ORC2 = self._batchPropsSI(valid,'T','P',P_ORC2,'H',H_ORC2_joules,fluidCode)
+            T_evap_ORC = self._batchPropsSI(valid,'T','P',P_ORC2,'Q',0,fluidCode)
+            T_ORC3 = T_evap_ORC + ORC_Superheat
+            P_ORC3 = P_ORC2 - 10000
+            H_ORC3 = self._batchPropsSI(valid,'H','T',T_ORC3,'P',P_ORC3,fluidCode)/1000
+            m_ORC = Q_evap_jw_ORC / ((Cp_ORC * (T_evap_ORC - T_ORC2)) + (H_ORC3 - H_ORC2) + (Cp_ORC * ORC_Superheat))
+            W_pump_ideal_ORC = (m_ORC * w_spec_pump_ORC_ideal)
+            W_pump_real_ORC = W_pump_ideal_ORC / ORC_Pump_eff
+            S_ORC3 = self._batchPropsSI(valid,'S','T',T_ORC3,'P',P_ORC3,fluidCode)/1000
+            Turb_eff_ORC = self.Turb_eff_ORC_Constant
+            Gen_eff_ORC = 0.96
+            P_ORC4 = P_ORC1 + 10000
+            S_ORC4s = S_ORC3
+            S_P4_f_ORC = self._py_CoolProp_CoolProp_PropsSI('S','P',P_ORC4,'Q',0,fluidCode)/1000
+            S_P4_g_ORC = self._py_CoolProp_CoolProp_PropsSI('S','P',P_ORC4,'Q',1,fluidCode)/1000
+            X_ORC4s = (S_ORC4s - S_P4_f_ORC) / (S_P4_g_ORC - S_P4_f_ORC)
+            H_P4_f_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',0,fluidCode)/1000
+            H_P4_g_ORC = self._py_CoolProp_CoolProp_PropsSI('H','P',P_ORC4,'Q',1,fluidCode)/1000
+            H_ORC4s = H_P4_f_ORC + (X_ORC4s * (H_P4_g_ORC - H_P4_f_ORC))
+            W_turbine_ideal_ORC = (m_ORC * (H_ORC3 - H_ORC4s))
+            H_ORC4 = H_ORC3 + (Turb_eff_ORC * (H_ORC4s - H_ORC3))/1000 # Same formula than in __call__
+            H_ORC4_joules = H_ORC4 * 1000
+            T_ORC4 = self._batchPropsSI(valid,'T','P',P_ORC4,'H',H_ORC4_joules,fluidCode)
+            W_turbine_real_ORC = W_turbine_ideal_ORC * Turb_eff_ORC
+            Gen_power_ORC = W_turbine_real_ORC * Gen_eff_ORC
+            H_sat_vap_ORC = H_P4_g_ORC
+            H_sat_liq_ORC = H_P4_f_ORC
+            Q_cond_ORC = m_ORC * ((Cp_ORC * (T_ORC4 - T_cond_ORC)) + (H_sat_vap_ORC - H_sat_liq_ORC) + (Cp_ORC * ORC_Subcool))
+
+            # 4. THERMOELECTRIC GENERATORS
+            A_TEG = 0.0016
+            A_engine = 35.81
+            Occup_factor = ((N_TEG * A_TEG) / A_engine) * 100
+
+            # 5. SEA WATER CONDITIONS
+            T_sw_out_ORC_1 = T_sw_in + (Q_cond_ORC / (m_sw * Cp_sw))
+            T_sw_in_RC_2 = T_sw_out_ORC_1
+            T_sw_out_RC_2 = T_sw_in_RC_2 + (Q_cond_jw_RC / (m_sw * Cp_sw))
+            T_sw_in_DES_3 = T_sw_out_RC_2
+            T_sw_out_DES_3 = T_sw_in_DES_3
+            TEG_cold = T_sw_out_DES_3
+
+            TEG_gradient = TEG_hot - TEG_cold
+            TEG_output = np.select([TEG_gradient<=60,TEG_gradient>=121,TEG_gradient>=61],
+                                   [0.901*N_TEG,6.299*N_TEG,3.299*N_TEG],np.nan) # (60,61) is not defined in __call__
+            TEG_output_kW = TEG_output / 1000
+
+            # 6. WHRS PERFORMANCE
+            Cycle_output_gen_RC = Gen_power_RC - W_pump_real
+            Cycle_output_gen_ORC = Gen_power_ORC - W_pump_real_ORC
+            WHRS_cycle_output = Cycle_output_gen_RC + Cycle_output_gen_ORC + TEG_output_kW + Q_sw_des_equivalent
+
+            # 7. FUEL SAVINGS
+            Total_output = Power + Cycle_output_gen_RC + Cycle_output_gen_ORC + TEG_output_kW + Q_sw_des_equivalent
+            New_FO = (Power * FO_Consumption) / Total_output
+
+            #****  CO2 reduction
+            TotalFOCons=New_FO*Power
+            Daily_W_FOCons=(TotalFOCons*24)/1000
+            CO2_W_day=Daily_W_FOCons*3.206
+            FO_consumption_WO=np.interp(Load,self.EngineLoad,self.FO_consumption_WO)
+            TotalFO_WO_Cons=FO_consumption_WO*Power
+            Daily_WO_FO=(TotalFO_WO_Cons*24)/1000
+            CO2_WO_day=Daily_WO_FO*3.206
+            CO2_red=(1-(CO2_W_day/CO2_WO_day))*100
+
+            #**** Economic
+            Ctot=76580.6116
+            CRF=0.13387878
+            fk=8
+            t=5000
+            EPC=(Ctot*(CRF+fk))/(WHRS_cycle_output*t)
+
+        valid&=np.isfinite(WHRS_cycle_output) & np.isfinite(CO2_red) & np.isfinite(EPC)
+
+        # Store params of the valid points
+        for name,v in (('FO_Consumption',FO_Consumption),('Exh_in',Exh_in),
+                       ('m_exh',m_exh),('T_D2',T_D2),('Pump_eff',Pump_eff),
+                       ('Heat_block',Heat_block),('T_sw_in',T_sw_in),
+                       ('P_sw_in',P_sw_in),('Power',Power),
+                       ('ORC_Pump_eff',ORC_Pump_eff),
+                       ('Pinch_point_des',Pinch_point_des),
+                       ('T_des_surface',T_des_surface),('N_TEG',N_TEG),
+                       ('TEG_hot',TEG_hot),('TEG_cold',TEG_cold),
+                       ('WHRS_cycle_output',WHRS_cycle_output),
+                       ('CO2_red',CO2_red),('EPC',EPC)):
+            R[name]=np.where(valid,v,np.nan)
+
+        if self.verbose>=1:
+            print('evaluate_batch: {} points, {} valid'.format(N,np.count_nonzero(valid)))
+
+        return R
+
+    def _backendAccuracyReport(self,Ref,fluids,nSamples,tol,seed):
+        """
+        Compares the outputs of self against the ones of the WHRS object Ref
+        for each fluid Id in fluids on a uniform sample of the params_range box.
+        See tabularAccuracyReport
+        """
+        names=['Load','JW_pump','RC_Superheat','RC_Subcool','ORC_Superheat',
+               'ORC_Subcool','ORC_Pump','P_chamber']
+        outputs=['WHRS_cycle_output','CO2_red','EPC']
+        RG=np.random.default_rng(seed)
+        X=[RG.uniform(self.params_range[n][0],self.params_range[n][1],nSamples) for n in names]
+        Ref.params_range=self.params_range
+        report={}
+        for fluid in fluids:
+            fluidCode=self.FluidNameCode[fluid][1]
+            RS=self.evaluate_batch(*X,fluid=fluid)
+            RR=Ref.evaluate_batch(*X,fluid=fluid)
+            both=~np.isnan(RS['EPC']) & ~np.isnan(RR['EPC'])
+            report[fluidCode]={}
+            for o in outputs:
+                dev=np.abs(RS[o][both]-RR[o][both])/np.abs(RR[o][both])
+                report[fluidCode][o]=(dev.mean(),dev.max()) if len(dev)>0 else (np.nan,np.nan)
+            if self.verbose>=1 or not all(report[fluidCode][o][1]<=tol for o in outputs): # NaN: no valid points
+                print('{} (fluid: {}, water: {}, {} points):'
+                      .format(fluidCode,self._backendFluid(fluidCode).split('::')[0],
+                              self._backendFluid("Water").split('::')[0],np.count_nonzero(both)))
+                for o in outputs:
+                    (devMean,devMax)=report[fluidCode][o]
+                    print('  {:17} mean={:9.2e} max={:9.2e} {}'
+                          .format(o,devMean,devMax,'OK' if devMax<=tol else '** not <= tol={:g}'.format(tol)))
+        return report
+
+    def tabularAccuracyReport(self,nSamples=200,tol=1e-3,seed=2480):
+        """
+        Compares the outputs calculated with the tabular backends against HEOS
+        on a uniform sample of the params_range box.
+        Params:
+            nSamples : number of design points sampled for each tabular fluid.
+                       Default=200
+            tol      : maximum relative deviation allowed for each output.
+                       Default=1e-3
+            seed     : seed of the sample. Default=2480
+        Returns:
+            dict {fluid code: {output: (mean relative deviation,
+                                        max relative deviation)}}
+            The fluids whose max deviation is greater than tol are reported.
+        """
+        fluids=[fluid for fluid in range(len(self.FluidNameCode))
+                if self._isTabularFluid(self._backendFluid(self.FluidNameCode[fluid][1]))]
+        Ref=WHRS(PropsSIStore='none',PropsSIBackend='AbstractState',WaterBackend=self.WaterBackend)
+        return self._backendAccuracyReport(Ref,fluids,nSamples,tol,seed)
+
+    def waterAccuracyReport(self,fluids=None,nSamples=200,tol=1e-3,seed=2480):
+        """
+        Validation of WaterBackend. Compares the outputs (WHRS_cycle_output,
+        CO2_red and EPC) calculated with the selected water backend against
+        the ones calculated with HEOS for water. The ORC fluids use the same
+        backend in both cases.
+        Params:
+            fluids   : list of ORC fluid Ids. Default=None (the default fluid)
+            nSamples, tol, seed, Returns : see tabularAccuracyReport
+        """
+        if fluids==None:
+            fluids=[self.defaultFluidId]
+        Ref=WHRS(PropsSIStore='none',PropsSIBackend=self.PropsSIBackend,
+                 TabularBackend=self.TabularBackend,tablesDir=self.tablesDir)
+        return self._backendAccuracyReport(Ref,fluids,nSamples,tol,seed)
+
+    def saturationAccuracyReport(self,fluids=None,nSamples=200,tol=1e-6,seed=2480):
+        """
+        Validation of SaturationTables. Compares the outputs calculated with
+        the saturation tables against the ones calculated with CoolProp (same
+        backends).
+        Params:
+            fluids   : list of ORC fluid Ids. Default=None (the default fluid)
+            nSamples, seed, Returns : see tabularAccuracyReport
+            tol      : maximum relative deviation allowed for each output.
+                       Default=1e-6
+        """
+        if fluids==None:
+            fluids=[self.defaultFluidId]
+        Ref=WHRS(PropsSIStore='none',PropsSIBackend=self.PropsSIBackend,
+                 TabularBackend=self.TabularBackend,tablesDir=self.tablesDir,
+                 WaterBackend=self.WaterBackend)
+        return self._backendAccuracyReport(Ref,fluids,nSamples,tol,seed)
+
     def _HeaderName(self,N,T):
         return '{}_{}'.format(N,T)
 
@@ -798,4 +1933,7 @@ class WHRS():
 # print(EF.getHeader())
 # print(EF.getValues())
 
+# R=EF.evaluate_batch(Load=[60.0,80.0],JW_pump=3.15,RC_Superheat=8.022159028375663,RC_Subcool=1e-4,ORC_Superheat=1e-3,ORC_Subcool=1e-3,ORC_Pump=6.6,P_chamber=[0.2,0.15])
+# print(R[['WHRS_cycle_output','CO2_red','EPC']])
+
 
@@ -10,20 +10,26 @@ import matplotlib.pyplot as plt
 
 class WHRSBayesianOpt(WHRSOptimizerBase):
     
-    def __init__(self,WHRSObject,RS=2480,nIter=100,initRandP=10):
+    def __init__(self,WHRSObject,RankModel,RS=2480,nIter=100,initRandP=10,fluid=None,ledger=None,runId=None,archive=None):
         """
         Params:
             WHRSObject : see WHRSOptimizerBase.__init__
+            RankModel  : see WHRSOptimizerBase.__init__
             RS         : see WHRSOptimizerBase.__init__
             nIter      : Iterations in the Bayesian Optimization (BO).
                          Default=100
             initRandP  : Number of random points to initialize the BO.
                          Default=10
                          
+            fluid      : see WHRSOptimizerBase.__init__
+            ledger     : see WHRSOptimizerBase.__init__
+            runId      : see WHRSOptimizerBase.__init__
+            archive    : see WHRSOptimizerBase.__init__
+                         
             The number of total iterations will be initRandP+nIter
         """
         # Call to father constructor 
-        WHRSOptimizerBase.__init__(self,WHRSObject,RS)
+        WHRSOptimizerBase.__init__(self,WHRSObject,RankModel,RS,fluid,ledger,runId,archive)
         
         # Params
         self.nIter=nIter
@@ -32,6 +38,11 @@ class WHRSBayesianOpt(WHRSOptimizerBase):
         # Model
         self.optimizer=None
     
+    def _runConfig(self):
+        config=WHRSOptimizerBase._runConfig(self)
+        config.update({'nIter':self.nIter,'initRandP':self.initRandP})
+        return config
+    
     def _maximize(self):
         optimizer = BayesianOptimization(f=self.targetFun,pbounds=self.pbounds,
                                          random_state=self.RS,verbose=0)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: quevedo
+"""
+
+import numpy as np
+from WHRSOptimizer.WHRSOptimizerBase import WHRSOptimizerBase
+import matplotlib.pyplot as plt
+
+def dominance(F):
+    """
+    Boolean matrix D with D[i,j]=True if the row i of F dominates the row j
+    (all the objectives are maximized)
+    """
+    Fi=F[:,None,:]
+    Fj=F[None,:,:]
+    return np.all(Fi>=Fj,axis=2) & np.any(Fi>Fj,axis=2)
+
+def nonDominatedSort(F):
+    """
+    Front of each row of F (0: non dominated), all the objectives are
+    maximized
+    """
+    D=dominance(F)
+    nDominators=D.sum(axis=0)
+    front=np.full(len(F),-1)
+    remaining=np.ones(len(F),dtype=bool)
+    k=0
+    while remaining.any():
+        current=remaining & (nDominators==0)
+        front[current]=k
+        remaining=remaining & ~current
+        nDominators=nDominators-D[current].sum(axis=0)
+        k=k+1
+    return front
+
+def crowdingDistance(F,front):
+    """
+    Crowding distance of each row of F inside its front
+    """
+    distance=np.zeros(len(F))
+    for k in np.unique(front):
+        members=np.where(front==k)[0]
+        if len(members)<=2:
+            distance[members]=np.inf
+            continue
+        Fk=np.where(np.isfinite(F[members]),F[members],0.0) # Failed evaluations
+        order=np.argsort(Fk,axis=0)
+        sortedF=np.take_along_axis(Fk,order,axis=0)
+        span=sortedF[-1]-sortedF[0]
+        span[span==0]=1
+        gaps=np.zeros(Fk.shape)
+        gaps[1:-1]=(sortedF[2:]-sortedF[:-2])/span
+        gaps[0]=np.inf
+        gaps[-1]=np.inf
+        d=np.zeros(Fk.shape)
+        np.put_along_axis(d,order,gaps,axis=0)
+        distance[members]=d.sum(axis=1)
+    return distance
+
+class WHRSNSGA2(WHRSOptimizerBase):
+    """
+    Multi-objective optimizer (NSGA-II) of the 3 WHRS outputs: maximizes
+    WHRS_cycle_output and CO2_red and minimizes EPC. The result is the
+    Pareto front of all the evaluations (see getParetoFront), the max values
+    are the ones of the design of the front with the best rank value
+    (RankModel), any other rank model can pick its design from the front
+    without optimizing again (see bestFor).
+    Each generation is evaluated in a batch (see nJobs and parallel).
+    """
+    # Sign of each output to maximize it
+    directions=np.array([1.0,1.0,-1.0])
+
+    def __init__(self,WHRSObject,RankModel,RS=2480,popSize=40,nGen=20,fluid=None,
+                 crossProb=0.9,etaCross=15,etaMut=20,nJobs=1,parallel='thread',
+                 ledger=None,runId=None,archive=None):
+        """
+        Params:
+            WHRSObject : see WHRSOptimizerBase.__init__
+            RankModel  : see WHRSOptimizerBase.__init__
+            RS         : see WHRSOptimizerBase.__init__
+            popSize    : designs of the population.
+                         Default=40
+            nGen       : generations.
+                         Default=20
+            fluid      : see WHRSOptimizerBase.__init__
+            crossProb  : probability of the crossover (SBX) of two parents.
+                         Default=0.9
+            etaCross   : distribution index of the crossover.
+                         Default=15
+            etaMut     : distribution index of the polynomial mutation.
+                         Default=20
+            nJobs      : concurrent evaluations.
+                         Default=1
+            parallel   : possible values: 'thread','process'
+                         (see WHRSskoptBayesian)
+                         Default='thread'
+            ledger     : see WHRSOptimizerBase.__init__
+            runId      : see WHRSOptimizerBase.__init__
+            archive    : see WHRSOptimizerBase.__init__
+
+            The number of total evaluations will be popSize*(nGen+1)
+        """
+        # Call to father constructor
+        WHRSOptimizerBase.__init__(self,WHRSObject,RankModel,RS,fluid,ledger,runId,archive)
+
+        # Params
+        if parallel not in ('thread','process'):
+            raise Exception('WHRSNSGA2: parallel={} is not valid'.format(parallel))
+        self.popSize=popSize
+        self.nGen=nGen
+        self.crossProb=crossProb
+        self.etaCross=etaCross
+        self.etaMut=etaMut
+        self.nJobs=nJobs
+        self.parallel=parallel
+
+        # Variables of the search (without Load if it is fixed)
+        self.varNames=[name for name in self.params if name!='Load' or self.fixedLoad==None]
+        self.low=np.array([self.pbounds[name][0] for name in self.varNames],dtype=float)
+        self.high=np.array([self.pbounds[name][1] for name in self.varNames],dtype=float)
+
+        # Model
+        self.X=None      # Inputs (the 8 inputs) of all the evaluations
+        self.O=None      # Outputs of all the evaluations
+        self.front=None  # Indexes in X and O of the Pareto front
+        self.genFronts=[] # Size of the front of each generation
+
+    def _runConfig(self):
+        config=WHRSOptimizerBase._runConfig(self)
+        config.update({'popSize':self.popSize,'nGen':self.nGen,'crossProb':self.crossProb,
+                       'etaCross':self.etaCross,'etaMut':self.etaMut})
+        return config
+
+    def _inputs(self,P):
+        """
+        The 8 inputs of each row of the population P
+        """
+        if self.fixedLoad==None:
+            return P
+        return np.column_stack([np.full(len(P),float(self.fixedLoad)),P])
+
+    def _objectives(self,O):
+        """
+        Objectives (maximized) of the outputs O, the failed evaluations (NaN)
+        are dominated by all the others
+        """
+        F=O*self.directions
+        F[~np.all(np.isfinite(F),axis=1)]=-np.inf
+        return F
+
+    def _tournament(self,rs,front,crowding,n):
+        """
+        n parents chosen by binary tournaments (lower front, then larger
+        crowding distance)
+        """
+        a=rs.randint(len(front),size=n)
+        b=rs.randint(len(front),size=n)
+        aWins=(front[a]<front[b]) | ((front[a]==front[b]) & (crowding[a]>crowding[b]))
+        return np.where(aWins,a,b)
+
+    def _variation(self,rs,parents):
+        """
+        Children of the parents (pairs of consecutive rows) with simulated
+        binary crossover (SBX) and polynomial mutation. With an odd number
+        of parents the last one is paired with a random partner
+        """
+        (n,nVar)=parents.shape
+        span=self.high-self.low
+        if n%2==1:
+            parents=np.vstack([parents,parents[rs.randint(n)]])
+        P1=parents[0::2]
+        P2=parents[1::2]
+        # SBX
+        u=rs.rand(*P1.shape)
+        beta=np.where(u<=0.5,(2*u)**(1/(self.etaCross+1)),(1/(2*(1-u)))**(1/(self.etaCross+1)))
+        cross=(rs.rand(len(P1),1)<self.crossProb) & (rs.rand(*P1.shape)<0.5)
+        beta=np.where(cross,beta,1.0)
+        C1=0.5*((1+beta)*P1+(1-beta)*P2)
+        C2=0.5*((1-beta)*P1+(1+beta)*P2)
+        children=np.empty((2*len(P1),nVar))
+        children[0::2]=C1
+        children[1::2]=C2
+        children=children[:n]
+        # Polynomial mutation
+        u=rs.rand(*children.shape)
+        delta=np.where(u<0.5,(2*u)**(1/(self.etaMut+1))-1,1-(2*(1-u))**(1/(self.etaMut+1)))
+        mutate=rs.rand(*children.shape)<1/nVar
+        children=children+np.where(mutate,delta*span,0.0)
+        return np.clip(children,self.low,self.high)
+
+    def _evaluatePopulation(self,P,pool):
+        inputs=self._inputs(P).tolist()
+        return np.array(self._evaluateBatch(inputs,pool),dtype=float).reshape(-1,3)
+
+    def _maximize(self):
+        rs=np.random.RandomState(self.RS)
+        nVar=len(self.varNames)
+        pool=self._newPool(self.nJobs,self.parallel)
+        try:
+            P=self.low+rs.rand(self.popSize,nVar)*(self.high-self.low)
+            O=self._evaluatePopulation(P,pool)
+            allP=[P]
+            allO=[O]
+            self.genFronts=[]
+            for _ in range(self.nGen):
+                F=self._objectives(O)
+                front=nonDominatedSort(F)
+                crowding=crowdingDistance(F,front)
+                self.genFronts.append(int(np.sum(front==0)))
+                parents=P[self._tournament(rs,front,crowding,self.popSize)]
+                Q=self._variation(rs,parents)
+                OQ=self._evaluatePopulation(Q,pool)
+                allP.append(Q)
+                allO.append(OQ)
+                # Survivors: the best fronts, the last one by crowding distance
+                R=np.vstack([P,Q])
+                OR=np.vstack([O,OQ])
+                FR=self._objectives(OR)
+                front=nonDominatedSort(FR)
+                crowding=crowdingDistance(FR,front)
+                survivors=np.lexsort((-crowding,front))[:self.popSize]
+                P=R[survivors]
+                O=OR[survivors]
+        finally:
+            pool.shutdown()
+
+        # Pareto front of all the evaluations (without repeated designs)
+        self.X=self._inputs(np.vstack(allP))
+        self.O=np.vstack(allO)
+        (_,unique)=np.unique(self.X,axis=0,return_index=True)
+        unique=np.sort(unique)
+        front=nonDominatedSort(self._objectives(self.O[unique]))
+        self.front=unique[(front==0) & np.all(np.isfinite(self.O[unique]),axis=1)]
+
+        (inputs,_,_)=self.bestFor(self.RankModel)
+        self.setMaxValues(*inputs)
+        return self.front
+
+    def getParetoFront(self):
+        """
+        Returns (X,O): the inputs [Load,JW_pump,...,P_chamber] and the
+        outputs [WHRS_cycle_output,CO2_red,EPC] of the designs of the Pareto
+        front of the last maximize
+        """
+        return (self.X[self.front],self.O[self.front])
+
+    def bestFor(self,RankModel):
+        """
+        Design of the Pareto front with the best rank value for RankModel
+        (the weights of the 3 outputs). Returns (inputs,outputs,rank value)
+        """
+        (X,O)=self.getParetoFront()
+        values=O.dot(np.asarray(RankModel,dtype=float))
+        ibest=int(np.argmax(values))
+        return (X[ibest].tolist(),O[ibest].tolist(),float(values[ibest]))
+
+    def _plotOpt(self,fsave=None):
+        (X,O)=self.getParetoFront()
+        plt.scatter(O[:,0],O[:,1],c=O[:,2],marker='.',label='Pareto front')
+        plt.colorbar(label='EPC')
+        plt.plot([self.WHRS_cycle_output],[self.CO2_red],linestyle='',marker='*',color='red',markersize=10,label='rank model')
+        plt.legend(loc='lower right')
+        plt.xlabel('WHRS_cycle_output')
+        plt.ylabel('CO2_red')
+        if fsave!=None:
+            plt.savefig(fsave,dpi=300)
+        plt.show()
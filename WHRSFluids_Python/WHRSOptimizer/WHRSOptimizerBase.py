@@ -4,23 +4,65 @@
 @author: quevedo
 """
 
+import hashlib
+import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor,ProcessPoolExecutor
+from EvaluationLedger import EvaluationLedger
+
+# WHRS object and fluid of each process of a pool (see _newPool)
+WHRSWorker=None
+fluidWorker=None
+
+def _initWorker(WHRSObject,fluid):
+    global WHRSWorker,fluidWorker
+    WHRSWorker=WHRSObject
+    fluidWorker=fluid
+
+def _evaluateWorker(x):
+    """
+    Outputs of the inputs x and the seconds of the simulation
+    """
+    start=time.time()
+    outputs=WHRSWorker(*x,fluidWorker)
+    return (outputs,time.time()-start)
 
 class WHRSOptimizerBase:
     """
     Base class for WHRS optimizers
     """
-    def __init__(self,WHRSObject,RankModel,RS=2480):
+    def __init__(self,WHRSObject,RankModel,RS=2480,fluid=None,ledger=None,runId=None,archive=None):
         """
         Params:
             WHRSObject : a WHRS Object
             RankModel  : vector of 3 components. Weigths of each WHRS outputs
             RS         : random state. Default=2480 (Office phone number)
+            fluid      : ORC fluid Id used in the WHRS evaluations.
+                         Default=None (the default fluid of WHRSObject)
+            ledger     : EvaluationLedger or the name of its file. Each
+                         evaluation of maximize is stored in it with the
+                         run id. A maximize with a run id that is already in
+                         the ledger (ex: an interrupted run) replays its
+                         evaluations instead of simulating them again.
+                         Default=None (no ledger)
+            runId      : id of the run in the ledger.
+                         Default=None (a hash of the configuration of the
+                         optimizer, see getRunId)
+            archive    : OutputArchive where the evaluations of maximize are
+                         added (to re-score them with other rank models).
+                         Default=None (no archive)
         """
         # Params
         self.WHRSObject=WHRSObject
         self.RankModel=RankModel
         self.RS=RS
+        self.fluid=fluid
+        if isinstance(ledger,str):
+            ledger=EvaluationLedger(ledger)
+        self.ledger=ledger
+        self.runId=runId
+        self.archive=archive
         
         # Fixed for WHRS
         self.params=['Load','JW_pump','RC_Superheat','RC_Subcool','ORC_Superheat'
@@ -58,6 +100,21 @@ class WHRSOptimizerBase:
         # Max Target
         self.target=None
         
+        # Profile of each iteration (if WHRSObject has a profiler)
+        self.iterationStats=[]
+        self.lastIterationEnd=None
+        
+        # Trace of the evaluations (see getTrace)
+        self.trace=[]
+        self.startTime=None
+        
+        # Ledger
+        self.replay={}    # inputs -> list of stored outputs of the run
+        self.replayed=0
+        self.seq=0        # Evaluations of the run
+        self.runIdUsed=None
+        self.ledgerLock=threading.Lock()
+        
     def rankFLoad(self,JW_pump,
                       RC_Superheat,RC_Subcool,
                       ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber):
@@ -71,16 +128,200 @@ class WHRSOptimizerBase:
     def rankF(self,Load,JW_pump,
                       RC_Superheat,RC_Subcool,
                       ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber):
+        outputs=self._evaluateOutputs((Load,JW_pump,RC_Superheat,RC_Subcool,
+                                       ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber))
+        return self._targetOutput(*outputs)
+    
+    def _evaluateOutputs(self,inputs,reentrant=False):
+        """
+        Outputs (WHRS_cycle_output,CO2_red,EPC) of inputs (the 8 inputs),
+        replayed from the ledger or simulated. The evaluation is added to
+        the trace, the ledger and the archive.
+        If reentrant the simulation uses WHRSObject.evaluate (several
+        threads at once) instead of WHRSObject.__call__
+        """
+        outputs=self._replayOutputs(inputs)
+        if outputs!=None:
+            self._rankOutputs(*outputs)
+            return outputs
+        (Load,JW_pump,RC_Superheat,RC_Subcool,ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)=inputs
+        simStart=time.time()
+        profiler=self.WHRSObject.profiler
+        if profiler!=None:
+            start=time.time()
+            before=profiler.snapshot()
         try:
-            (WHRS_cycle_output,CO2_red,EPC)=self.WHRSObject(Load,JW_pump,
-                              RC_Superheat,RC_Subcool,
-                              ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)
+            if reentrant:
+                R=self.WHRSObject.evaluate(Load,JW_pump,
+                                  RC_Superheat,RC_Subcool,
+                                  ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,self.fluid)
+                (WHRS_cycle_output,CO2_red,EPC)=(float(R['WHRS_cycle_output']),float(R['CO2_red']),float(R['EPC']))
+            else:
+                (WHRS_cycle_output,CO2_red,EPC)=self.WHRSObject(Load,JW_pump,
+                                  RC_Superheat,RC_Subcool,
+                                  ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,self.fluid)
         except:
             print('Error in WHRS(Load={},JW_pump={},RC_Superheat={},RC_Subcool={},ORC_Superheat={},ORC_Subcool={},ORC_Pump={},P_chamber={})'.format(Load,JW_pump,
                               RC_Superheat,RC_Subcool,
                               ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber))
             raise
-        return self._targetOutput(WHRS_cycle_output,CO2_red,EPC)
+        if profiler!=None:
+            self._addIterationStats(profiler.diff(before),start)
+        outputs=(WHRS_cycle_output,CO2_red,EPC)
+        target=self._rankOutputs(*outputs)
+        self._recordOutputs(inputs,outputs,target,time.time()-simStart)
+        return outputs
+    
+    def _newPool(self,nJobs,parallel):
+        """
+        Pool of nJobs threads or processes (parallel='thread' or 'process')
+        for _evaluateBatch. Each process has a copy of WHRSObject
+        """
+        if parallel=='thread':
+            return ThreadPoolExecutor(nJobs)
+        return ProcessPoolExecutor(nJobs,initializer=_initWorker,initargs=(self.WHRSObject,self.fluid))
+    
+    def _evaluateBatch(self,inputs,pool):
+        """
+        Outputs of each element of inputs (lists of the 8 inputs) evaluated
+        concurrently in pool (see _newPool). With processes the evaluations
+        are not profiled
+        """
+        if isinstance(pool,ThreadPoolExecutor):
+            return list(pool.map(lambda x:self._evaluateOutputs(x,reentrant=True),inputs))
+        outputs=[self._replayOutputs(x) for x in inputs]
+        new=[i for i in range(len(inputs)) if outputs[i]==None]
+        seconds={}
+        for (i,(out,sec)) in zip(new,pool.map(_evaluateWorker,[inputs[i] for i in new])):
+            outputs[i]=out
+            seconds[i]=sec
+        for i in range(len(inputs)):
+            target=self._rankOutputs(*outputs[i])
+            if i in seconds:
+                self._recordOutputs(inputs[i],outputs[i],target,seconds[i])
+        return outputs
+    
+    def _runConfig(self):
+        """
+        Dict with all that the evaluations of maximize depend on (see
+        getRunId), the child classes add their params
+        """
+        return {'optimizer':type(self).__name__,'RankModel':[float(w) for w in self.RankModel],
+                'RS':self.RS,'model':self.WHRSObject.getModelKey(self.fluid),
+                'bounds':sorted((name,[float(v) for v in bounds]) for name,bounds in self.pbounds.items()),
+                'fixedLoad':self.fixedLoad}
+    
+    def getRunId(self):
+        """
+        Id of the run in the ledger: runId or a hash of _runConfig (the
+        same optimizer with the same configuration has the same id)
+        """
+        if self.runId!=None:
+            return self.runId
+        return hashlib.sha1(json.dumps(self._runConfig(),sort_keys=True,default=repr).encode()).hexdigest()[:16]
+    
+    def _replayOutputs(self,inputs):
+        """
+        Outputs of inputs stored in the ledger for the run (each one is
+        returned once) or None
+        """
+        if len(self.replay)==0:
+            return None
+        key=tuple(float(v) for v in inputs)
+        with self.ledgerLock:
+            stored=self.replay.get(key)
+            if stored==None:
+                return None
+            outputs=stored.pop(0)
+            if len(stored)==0:
+                del self.replay[key]
+            self.replayed=self.replayed+1
+        if self.archive!=None:
+            self.archive.add(inputs,outputs,self.WHRSObject.getFluidCode(self.fluid))
+        return outputs
+    
+    def _recordOutputs(self,inputs,outputs,target,seconds):
+        """
+        Stores an evaluation in the archive and the ledger (if they exist)
+        """
+        if self.archive!=None:
+            self.archive.add(inputs,outputs,self.WHRSObject.getFluidCode(self.fluid))
+        if self.ledger==None:
+            return
+        with self.ledgerLock:
+            seq=self.seq
+            self.seq=self.seq+1
+        self.ledger.record(self.runIdUsed,seq,self.WHRSObject.getFluidCode(self.fluid),
+                           inputs,outputs,target,seconds)
+    
+    def _startLedger(self):
+        """
+        Loads the evaluations of the run stored in the ledger to be replayed
+        """
+        self.replay={}
+        self.replayed=0
+        self.seq=0
+        if self.ledger==None:
+            return
+        self.runIdUsed=self.getRunId()
+        stored=self.ledger.getRun(self.runIdUsed)
+        for (inputs,outputs,_,_) in stored:
+            self.replay.setdefault(tuple(inputs),[]).append(tuple(outputs))
+        self.seq=len(stored)
+        if len(stored)>0:
+            print('Ledger {}: {} evaluations of run {} are replayed'.format(self.ledger.fileName,len(stored),self.runIdUsed))
+    
+    def getReplayed(self):
+        """
+        Number of evaluations of the last maximize taken from the ledger
+        """
+        return self.replayed
+    
+    def _rankOutputs(self,WHRS_cycle_output,CO2_red,EPC):
+        """
+        Target value of the outputs of an evaluation, it is added to the trace
+        (for the evaluations made out of rankF, ex: in other processes)
+        """
+        target=self._targetOutput(WHRS_cycle_output,CO2_red,EPC)
+        if self.startTime!=None:
+            self.trace.append((time.time()-self.startTime,target))
+        return target
+    
+    def _addIterationStats(self,stats,start):
+        """
+        Stores the profile of an iteration with the time of the optimizer
+        (from the end of the last evaluation)
+        """
+        end=time.time()
+        stats['time iteration']=end-start
+        if self.lastIterationEnd!=None:
+            stats['time optimizer']=start-self.lastIterationEnd
+        self.lastIterationEnd=end
+        self.iterationStats.append(stats)
+    
+    def getTrace(self):
+        """
+        Returns a list with a tuple (seconds from the begining of maximize,
+        target value) for each evaluation of the last maximize
+        """
+        return self.trace
+    
+    def getIterationStats(self):
+        """
+        Returns a list with the profile of each iteration of the last
+        maximize: a dict with the time and calls of the frames, the counters
+        and the hits and misses of the caches of the evaluation (see
+        WHRSProfiler.snapshot), 'time iteration' and 'time optimizer'.
+        Empty if WHRSObject was built without Profile
+        """
+        return self.iterationStats
+    
+    def saveIterationStats(self,fileName):
+        """
+        Saves getIterationStats in fileName as JSON
+        """
+        with open(fileName,'wt') as f:
+            json.dump(self.iterationStats,f,indent=1)
     
     def _targetOutput(self,WHRS_cycle_output,CO2_red,EPC):
         return WHRS_cycle_output*self.RankModel[0]+CO2_red*self.RankModel[1]+EPC*self.RankModel[2]
@@ -101,7 +342,7 @@ class WHRSOptimizerBase:
         # Max outputs
         (WHRS_cycle_output,CO2_red,EPC)=self.WHRSObject(Load,JW_pump,
                           RC_Superheat,RC_Subcool,
-                          ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)
+                          ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,self.fluid)
         self.WHRS_cycle_output=WHRS_cycle_output
         self.CO2_red=CO2_red
         self.EPC=EPC
@@ -121,9 +362,16 @@ class WHRSOptimizerBase:
         return self.optTime
     
     def maximize(self):
+        self.iterationStats=[]
+        self.lastIterationEnd=None
+        self.trace=[]
+        self._startLedger()
         tst=time.time()
+        self.startTime=tst
         vret=self._maximize()
         self.optTime=time.time()-tst
+        self.startTime=None
+        self.replay={}
         return vret
     
     # To be define in child classes
@@ -4,13 +4,19 @@
 @author: quevedo
 """
 
-from skopt import gp_minimize
+import numpy as np
+from skopt import gp_minimize,Optimizer
+from sklearn.utils import check_random_state
+from skopt.utils import cook_estimator,normalize_dimensions
+from sklearn.gaussian_process.kernels import Sum,WhiteKernel
 from WHRSOptimizer.WHRSOptimizerBase import WHRSOptimizerBase
 import matplotlib.pyplot as plt
 
 class WHRSskoptBayesian(WHRSOptimizerBase):
     
-    def __init__(self,WHRSObject,RankModel,RS=2480,nIter=100,initRandP=10):
+    def __init__(self,WHRSObject,RankModel,RS=2480,nIter=100,initRandP=10,fluid=None,
+                 batchSize=1,nJobs=None,parallel='thread',strategy='cl_min',
+                 x0=None,y0=None,kernel=None,ledger=None,runId=None,archive=None):
         """
         Params:
             WHRSObject : see WHRSOptimizerBase.__init__
@@ -21,19 +27,64 @@ class WHRSskoptBayesian(WHRSOptimizerBase):
             initRandP  : Number of random points to initialize the BO.
                          Default=10
                          
-            The number of total iterations will be initRandP+nIter
+            fluid      : see WHRSOptimizerBase.__init__
+            batchSize  : points proposed in each round of the BO (ask/tell
+                         with skopt.Optimizer), they are evaluated
+                         concurrently. If 1 the BO is gp_minimize.
+                         Default=1
+            nJobs      : concurrent evaluations of a round.
+                         Default=None (batchSize)
+            parallel   : possible values: 'thread','process'
+                         'thread'  : the evaluations share WHRSObject
+                                     (and its caches)
+                         'process' : each process has a copy of WHRSObject,
+                                     the evaluations are not profiled
+                         Default='thread'
+            strategy   : how the points of a round are proposed, see
+                         skopt.Optimizer.ask ('cl_min','cl_mean','cl_max':
+                         constant liar).
+                         Default='cl_min'
+            x0         : prior points, list of inputs [Load,JW_pump,...,
+                         P_chamber] (ex: getWarmStart of the optimizer of
+                         an adjacent Load interval). The points out of the
+                         bounds are moved into them (Load=fixed Load if it
+                         is fixed) and evaluated.
+                         Default=None
+            y0         : rank values of x0, used for the points inside the
+                         bounds (the others are evaluated).
+                         Default=None (all the points are evaluated)
+            kernel     : initial hyperparameters of the GP, a kernel fitted
+                         by other optimizer (see getKernel). It is ignored
+                         if its dimensions are not the ones of the BO.
+                         Default=None (the ones of gp_minimize)
+            ledger     : see WHRSOptimizerBase.__init__
+            runId      : see WHRSOptimizerBase.__init__
+            archive    : see WHRSOptimizerBase.__init__
+                         
+            The number of total iterations will be initRandP+nIter, the
+            evaluated points of x0 are counted in them
         """
         # Call to father constructor 
-        WHRSOptimizerBase.__init__(self,WHRSObject,RankModel,RS)
+        WHRSOptimizerBase.__init__(self,WHRSObject,RankModel,RS,fluid,ledger,runId,archive)
         
         # Params
         self.nIter=nIter
         self.initRandP=initRandP
+        if parallel not in ('thread','process'):
+            raise Exception('WHRSskoptBayesian: parallel={} is not valid'.format(parallel))
+        self.batchSize=batchSize
+        self.nJobs=nJobs if nJobs!=None else batchSize
+        self.parallel=parallel
+        self.strategy=strategy
+        self.x0=x0
+        self.y0=y0
+        self.kernel=kernel
         
         self.eps=1e-10
         
         # Model
         self.optimizer=None
+        self.nPrior=0 # Points of x0
         
         # Debug
         # self.iter=0
@@ -79,7 +130,19 @@ class WHRSskoptBayesian(WHRSOptimizerBase):
             pbounds[6]=self.pbounds['P_chamber']
             
         
-        res=gp_minimize(minFself,pbounds,n_calls=self.nIter+self.initRandP,n_initial_points=self.initRandP,random_state=2480)
+        (X0,Y0,nEvaluated)=self._priorPoints(minFself,pbounds)
+        nCalls=self.nIter+self.initRandP-nEvaluated
+        if nCalls<0 or (nCalls==0 and len(X0)==0):
+            raise Exception('WHRSskoptBayesian: the evaluations of x0 ({}) exceed initRandP+nIter'.format(nEvaluated))
+        
+        rng=check_random_state(self.RS)
+        space=normalize_dimensions(pbounds)
+        estimator=self._buildEstimator(space,rng)
+        if self.batchSize==1:
+            res=gp_minimize(minFself,pbounds,n_calls=nCalls,n_initial_points=self.initRandP,random_state=rng,
+                            base_estimator=estimator,x0=X0 if len(X0)>0 else None,y0=Y0 if len(X0)>0 else None)
+        else:
+            res=self._maximizeBatch(minFself,space,estimator,rng,X0,Y0,nCalls)
         
         if self.fixedLoad==None:
             self.setMaxValues(res.x[0],res.x[1],res.x[2],res.x[3],res.x[4],res.x[5],res.x[6],res.x[7])
@@ -92,22 +155,134 @@ class WHRSskoptBayesian(WHRSOptimizerBase):
         self.optimizer=res
         return res
 
+    def _runConfig(self):
+        config=WHRSOptimizerBase._runConfig(self)
+        config.update({'nIter':self.nIter,'initRandP':self.initRandP,'batchSize':self.batchSize,
+                       'strategy':self.strategy,'x0':self.x0,'y0':self.y0,
+                       'kernel':repr(self.kernel) if self.kernel!=None else None})
+        return config
+
+    def _buildEstimator(self,space,rng):
+        """
+        GP of gp_minimize (with the hyperparameters of kernel as initial
+        values)
+        """
+        estimator=cook_estimator('GP',space=space,random_state=rng.randint(0,np.iinfo(np.int32).max),
+                                 noise='gaussian')
+        if self.kernel!=None and len(self.kernel.theta)==len(estimator.kernel.theta):
+            estimator.set_params(kernel=self.kernel) # Not if the Load is fixed only in one of them
+        return estimator
+
+    def _priorPoints(self,minFself,pbounds):
+        """
+        Points of x0 in the space of the BO. Returns (X0,Y0,number of
+        evaluated points), Y0 are the values of minFself
+        """
+        self.nPrior=0
+        if self.x0==None or len(self.x0)==0:
+            return ([],[],0)
+        X0=[]
+        Y0=[]
+        nEvaluated=0
+        for i in range(len(self.x0)):
+            x=list(self.x0[i])
+            if self.fixedLoad!=None:
+                inside=(x[0]==self.fixedLoad)
+                x=x[1:]
+            else:
+                inside=True
+            clipped=[min(max(x[j],pbounds[j][0]),pbounds[j][1]) for j in range(len(x))]
+            inside=inside and clipped==x
+            X0.append(clipped)
+            if inside and self.y0!=None:
+                Y0.append(-self.y0[i])
+            else:
+                Y0.append(minFself(clipped))
+                nEvaluated=nEvaluated+1
+        self.nPrior=len(X0)
+        return (X0,Y0,nEvaluated)
+
+    def _maximizeBatch(self,minFself,space,estimator,rng,X0,Y0,nCalls):
+        """
+        BO with rounds of batchSize points (the last one can be smaller)
+        evaluated concurrently. The optimizer is built like gp_minimize's.
+        Returns the result of the last round (like gp_minimize)
+        """
+        optimizer=Optimizer(space,estimator,n_initial_points=self.initRandP+len(X0),acq_func='gp_hedge',
+                            acq_optimizer='auto',random_state=rng,
+                            acq_func_kwargs={'xi':0.01,'kappa':1.96},
+                            acq_optimizer_kwargs={'n_points':10000,'n_restarts_optimizer':5,'n_jobs':1})
+        pool=self._newPool(self.nJobs,self.parallel)
+        try:
+            res=optimizer.tell(X0,Y0) if len(X0)>0 else None
+            remaining=nCalls
+            while remaining>0:
+                q=min(self.batchSize,remaining)
+                if q==1:
+                    X=[optimizer.ask()] # As gp_minimize
+                else:
+                    X=optimizer.ask(n_points=q,strategy=self.strategy)
+                if self.parallel=='thread':
+                    Y=list(pool.map(minFself,X))
+                else:
+                    inputs=[x if self.fixedLoad==None else [self.fixedLoad]+x for x in X]
+                    Y=[-self._targetOutput(*outputs) for outputs in self._evaluateBatch(inputs,pool)]
+                res=optimizer.tell(X,Y)
+                remaining=remaining-len(X)
+        finally:
+            pool.shutdown()
+        return res
+
+    def getEvaluations(self):
+        """
+        Returns (X,y) of the last maximize: the inputs [Load,JW_pump,...,
+        P_chamber] and the rank value of each evaluation (with x0)
+        """
+        X=[list(x) if self.fixedLoad==None else [self.fixedLoad]+list(x) for x in self.optimizer.x_iters]
+        y=[-v for v in self.optimizer.func_vals]
+        return (X,y)
+
+    def getKernel(self):
+        """
+        Kernel of the last GP fitted by maximize without the noise term,
+        None if no GP was fitted
+        """
+        if self.optimizer==None or len(self.optimizer.models)==0:
+            return None
+        kernel=self.optimizer.models[-1].kernel_
+        if isinstance(kernel,Sum) and isinstance(kernel.k2,WhiteKernel):
+            kernel=kernel.k1
+        return kernel
+
+    def getWarmStart(self,nPoints=5,kernel=True,LoadShift=0):
+        """
+        Returns the params x0, y0 (the nPoints best evaluations) and kernel
+        (if kernel) to warm start another optimizer, ex: of the next Load
+        interval:
+            opt2=WHRSskoptBayesian(WHRSObj,W,initRandP=0,**opt.getWarmStart(LoadShift=5))
+        LoadShift is added to the Load of the points (the distance between
+        the Load intervals), y0 is kept only if it is 0
+        """
+        (X,y)=self.getEvaluations()
+        best=np.argsort(y)[::-1][:nPoints]
+        warm={'x0':[[X[i][0]+LoadShift]+X[i][1:] for i in best],
+              'y0':[y[i] for i in best] if LoadShift==0 else None}
+        if kernel:
+            warm['kernel']=self.getKernel()
+        return warm
+
     def _plotOpt(self,fsave=None):
-        randTarget=[None]*self.initRandP
-        bayeTarget=[None]*self.nIter
-        for i in range(self.initRandP):
-            randTarget[i]=-self.optimizer.func_vals[i]
-        for i in range(self.nIter):
-            bayeTarget[i]=-self.optimizer.func_vals[i+self.initRandP]
-        plt.plot(list(range(1,self.initRandP+1)),randTarget,label='random search',linestyle='',marker='.')
-        plt.plot(list(range(self.initRandP+1,self.initRandP+self.nIter+1)),bayeTarget,label='bayesian search')
+        nRand=min(self.initRandP,len(self.optimizer.func_vals)-self.nPrior)
+        target=[-v for v in self.optimizer.func_vals]
+        X=list(range(1,len(target)+1))
+        if self.nPrior>0:
+            plt.plot(X[:self.nPrior],target[:self.nPrior],label='prior points',linestyle='',marker='x')
+        if nRand>0:
+            plt.plot(X[self.nPrior:self.nPrior+nRand],target[self.nPrior:self.nPrior+nRand],label='random search',linestyle='',marker='.')
+        plt.plot(X[self.nPrior+nRand:],target[self.nPrior+nRand:],label='bayesian search')
         plt.legend(loc='lower right')
         plt.xlabel('Iterations')
         plt.ylabel('Rank value')
         if fsave!=None:
             plt.savefig(fsave,dpi=300)
         plt.show()
-        
-        
-        
-    
\ No newline at end of file
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiler of the evaluations of WHRS
+
+@author: quevedo
+"""
+
+import json
+import threading
+import time
+
+class WHRSProfiler:
+    """
+    Wall time and counters of the WHRS evaluations (see WHRS Profile param).
+    The time is accumulated by stack of frames, ex:
+        ('evaluate','RC','Stage RC','CoolProp')
+    with the number of calls, the total time and the self time (without the
+    frames inside). The top frames of an evaluation are its sections
+    (Inputs, Desalination, RC, ORC, TEG, Seawater, Performance), the stages
+    and the CoolProp calculations are inside them.
+    The counters are named values, ex: the property calls of each call site.
+    cacheStats is a function that returns the stats of the caches, they are
+    added to getStats and snapshot.
+    The frames of each thread are kept apart.
+    """
+    def __init__(self,cacheStats=None):
+        """
+        Params:
+            cacheStats : function without params that returns a dict
+                         {cache name: dict with its hits and misses}.
+                         Default=None (no caches)
+        """
+        # Params
+        self.cacheStats=cacheStats
+
+        # Model
+        self.clock=time.perf_counter
+        self.lock=threading.Lock()
+        self.threadLocal=threading.local()
+        self.reset()
+
+    def __getstate__(self):
+        state=self.__dict__.copy()
+        del state['clock'],state['lock'],state['threadLocal']
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self.clock=time.perf_counter
+        self.lock=threading.Lock()
+        self.threadLocal=threading.local()
+
+    def reset(self):
+        """
+        Removes the times and counters
+        """
+        with self.lock:
+            self.stackTimes={} # stack -> [calls,time,selfTime]
+            self.counters={}
+
+    def _stack(self):
+        return self.threadLocal.__dict__.setdefault('stack',[])
+
+    def push(self,name,section=False):
+        """
+        Opens the frame name. Returns the depth before it (see popTo)
+        """
+        stack=self._stack()
+        stack.append([name,self.clock(),0.0,section]) # name,start,time of the frames inside,section
+        return len(stack)-1
+
+    def pop(self):
+        """
+        Closes the last frame
+        """
+        end=self.clock()
+        stack=self._stack()
+        (_,start,inside,_)=stack[-1]
+        key=tuple(frame[0] for frame in stack)
+        stack.pop()
+        elapsed=end-start
+        with self.lock:
+            entry=self.stackTimes.get(key)
+            if entry==None:
+                entry=self.stackTimes[key]=[0,0.0,0.0]
+            entry[0]=entry[0]+1
+            entry[1]=entry[1]+elapsed
+            entry[2]=entry[2]+elapsed-inside
+        if len(stack)>0:
+            stack[-1][2]=stack[-1][2]+elapsed
+
+    def popTo(self,depth):
+        """
+        Closes the frames until depth frames are open (ex: after an exception)
+        """
+        stack=self._stack()
+        while len(stack)>depth:
+            self.pop()
+
+    def section(self,name):
+        """
+        Closes the current section (if it is open) and opens the section name
+        (None: only closes)
+        """
+        stack=self._stack()
+        if len(stack)>0 and stack[-1][3]:
+            self.pop()
+        if name!=None:
+            self.push(name,section=True)
+
+    def count(self,name,n=1):
+        with self.lock:
+            self.counters[name]=self.counters.get(name,0)+n
+
+    def getStats(self):
+        """
+        Returns a dict (it can be saved as JSON) with:
+            'frames'   : {'frame/frame/...': {'calls','time','selfTime'}} (s)
+            'counters' : {name: value}
+            'caches'   : stats of the caches (see cacheStats)
+        """
+        with self.lock:
+            frames={'/'.join(key):{'calls':entry[0],'time':entry[1],'selfTime':entry[2]}
+                    for key,entry in sorted(self.stackTimes.items())}
+            counters=dict(sorted(self.counters.items()))
+        stats={'frames':frames,'counters':counters}
+        if self.cacheStats!=None:
+            stats['caches']=self.cacheStats()
+        return stats
+
+    def snapshot(self):
+        """
+        Returns a flat dict {name: value} with the time and calls of each
+        frame, the counters and the hits and misses of the caches. The
+        difference of two snapshots (see diff) are the stats of the
+        evaluations between them
+        """
+        stats=self.getStats()
+        flat={}
+        for name,entry in stats['frames'].items():
+            flat['time '+name]=entry['time']
+            flat['calls '+name]=entry['calls']
+        flat.update(stats['counters'])
+        for cache,cacheStats in stats.get('caches',{}).items():
+            if cacheStats!=None:
+                flat['hits '+cache]=cacheStats['hits']
+                flat['misses '+cache]=cacheStats['misses']
+        return flat
+
+    def diff(self,before):
+        """
+        Returns the snapshot of now minus the snapshot before, without the
+        values that did not change
+        """
+        now=self.snapshot()
+        delta={}
+        for name,v in now.items():
+            d=v-before.get(name,0)
+            if d!=0:
+                delta[name]=d
+        return delta
+
+    def saveJSON(self,fileName):
+        """
+        Saves getStats in fileName as JSON
+        """
+        with open(fileName,'wt') as f:
+            json.dump(self.getStats(),f,indent=1)
+
+    def saveSpeedscope(self,fileName,name='WHRS'):
+        """
+        Saves the frames in fileName as a speedscope sampled profile
+        (https://www.speedscope.app), a sample per stack weighted by its self
+        time
+        """
+        with self.lock:
+            items=sorted(self.stackTimes.items())
+        frames=[]
+        frameIndex={}
+        samples=[]
+        weights=[]
+        for key,entry in items:
+            sample=[]
+            for frame in key:
+                if frame not in frameIndex:
+                    frameIndex[frame]=len(frames)
+                    frames.append({'name':frame})
+                sample.append(frameIndex[frame])
+            samples.append(sample)
+            weights.append(entry[2])
+        profile={'$schema':'https://www.speedscope.app/file-format-schema.json',
+                 'name':name,'exporter':'WHRSProfiler',
+                 'shared':{'frames':frames},
+                 'profiles':[{'type':'sampled','name':name,'unit':'seconds',
+                              'startValue':0,'endValue':sum(weights),
+                              'samples':samples,'weights':weights}]}
+        with open(fileName,'wt') as f:
+            json.dump(profile,f)
+
+    def saveCollapsed(self,fileName):
+        """
+        Saves the frames in fileName as collapsed stacks ('frame;frame;... self
+        time in microseconds' per line), the input of flamegraph.pl and
+        speedscope
+        """
+        with self.lock:
+            items=sorted(self.stackTimes.items())
+        with open(fileName,'wt') as f:
+            for key,entry in items:
+                f.write('{} {}\n'.format(';'.join(key),int(round(entry[2]*1e6))))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Time-to-solution of the WHRS optimizers.
+Runs each optimizer (backend, nIter, initRandP) over several seeds, fluids
+and load intervals, records the best rank value so far against the number
+of evaluations and the wall time and summarizes the evaluations and the
+time needed to get within a tolerance (Default: 0.5%) of the best known
+value (the best of all the runs of the same fluid and load interval).
+
+Ex: python benchmarkOptimizers.py --configs 20:1 20:5 50:10 --seeds 5
+    python benchmarkOptimizers.py --backends skopt --fluids 14 --loads 60 80 100
+
+Outputs (prefix --out):
+    <out>_trace.csv   : an evaluation per row with its best value so far
+    <out>_summary.csv : a row per optimizer, fluid and load interval
+
+@author: quevedo
+"""
+
+import argparse
+import csv
+import statistics
+import time
+import warnings
+from WHRS import WHRS
+from expertsModel import getFileModel,readRankModel
+
+warnings.filterwarnings("ignore")
+
+def getBackends():
+    """
+    Returns a dict {name: optimizer class} of the installed backends
+    """
+    backends={}
+    try:
+        from WHRSOptimizer.WHRSskoptBayesian import WHRSskoptBayesian
+        backends['skopt']=WHRSskoptBayesian
+    except ImportError:
+        pass
+    try:
+        from WHRSOptimizer.WHRSBayesianOpt import WHRSBayesianOpt
+        backends['bayes_opt']=WHRSBayesianOpt
+    except ImportError:
+        pass
+    return backends
+
+def runOptimizer(OptClass,RankModel,nIter,initRandP,fluid,LoadInterval,seed):
+    """
+    Runs an optimization with a new WHRS object (the evaluations are not
+    stored in a file, so all the runs simulate them). Returns the trace: a
+    list of (seconds,target) for each evaluation
+    """
+    WHRSObj=WHRS(PropsSIStore='memory',ResultStore='memory')
+    WHRSObj.params_range['Load']=LoadInterval
+    opt=OptClass(WHRSObj,RankModel,RS=seed,nIter=nIter,initRandP=initRandP,fluid=fluid)
+    opt.maximize()
+    return opt.getTrace()
+
+def bestSoFar(trace):
+    best=[]
+    for (_,target) in trace:
+        best.append(target if len(best)==0 else max(best[-1],target))
+    return best
+
+def timeToSolution(trace,best,bestKnown,tol):
+    """
+    Returns (evaluations,seconds) until the best value so far is within tol
+    (relative) of bestKnown or (None,None) if it is not reached
+    """
+    limit=bestKnown-tol*abs(bestKnown)
+    for i in range(len(trace)):
+        if best[i]>=limit:
+            return (i+1,trace[i][0])
+    return (None,None)
+
+def _median(values):
+    values=[v for v in values if v!=None]
+    return statistics.median(values) if len(values)>0 else None
+
+def _fmt(v,spec):
+    return format(v,spec) if v!=None else '-'
+
+#%% Main
+def main():
+    parser=argparse.ArgumentParser(description='Time-to-solution of the WHRS optimizers')
+    parser.add_argument('--backends',nargs='+',default=None,
+                        help='Optimizers: skopt, bayes_opt. Default: the installed ones')
+    parser.add_argument('--configs',nargs='+',default=['20:1','20:5','50:10'],
+                        help='nIter:initRandP of each optimizer. Default: 20:1 20:5 50:10')
+    parser.add_argument('--seeds',type=int,default=3,help='Seeds (2480, 2481, ...) of each run. Default: 3')
+    parser.add_argument('--fluids',type=int,nargs='+',default=[6,14,15],help='Fluid Ids. Default: 6 14 15')
+    parser.add_argument('--loads',type=float,nargs='+',default=[60,80,100],
+                        help='Centers of the load intervals. Default: 60 80 100')
+    parser.add_argument('--loadWidth',type=float,default=5,
+                        help='Width of the load intervals (0: fixed Load). Default: 5')
+    parser.add_argument('--tol',type=float,default=0.005,
+                        help='Relative distance to the best known value. Default: 0.005 (0.5%%)')
+    parser.add_argument('--model',default=getFileModel(),
+                        help='CSV file of the rank model (see learnRanking.py). Default: {}'.format(getFileModel()))
+    parser.add_argument('--out',default='optBenchmark',help='Prefix of the CSV files. Default: optBenchmark')
+    args=parser.parse_args()
+
+    installed=getBackends()
+    backends=args.backends if args.backends!=None else list(installed)
+    for backend in backends:
+        if backend not in installed:
+            parser.error('backend {} is not installed or does not exist'.format(backend))
+    configs=[tuple(int(v) for v in config.split(':')) for config in args.configs]
+    seeds=[2480+i for i in range(args.seeds)]
+    RankModel=readRankModel(args.model)
+
+    # Runs
+    runs=[] # (backend,nIter,initRandP,fluid,load,seed,trace,best)
+    total=len(backends)*len(configs)*len(args.fluids)*len(args.loads)*len(seeds)
+    start=time.time()
+    for backend in backends:
+        for (nIter,initRandP) in configs:
+            for fluid in args.fluids:
+                for load in args.loads:
+                    LoadInterval=[load-args.loadWidth/2,load+args.loadWidth/2]
+                    for seed in seeds:
+                        trace=runOptimizer(installed[backend],RankModel,nIter,initRandP,
+                                           fluid,LoadInterval,seed)
+                        runs.append((backend,nIter,initRandP,fluid,load,seed,trace,bestSoFar(trace)))
+                        print('{}/{} {} {}:{} fluid={} load={} seed={}: best={:.6f} in {:.1f} s'
+                              .format(len(runs),total,backend,nIter,initRandP,fluid,load,seed,
+                                      runs[-1][7][-1],trace[-1][0]))
+    print('Runs finished in {:.1f} s'.format(time.time()-start))
+
+    # Best known value of each fluid and load interval
+    bestKnown={}
+    for (_,_,_,fluid,load,_,_,best) in runs:
+        bestKnown[(fluid,load)]=max(bestKnown.get((fluid,load),best[-1]),best[-1])
+
+    with open('{}_trace.csv'.format(args.out),'wt') as f:
+        csvWriter=csv.writer(f,delimiter=',',quoting=csv.QUOTE_MINIMAL)
+        csvWriter.writerow(['backend','nIter','initRandP','fluid','load','seed',
+                            'evaluation','seconds','target','best','gap'])
+        for (backend,nIter,initRandP,fluid,load,seed,trace,best) in runs:
+            ref=bestKnown[(fluid,load)]
+            for i in range(len(trace)):
+                csvWriter.writerow([backend,nIter,initRandP,fluid,load,seed,i+1,trace[i][0],
+                                    trace[i][1],best[i],(ref-best[i])/abs(ref)])
+
+    # Summary of each optimizer, fluid and load interval (medians of the seeds)
+    groups={}
+    for run in runs:
+        groups.setdefault(run[:5],[]).append(run)
+    header=['backend','nIter','initRandP','fluid','load','reached','evaluations','seconds','finalGap','totalSeconds']
+    rows=[]
+    for key,groupRuns in groups.items():
+        ref=bestKnown[(key[3],key[4])]
+        solutions=[timeToSolution(run[6],run[7],ref,args.tol) for run in groupRuns]
+        rows.append(list(key)+[
+            sum(1 for (n,_) in solutions if n!=None)/len(groupRuns),
+            _median([n for (n,_) in solutions]),
+            _median([t for (_,t) in solutions]),
+            _median([(ref-run[7][-1])/abs(ref) for run in groupRuns]),
+            _median([run[6][-1][0] for run in groupRuns])])
+    with open('{}_summary.csv'.format(args.out),'wt') as f:
+        csvWriter=csv.writer(f,delimiter=',',quoting=csv.QUOTE_MINIMAL)
+        csvWriter.writerow(header)
+        csvWriter.writerows(rows)
+
+    # Summary of each optimizer (all the fluids and load intervals)
+    print('\nWithin {:.2%} of the best known value (medians of fluids, loads and seeds)'.format(args.tol))
+    print('{:10} {:>6} {:>9} {:>8} {:>12} {:>10} {:>10} {:>10}'
+          .format('Backend','nIter','initRandP','Reached','Evaluations','Seconds','Final gap','Total s'))
+    for backend in backends:
+        for (nIter,initRandP) in configs:
+            optRows=[row for row in rows if row[0]==backend and row[1]==nIter and row[2]==initRandP]
+            print('{:10} {:6} {:9} {:>8} {:>12} {:>10} {:>10} {:>10}'
+                  .format(backend,nIter,initRandP,
+                          '{:.0%}'.format(statistics.mean(row[5] for row in optRows)),
+                          _fmt(_median([row[6] for row in optRows]),'.1f'),
+                          _fmt(_median([row[7] for row in optRows]),'.2f'),
+                          _fmt(_median([row[8] for row in optRows]),'.3%'),
+                          _fmt(_median([row[9] for row in optRows]),'.2f')))
+    print('Saved {0}_trace.csv and {0}_summary.csv'.format(args.out))
+
+if __name__=='__main__':
+    main()
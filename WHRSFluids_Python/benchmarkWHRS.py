@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the WHRS simulator, its caches, the ranking and the optimizers.
+Each case is run several rounds and its best time per call (the least
+disturbed by other processes, like timeit) is compared with a baseline stored as JSON. The program ends with exit code 1 if a case
+is slower than the baseline more than the threshold.
+
+Ex: python benchmarkWHRS.py --save              (stores the baseline)
+    python benchmarkWHRS.py                     (compares with the baseline)
+    python benchmarkWHRS.py --threshold 0.1 --cases PropsSI Rank
+    python benchmarkWHRS.py --full              (with the slow cases)
+
+@author: quevedo
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+import CoolProp
+from WHRS import WHRS
+from Rank import linearRank,CIndex
+from genWHRS import orderPairs
+from WHRSOptimizer.WHRSskoptBayesian import WHRSskoptBayesian
+
+inputNames=['Load','JW_pump','RC_Superheat','RC_Subcool',
+            'ORC_Superheat','ORC_Subcool','ORC_Pump','P_chamber']
+
+class Case:
+    """
+    Benchmark case: fun(state) is timed number times in each round, state is
+    built by setup() (not timed) at the begining of the round
+    """
+    def __init__(self,name,setup,fun,number=1,repeat=5,slow=False):
+        self.name=name
+        self.setup=setup
+        self.fun=fun
+        self.number=number
+        self.repeat=repeat
+        self.slow=slow
+
+    def run(self):
+        """
+        Returns the minimum of the time per call of the rounds (s)
+        """
+        times=[]
+        for _ in range(self.repeat):
+            state=self.setup()
+            start=time.perf_counter()
+            for _ in range(self.number):
+                self.fun(state)
+            times.append((time.perf_counter()-start)/self.number)
+        return min(times)
+
+#%% Cases
+def _point(seed=2480):
+    RG=random.Random()
+    RG.seed(seed)
+    prange=WHRS(PropsSIStore='none',ResultStore='none').params_range
+    return [RG.uniform(prange[name][0],prange[name][1]) for name in inputNames]
+
+def _evaluationCases(fluids):
+    x=_point()
+    cases=[]
+    for fluid in fluids:
+        def coldSetup():
+            return WHRS(PropsSIStore='none',ResultStore='none')
+        def coldFun(W,fluid=fluid):
+            W.clearStageCaches()
+            W.clearPropSICaches()
+            W(*x,fluid)
+        def warmSetup(fluid=fluid):
+            W=WHRS(PropsSIStore='memory',ResultStore='none')
+            W(*x,fluid)
+            return W
+        def warmFun(W,fluid=fluid):
+            W.clearStageCaches() # All the PropsSI calls are stored
+            W(*x,fluid)
+        cases.append(Case('WHRS call cold fluid {}'.format(fluid),coldSetup,coldFun,number=3))
+        cases.append(Case('WHRS call warm fluid {}'.format(fluid),warmSetup,warmFun,number=20))
+    return cases
+
+def _propsSICases():
+    def hitSetup():
+        W=WHRS(PropsSIStore='memory',ResultStore='none')
+        W._py_CoolProp_CoolProp_PropsSI('H','T',350.0,'P',2e5,'Water')
+        return W
+    def hitFun(W):
+        W._py_CoolProp_CoolProp_PropsSI('H','T',350.0,'P',2e5,'Water')
+    def missSetup():
+        return [WHRS(PropsSIStore='memory',ResultStore='none'),350.0]
+    def missFun(state):
+        state[1]=state[1]+1e-6 # A new call
+        state[0]._py_CoolProp_CoolProp_PropsSI('H','T',state[1],'P',2e5,'Water')
+    return [Case('PropsSI hit',hitSetup,hitFun,number=10000),
+            Case('PropsSI miss',missSetup,missFun,number=200)]
+
+def _rankCases():
+    cases=[]
+    for nPairs in (100,1000,5000):
+        def fitSetup(nPairs=nPairs):
+            rs=np.random.RandomState(2480)
+            X=rs.rand(2*nPairs,3).tolist()
+            Y=[]
+            for q in range(nPairs):
+                vA=int(rs.rand()<0.5)
+                Y.append([vA,q])
+                Y.append([1-vA,q])
+            return (X,Y)
+        cases.append(Case('Rank fit {} pairs'.format(nPairs),fitSetup,
+                          lambda XY:linearRank().fit(XY[0],XY[1]),repeat=3))
+    for nExamples in (100,300,1000):
+        def cIndexSetup(nExamples=nExamples):
+            rs=np.random.RandomState(2480)
+            return (rs.rand(nExamples).tolist(),rs.rand(nExamples).tolist())
+        cases.append(Case('CIndex {} examples'.format(nExamples),cIndexSetup,
+                          lambda YP:CIndex(YP[0],YP[1]),repeat=3))
+    return cases
+
+def _pairCases():
+    cases=[]
+    for NO in (500,2000,10000):
+        def pairSetup(NO=NO):
+            rs=np.random.RandomState(2480)
+            return [tuple(t) for t in rs.rand(NO,3).tolist()]
+        cases.append(Case('genWHRS orderPairs NO={}'.format(NO),pairSetup,
+                          lambda OTuples:orderPairs(OTuples,verbose=0),repeat=3,slow=NO>2000))
+    return cases
+
+def _optimizerCases():
+    def optSetup():
+        W=WHRS(PropsSIStore='memory',ResultStore='memory')
+        W.params_range['Load']=[75,75]
+        opt=WHRSskoptBayesian(W,[1,0.5,-0.1],nIter=1,initRandP=5,fluid=14)
+        opt.maximize() # The evaluations are stored (in memory), the time is the optimizer's
+        return opt
+    return [Case('skopt maximize 5 random + 1 iteration',optSetup,lambda opt:opt.maximize(),repeat=3)]
+
+def getCases(fluids):
+    return _evaluationCases(fluids)+_propsSICases()+_rankCases()+_pairCases()+_optimizerCases()
+
+#%% Main
+def main():
+    parser=argparse.ArgumentParser(description='Benchmarks of WHRS')
+    parser.add_argument('--baseline',default='benchmarkBaseline.json',
+                        help='JSON file with the baseline times. Default: benchmarkBaseline.json')
+    parser.add_argument('--save',action='store_true',
+                        help='Stores the times of the run cases in the baseline')
+    parser.add_argument('--threshold',type=float,default=0.25,
+                        help='Maximum relative slowdown allowed. Default: 0.25 (25%%)')
+    parser.add_argument('--cases',nargs='+',default=None,
+                        help='Runs only the cases whose name contains one of these strings')
+    parser.add_argument('--fluids',type=int,nargs='+',default=None,
+                        help='Fluids of the WHRS call cases. Default: all')
+    parser.add_argument('--full',action='store_true',help='Runs the slow cases too')
+    args=parser.parse_args()
+
+    fluids=args.fluids if args.fluids!=None else list(range(len(WHRS(PropsSIStore='none').FluidNameCode)))
+    cases=[case for case in getCases(fluids)
+           if (args.full or not case.slow) and
+              (args.cases==None or any(name in case.name for name in args.cases))]
+
+    baseline={'cases':{}}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baseline=json.load(f)
+
+    failed=[]
+    print('{:45} {:>12} {:>12} {:>8}'.format('Case','Time (ms)','Base (ms)','Ratio'))
+    for case in cases:
+        t=case.run()
+        base=baseline['cases'].get(case.name)
+        if base==None:
+            print('{:45} {:12.4f} {:>12} {:>8}'.format(case.name,t*1e3,'-','-'))
+        else:
+            ratio=t/base
+            slow=ratio>1+args.threshold
+            if slow:
+                failed.append(case.name)
+            print('{:45} {:12.4f} {:12.4f} {:8.2f}{}'.format(case.name,t*1e3,base*1e3,ratio,' SLOWER' if slow else ''))
+        if args.save:
+            baseline['cases'][case.name]=t
+
+    if args.save:
+        baseline['python']=platform.python_version()
+        baseline['CoolProp']=CoolProp.__version__
+        baseline['machine']=platform.node()
+        with open(args.baseline,'wt') as f:
+            json.dump(baseline,f,indent=1,sort_keys=True)
+        print('Baseline saved in {}'.format(args.baseline))
+    elif len(failed)>0:
+        print('{} cases are slower than the baseline (threshold {:.0%}): {}'
+              .format(len(failed),args.threshold,', '.join(failed)))
+        sys.exit(1)
+
+if __name__=='__main__':
+    main()
@@ -5,6 +5,8 @@
 @author: quevedo
 """
 
+import csv
+
 def getExperts():
     experts=[('ALFONSO',2480),('NOELIA',2481),('RUBEN',2482)]
     return experts
@@ -20,4 +22,16 @@ def expNames(experts):
 
 
 def getFileModel():
-    return 'rankModel{}.csv'.format(expNames(getExperts()))
\ No newline at end of file
+    return 'rankModel{}.csv'.format(expNames(getExperts()))
+
+
+
+def readRankModel(fileModel):
+    """
+    Returns the weights of the rank model stored in fileModel (see
+    learnRanking.py)
+    """
+    with open(fileModel,'rt') as f:
+        csvReader=csv.reader(f,delimiter=',')
+        csvReader.__next__() # header
+        return [float(w) for w in csvReader.__next__()]
@@ -6,6 +6,7 @@
 
 import random
 import csv
+import numpy as np
 from sklearn.cluster import MiniBatchKMeans
 from WHRS import WHRS
 
@@ -14,11 +15,7 @@ LoadRange=[60,100] # Modified Load range
 NO=500             # Number of output tuples
 EP=50              # Number of pairs to be ordered by (expert) user
 seed=2480          # Seed for random values
-
-# WHRS Generator
-rs=WHRS()
-# prange=rs.params_range
-rs.params_range['Load']=LoadRange
+UP=2**17           # Max number of pairs (a uniform sample) to select the EP pairs
 
 def betterOutput(tA,tB):
     """
@@ -61,66 +58,124 @@ def genRandomInput(RG,prange):
     return (Load,JW_pump,
      RC_Superheat,RC_Subcool,
      ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluid)
-#%% Generating output tuples
-RG=random.Random()
-RG.seed(seed)
-
-rs=WHRS()
-OTuples=[None]*NO
-print('Generating {} output tuples'.format(NO))
-# _BestRankVal=0
-for it in range(NO):
-    (Load,JW_pump,
-     RC_Superheat,RC_Subcool,
-     ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluidId)=genRandomInput(RG,rs.params_range)
-    rs.setDefaultFluid(fluidId)
-    t=rs(Load,JW_pump,
-          RC_Superheat,RC_Subcool,
-          ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)
-    # _RankVal=t[0]*2.62320416454897+t[1]*1.13926897697577+t[2]*(-0.179630751811639)
-    # if _RankVal>_BestRankVal:
-        # print('Params',Load,JW_pump,
-        #  RC_Superheat,RC_Subcool,
-        #  ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)
-        # print('Outputs',t)
-        # print('Eval',_RankVal)
-        # _BestRankVal=_RankVal
-    OTuples[it]=t
-    if it % int(NO/10)==0 and it>0:
-        print('{:3}% of {} output tuples'.format(int(it*100/NO),NO))
-print('100% of {} output tuples'.format(NO))
-
-#%% Generating pairs
-PreOrderedPairs=[]
-UserOrdererdPairs=[]
-totalPairs=int((NO*(NO+1))/2)
-oPairs=0
-print('Ordening {} pairs'.format(totalPairs))
-for it1 in range(0,NO-1):
-    t1=OTuples[it1]
-    for it2 in range(it1+1,NO):
-        t2=OTuples[it2]
-        comp=betterOutput(t1,t2)
-        if comp==0:
-            UserOrdererdPairs.append(t1+t2)
-        elif comp==+1:
-            PreOrderedPairs.append(t1+t2)
-        else:
-            PreOrderedPairs.append(t2+t1)
-        if (oPairs % int(totalPairs/10))==0 and oPairs>0:
-            print('{:3}% of {} pair of tuples. Ordered:{:5}  User:{:6}'
-                  .format(int(oPairs*100/totalPairs),totalPairs,len(PreOrderedPairs),len(UserOrdererdPairs)))
-        oPairs=oPairs+1    
-print('100% of {} pair of tuples. Ordered:{:5}  User:{:6}'.format(totalPairs,len(PreOrderedPairs),len(UserOrdererdPairs)))
-
-#%% Select EP pairs to user
-ClusMeth=MiniBatchKMeans(n_clusters=EP,n_init=1,random_state=seed)
-ClusMeth.fit(UserOrdererdPairs)
-SelectedUserOrdererdPairs=ClusMeth.cluster_centers_
-print('Selected {} pairs to be ordered by experts'.format(len(SelectedUserOrdererdPairs)))
-
-
-#%% Write to csv files
+
+# Direction of each output: +1 max, -1 min (see betterOutput)
+directions=[1,1,-1]
+
+def classifyPairs(O,directions=directions,tileSize=2**18):
+    """
+    Compares all the pairs (i<j) of rows of O, an array (N,k) of output
+    tuples, with the semantics of betterOutput for k outputs with
+    directions (+1 max, -1 min).
+    It is a generator, the pairs are compared by tiles of rows (with
+    tileSize comparisons at most) with numpy and each tile yields the index
+    arrays (better,worse,userA,userB): the pre-ordered pairs (better is
+    better than worse) and the pairs that can not be ordered (userA<userB).
+    The pairs come in the order of orderPairs (row by row)
+    """
+    F=np.asarray(O,dtype=float)*np.asarray(directions,dtype=float) # All maximized
+    N=len(F)
+    rows=max(1,tileSize//max(1,N))                   # Rows of each tile
+    for a in range(0,N-1,rows):
+        b=min(a+rows,N-1)
+        ge=np.ones((b-a,N-a),dtype=bool)             # Row is better or equal
+        le=np.ones((b-a,N-a),dtype=bool)             # Column is better or equal
+        for k in range(F.shape[1]):
+            A=F[a:b,k,None]
+            B=F[None,a:,k]
+            ge&=A>=B
+            le&=A<=B
+        upper=np.arange(a,b)[:,None]<np.arange(a,N)[None,:] # Pairs i<j
+        (i,j)=np.nonzero(upper)
+        ge=ge[i,j]
+        le=le[i,j]
+        (i,j)=(i+a,j+a)
+        decided=ge!=le                               # Equal tuples are not ordered
+        better=np.where(ge[decided],i[decided],j[decided])
+        worse=np.where(ge[decided],j[decided],i[decided])
+        yield (better,worse,i[~decided],j[~decided])
+
+def orderPairs(OTuples,verbose=1):
+    """
+    Compares all the pairs of output tuples (see betterOutput and
+    classifyPairs).
+    Returns (PreOrderedPairs,UserOrdererdPairs): the pairs that are ordered
+    (the better tuple first) and the pairs that can not be ordered (to be
+    ordered by experts). A pair is the concatenation of its two tuples
+    """
+    OTuples=[tuple(t) for t in OTuples]
+    PreOrderedPairs=[]
+    UserOrdererdPairs=[]
+    if verbose>=1:
+        print('Ordening {} pairs'.format(len(OTuples)*(len(OTuples)-1)//2))
+    O=np.array(OTuples,dtype=float).reshape(len(OTuples),-1)
+    for (better,worse,userA,userB) in classifyPairs(O):
+        PreOrderedPairs.extend([OTuples[i]+OTuples[j] for (i,j) in zip(better.tolist(),worse.tolist())])
+        UserOrdererdPairs.extend([OTuples[i]+OTuples[j] for (i,j) in zip(userA.tolist(),userB.tolist())])
+    if verbose>=1:
+        print('Ordered:{:5}  User:{:6}'.format(len(PreOrderedPairs),len(UserOrdererdPairs)))
+    return (PreOrderedPairs,UserOrdererdPairs)
+
+def writeOrderedPairs(fName,O,verbose=1):
+    """
+    Writes the pre-ordered pairs of the output tuples O (see classifyPairs)
+    to the csv file fName as they are classified, without keeping them.
+    It is a generator, it yields the pairs that can not be ordered (arrays
+    with a pair by row) tile by tile, and the file is complete when all of
+    them have been consumed
+    """
+    O=np.asarray(O,dtype=float)
+    totalPairs=len(O)*(len(O)-1)//2
+    nOrdered=0
+    nUser=0
+    with open(fName,'wt') as f:
+        csvwriter = csv.writer(f, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+        csvwriter.writerow(header)
+        for (better,worse,userA,userB) in classifyPairs(O):
+            csvwriter.writerows(np.hstack((O[better],O[worse])).tolist())
+            nOrdered=nOrdered+len(better)
+            nUser=nUser+len(userA)
+            if verbose>=1:
+                print('{:3}% of {} pair of tuples. Ordered:{:5}  User:{:6}'
+                      .format(int((nOrdered+nUser)*100/totalPairs),totalPairs,nOrdered,nUser))
+            yield np.hstack((O[userA],O[userB]))
+    if verbose>=1:
+        print('Writed {} pairs to {}'.format(nOrdered,fName))
+
+def reservoirSample(chunks,size,RS=None):
+    """
+    Uniform random sample (reservoir sampling) of at most size rows of the
+    arrays of chunks (an iterable, see writeOrderedPairs), with the memory
+    of the sample whatever the number of rows.
+    If there are size rows or less, all of them are returned in order.
+    Params:
+        chunks : iterable of arrays with the same number of columns
+        size   : max rows of the sample
+        RS     : seed of the random sample
+    """
+    rs=np.random.RandomState(RS)
+    sample=None
+    n=0 # Rows seen
+    for chunk in chunks:
+        if sample is None:
+            sample=np.empty((size,chunk.shape[1]))
+        nFill=min(len(chunk),size-min(n,size)) # Free rows of the sample
+        sample[n:n+nFill]=chunk[:nFill]
+        seen=n+nFill+np.arange(len(chunk)-nFill) # Rows seen before each row
+        n=n+len(chunk)
+        if len(seen)==0:
+            continue
+        # Row t is kept with probability size/(t+1) in a random position
+        slot=(rs.random_sample(len(seen))*(seen+1)).astype(np.int64)
+        keep=np.nonzero(slot<size)[0]
+        # The last row of each slot wins
+        (_,last)=np.unique(slot[keep][::-1],return_index=True)
+        keep=keep[len(keep)-1-last]
+        sample[slot[keep]]=chunk[nFill+keep]
+    if sample is None:
+        return np.zeros((0,0))
+    return sample[:min(n,size)]
+
 header=['WHRS_cycle_output','CO2_red','EPC','WHRS_cycle_output','CO2_red','EPC']
 def writeCSV(fName,pairs):
     with open(fName,'wt') as f:
@@ -129,9 +184,53 @@ def writeCSV(fName,pairs):
         for pair in pairs:
             csvwriter.writerow(pair)
     print('Writed {} pairs to {}'.format(len(pairs),fName))
-   
-writeCSV('OrderedPairs/PreOrderedPairs_{}.csv'.format(seed),PreOrderedPairs)
-writeCSV('OrderedPairs/UserOrderedPairs_{}.csv'.format(seed),SelectedUserOrdererdPairs)
-
-
 
+if __name__=='__main__':
+    # WHRS Generator
+    rs=WHRS()
+    # prange=rs.params_range
+    rs.params_range['Load']=LoadRange
+
+    #%% Generating output tuples
+    RG=random.Random()
+    RG.seed(seed)
+
+    rs=WHRS()
+    OTuples=[None]*NO
+    print('Generating {} output tuples'.format(NO))
+    # _BestRankVal=0
+    for it in range(NO):
+        (Load,JW_pump,
+         RC_Superheat,RC_Subcool,
+         ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluidId)=genRandomInput(RG,rs.params_range)
+        t=rs(Load,JW_pump,
+              RC_Superheat,RC_Subcool,
+              ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber,fluidId)
+        # _RankVal=t[0]*2.62320416454897+t[1]*1.13926897697577+t[2]*(-0.179630751811639)
+        # if _RankVal>_BestRankVal:
+            # print('Params',Load,JW_pump,
+            #  RC_Superheat,RC_Subcool,
+            #  ORC_Superheat,ORC_Subcool,ORC_Pump,P_chamber)
+            # print('Outputs',t)
+            # print('Eval',_RankVal)
+            # _BestRankVal=_RankVal
+        OTuples[it]=t
+        if it % int(NO/10)==0 and it>0:
+            print('{:3}% of {} output tuples'.format(int(it*100/NO),NO))
+    print('100% of {} output tuples'.format(NO))
+
+    #%% Generating pairs (the pre-ordered ones are written as they are found
+    #   and only a sample of UP of the ones to user is kept)
+    O=np.array(OTuples,dtype=float)
+    UserPairs=writeOrderedPairs('OrderedPairs/PreOrderedPairs_{}.csv'.format(seed),O)
+    UserOrdererdPairs=reservoirSample(UserPairs,UP,seed)
+
+    #%% Select EP pairs to user
+    ClusMeth=MiniBatchKMeans(n_clusters=EP,n_init=1,random_state=seed)
+    ClusMeth.fit(UserOrdererdPairs)
+    SelectedUserOrdererdPairs=ClusMeth.cluster_centers_
+    print('Selected {} pairs to be ordered by experts'.format(len(SelectedUserOrdererdPairs)))
+
+
+    #%% Write to csv files
+    writeCSV('OrderedPairs/UserOrderedPairs_{}.csv'.format(seed),SelectedUserOrdererdPairs)
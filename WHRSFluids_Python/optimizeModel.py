@@ -7,6 +7,7 @@
 import csv
 from WHRS import WHRS
 from WHRSOptimizer.WHRSskoptBayesian import WHRSskoptBayesian
+from OutputArchive import OutputArchive
 import time
 import matplotlib.pyplot as plt
 import numpy as np
@@ -34,6 +35,18 @@ fluids=[6,14,15] # R1233zd(E) NOVEC649 SES36
 nIter=20
 initRandP=1
 OptimizerName='Bayesian'
+# Warm start: the optimization of each Load interval starts from the best
+# points and the GP of the previous one (see WHRSskoptBayesian.getWarmStart)
+# with warmNIter evaluations instead of initRandP+nIter. False: all the
+# intervals are optimized from scratch (the results of the paper)
+warmStart=True
+warmPoints=5
+warmNIter=10 # nIter of the warm started optimizations
+# Archive seed: the optimizations of the rank model of each Load interval
+# start from the best archived evaluations (of all the previous
+# optimizations) re-scored with the rank model (see OutputArchive)
+archiveSeed=False
+archive=OutputArchive() # All the evaluations of the optimizers
 
 
 # Plot params
@@ -58,6 +71,21 @@ def myLegend(): # How to define the legends of the plots
 def getLoadInterval(Load,LoadStep,LoadStepInterval):
     return [Load-LoadStep*LoadStepInterval,Load+LoadStep*LoadStepInterval]
 
+def newOptimizer(WHRSObj,W,fluid,prevOpt=None,seedArchive=False):
+    """
+    Optimizer of a Load interval, warm started from the best archived
+    evaluations if seedArchive and archiveSeed or from the optimizer of the
+    previous one (prevOpt) if warmStart
+    """
+    if seedArchive and archiveSeed:
+        warm=archive.getWarmStart(W,warmPoints,WHRSObj.getFluidCode(fluid),WHRSObj.params_range['Load'])
+        if warm!=None:
+            return WHRSskoptBayesian(WHRSObj,W,nIter=warmNIter,initRandP=0,fluid=fluid,archive=archive,**warm)
+    if warmStart and prevOpt!=None:
+        return WHRSskoptBayesian(WHRSObj,W,nIter=warmNIter,initRandP=0,fluid=fluid,archive=archive,
+                                 **prevOpt.getWarmStart(warmPoints,LoadShift=LoadStep))
+    return WHRSskoptBayesian(WHRSObj,W,nIter=nIter,initRandP=initRandP,fluid=fluid,archive=archive)
+
 
 # # Influence variation
 # InfluVar=list(range(0,100+1,5))
@@ -106,11 +134,10 @@ def evalModel(W,WHRS_cycle_output,CO2_red,EPC):
 [W,Influ,DifMM,header]=loadModel(fileModel)
 LoadMaxFluids=[] # LoadMax for each fluid
 NamesFluids=[]
+WHRSObj=WHRS(PropsSIStore='memory',verbose=1) # Shared by all the fluids
 for defaultFluid in fluids:
     
-    WHRSObj=WHRS(PropsSIStore='memory',verbose=1)
     WHRSObj.params_range['Load']=LoadRange
-    WHRSObj.setDefaultFluid(defaultFluid)
     
     #%% Best for each variable
     VW1s=[[1,0,0],[0,1,0],[0,0,-1]]
@@ -121,11 +148,12 @@ for defaultFluid in fluids:
         VName=VNames1[iv]
         print('Optimizing: {}({})'.format(VName,W1))
         LoadMax=[]
+        opt=None
         for Load in range(LoadRange[0],LoadRange[1]+1,LoadStep):
             print('\nOptimize for Load={}'.format(Load))
             # WHRSObj=WHRS()
             WHRSObj.params_range['Load']=getLoadInterval(Load,LoadStep,LoadStepInterval)
-            opt=WHRSskoptBayesian(WHRSObj,W1,nIter=nIter,initRandP=initRandP)
+            opt=newOptimizer(WHRSObj,W1,defaultFluid,opt)
             vals=opt.maximize()
             print('WHRS_cycle_output={:7.4f}'.format(opt.WHRS_cycle_output))
             print('CO2_red          ={:7.4f}'.format(opt.CO2_red))
@@ -133,7 +161,7 @@ for defaultFluid in fluids:
             print('RankEvaluation   ={:7.4f}'.format(opt.target))
             print('Opt. time        ={:5.2f}'.format(opt.getOptTime()))
             LoadMax.append(opt.getMaxValues())
-        with open('{}_Best_{}.csv'.format(WHRSObj.getDefaultFluidCode(),VName),'wt') as f:
+        with open('{}_Best_{}.csv'.format(WHRSObj.getFluidCode(defaultFluid),VName),'wt') as f:
             saveCSV(f,[opt.getMaxNames()])
             saveCSV(f,LoadMax)
         LoadMax1s.append(LoadMax)
@@ -141,7 +169,7 @@ for defaultFluid in fluids:
     #%% Plot Variable for its best and others' best
     X=list(range(LoadRange[0],LoadRange[1]+1,LoadStep))
 
-    title='Fluid: {}'.format(WHRSObj.getDefaultFluidName())
+    title='Fluid: {}'.format(WHRSObj.getFluidName(defaultFluid))
     for ivr in range(len(VW1s)): # Variable to represent
         VName =VNames1[ivr]
         VRange=VRanges[ivr]
@@ -165,19 +193,22 @@ for defaultFluid in fluids:
         myLegend()
         if figTitle:
             plt.title(title)
-        plt.savefig('{}_{}_forLoadIntervalWhenOptimizingSelfAndOthers.pdf'.format(WHRSObj.getDefaultFluidCode(),VName))
+        plt.savefig('{}_{}_forLoadIntervalWhenOptimizingSelfAndOthers.pdf'.format(WHRSObj.getFluidCode(defaultFluid),VName))
         
     
     #%% Global Best
     # WHRSObj=WHRS(PropsSIStore='memory')
     WHRSObj.params_range['Load']=LoadRange
-    opt=WHRSskoptBayesian(WHRSObj,W,nIter=nIter,initRandP=initRandP)
+    opt=WHRSskoptBayesian(WHRSObj,W,nIter=nIter,initRandP=initRandP,fluid=defaultFluid,archive=archive)
     opt.maximize()
     print('WHRS_cycle_output={:7.4f}'.format(opt.WHRS_cycle_output))
     print('CO2_red          ={:7.4f}'.format(opt.CO2_red))
     print('EPC              ={:7.4f}'.format(opt.EPC))
     print('RankEvaluation   ={:7.4f}'.format(opt.target))
     print('Opt. time        ={:5.2f}'.format(opt.getOptTime()))
+    resultStats=WHRSObj.getResultCacheStats() # None with ResultStore='none'
+    if resultStats!=None and resultStats['hitRate']!=None: # None without lookups
+        print('Stored evaluations: hit rate={:.1%}'.format(resultStats['hitRate']))
     GlobalMax=opt.getMaxValues()
     names=opt.getMaxNames()
     for i in range(len(GlobalMax)):
@@ -185,13 +216,13 @@ for defaultFluid in fluids:
     plt.figure(figsize=figsize)
     if figTitle:
         plt.title(title)
-    opt.plot('{}_{}_GlobalMax.pdf'.format(WHRSObj.getDefaultFluidCode(),OptimizerName))
+    opt.plot('{}_{}_GlobalMax.pdf'.format(WHRSObj.getFluidCode(defaultFluid),OptimizerName))
     
     #%% Change the Load using the Global Best
     LoadGlobal=[]
     for Load in range(LoadRange[0],LoadRange[1]+1,LoadStep):
         print('\nChange Load={}'.format(Load))
-        (WHRS_cycle_output,CO2_red,EPC)=WHRSObj(Load,GlobalMax[1],GlobalMax[2],GlobalMax[3],GlobalMax[4],GlobalMax[5],GlobalMax[6],GlobalMax[7])
+        (WHRS_cycle_output,CO2_red,EPC)=WHRSObj(Load,GlobalMax[1],GlobalMax[2],GlobalMax[3],GlobalMax[4],GlobalMax[5],GlobalMax[6],GlobalMax[7],defaultFluid)
         print('WHRS_cycle_output={:7.4f}'.format(WHRS_cycle_output))
         print('CO2_red          ={:7.4f}'.format(CO2_red))
         print('EPC              ={:7.4f}'.format(EPC))
@@ -199,9 +230,10 @@ for defaultFluid in fluids:
     
     #%% Best for each Load
     LoadMax=[]
+    opt=None
     for Load in range(LoadRange[0],LoadRange[1]+1,LoadStep):
         WHRSObj.params_range['Load']=getLoadInterval(Load,LoadStep,LoadStepInterval)
-        opt=WHRSskoptBayesian(WHRSObj,W,nIter=nIter,initRandP=initRandP)
+        opt=newOptimizer(WHRSObj,W,defaultFluid,opt,seedArchive=True)
         vals=opt.maximize()
         print('WHRS_cycle_output={:7.4f}'.format(opt.WHRS_cycle_output))
         print('CO2_red          ={:7.4f}'.format(opt.CO2_red))
@@ -210,16 +242,16 @@ for defaultFluid in fluids:
         print('Opt. time        ={:5.2f}'.format(opt.getOptTime()))
         LoadMax.append(opt.getMaxValues())
     LoadMaxFluids.append(LoadMax)
-    NamesFluids.append(WHRSObj.getDefaultFluidName())
+    NamesFluids.append(WHRSObj.getFluidName(defaultFluid))
     #%% Save to csv
 
-    fcsvOLName='{}_{}_OptimizeLoad.csv'.format(WHRSObj.getDefaultFluidCode(),OptimizerName)
+    fcsvOLName='{}_{}_OptimizeLoad.csv'.format(WHRSObj.getFluidCode(defaultFluid),OptimizerName)
     with open(fcsvOLName,'wt') as fcsv:
         saveCSV(fcsv,[opt.getMaxNames(),GlobalMax])
         saveCSV(fcsv,LoadMax)
     print('Writed optimizations'' output to {}'.format(fcsvOLName))
     
-    fcsvCLName='{}_{}_ChangedLoad.csv'.format(WHRSObj.getDefaultFluidCode(),OptimizerName)
+    fcsvCLName='{}_{}_ChangedLoad.csv'.format(WHRSObj.getFluidCode(defaultFluid),OptimizerName)
     with open(fcsvCLName,'wt') as fcsv:
         saveCSV(fcsv,[opt.getMaxNames(),GlobalMax])
         saveCSV(fcsv,LoadGlobal)
@@ -254,7 +286,7 @@ for defaultFluid in fluids:
         fig=plt.figure(figsize=figsize,tight_layout=True)    
         plt.xticks(Xtics)
         plotAxe(X,LoadMax, 8+f,Names[f],title,Range=Ranges[f],VYTic=YTics[f])
-        fig.savefig('{}_{}_{}_Load.pdf'.format(WHRSObj.getDefaultFluidCode(),OptimizerName,fNames[f]),dpi=300)
+        fig.savefig('{}_{}_{}_Load.pdf'.format(WHRSObj.getFluidCode(defaultFluid),OptimizerName,fNames[f]),dpi=300)
 
 
 
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel version of the optimizations of optimizeModel.py.
+The fluid x objective x load matrix (the best of each output and of the rank
+model for each load interval and the global best of the rank model) is split
+in independent jobs that run in a pool of processes, each one with a WHRS
+object that stays warm along its jobs. Each job has its own seed, derived
+from the job (not from the order of execution), so the results do not
+depend on the number of workers.
+
+The result of each job is appended to a ledger (JSON lines) as soon as it
+ends. Running again with the same configuration only runs the jobs that are
+not in the ledger (resume after an interruption).
+
+The CSV files are the ones of optimizeModel.py (without the plots):
+    <fluid>_Best_<output>.csv
+    <fluid>_Bayesian_OptimizeLoad.csv
+    <fluid>_Bayesian_ChangedLoad.csv
+
+Ex: python optimizeParallel.py --workers 8
+    python optimizeParallel.py --fluids 14 --nIter 50 --initRandP 10
+
+@author: quevedo
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+import warnings
+import zlib
+from concurrent.futures import ProcessPoolExecutor,as_completed
+from WHRS import WHRS
+from WHRSOptimizer.WHRSskoptBayesian import WHRSskoptBayesian
+from expertsModel import getFileModel,readRankModel
+
+warnings.filterwarnings("ignore")
+
+VNames1=['P_{ORC}\quad [kW]','CO_2\ reduction','EPC'] # As optimizeModel.py
+VW1s=[[1,0,0],[0,1,0],[0,0,-1]]
+OptimizerName='Bayesian'
+
+def getLoadInterval(Load,LoadStep,LoadStepInterval):
+    return [Load-LoadStep*LoadStepInterval,Load+LoadStep*LoadStepInterval]
+
+def getJobs(fluids,Loads):
+    """
+    Returns the jobs (fluid,objective,Load): objective is the index of the
+    output in VNames1 or 'Rank' (the rank model), Load is the center of the
+    load interval or None (global best, all the LoadRange)
+    """
+    jobs=[]
+    for fluid in fluids:
+        jobs.append((fluid,'Rank',None))
+        for objective in list(range(len(VW1s)))+['Rank']:
+            for Load in Loads:
+                jobs.append((fluid,objective,Load))
+    return jobs
+
+def jobKey(job):
+    return '{}/{}/{}'.format(*job)
+
+def jobSeed(job,seed,sameSeed=False):
+    """
+    Random state of job: seed (sameSeed, as optimizeModel.py) or seed plus a
+    hash of the job
+    """
+    if sameSeed:
+        return seed
+    return (seed+zlib.crc32(jobKey(job).encode())) % 2**31
+
+#%% Workers
+WHRSWorker=None # WHRS object of each process
+
+def _initWorker(PropsSIStore,ResultStore):
+    global WHRSWorker
+    WHRSWorker=WHRS(PropsSIStore=PropsSIStore,ResultStore=ResultStore)
+
+def _runJob(job,config):
+    """
+    Runs the optimization of job. Returns a dict with the job key, the rows
+    of getMaxValues and (global best) the rows of the global best with the
+    Load changed
+    """
+    (fluid,objective,Load)=job
+    W=config['W'] if objective=='Rank' else VW1s[objective]
+    LoadRange=config['LoadRange']
+    if Load==None:
+        WHRSWorker.params_range['Load']=LoadRange
+    else:
+        WHRSWorker.params_range['Load']=getLoadInterval(Load,config['LoadStep'],config['LoadStepInterval'])
+    opt=WHRSskoptBayesian(WHRSWorker,W,RS=config['seeds'][jobKey(job)],
+                          nIter=config['nIter'],initRandP=config['initRandP'],fluid=fluid)
+    opt.maximize()
+    result={'job':jobKey(job),'config':config['id'],
+            'names':list(opt.getMaxNames()),'maxValues':[float(v) for v in opt.getMaxValues()]}
+    if Load==None:
+        # Change the Load using the Global Best
+        GlobalMax=result['maxValues']
+        changed=[]
+        for L in range(LoadRange[0],LoadRange[1]+1,config['LoadStep']):
+            (WHRS_cycle_output,CO2_red,EPC)=WHRSWorker(L,*GlobalMax[1:8],fluid)
+            changed.append([L]+GlobalMax[1:8]+[WHRS_cycle_output,CO2_red,EPC,
+                                               opt._targetOutput(WHRS_cycle_output,CO2_red,EPC),0])
+        result['changedLoad']=changed
+    WHRSWorker.flush() # The workers do not run atexit
+    return result
+
+#%% Ledger
+def readLedger(fileName,configId):
+    """
+    Returns {job key: result} of the jobs of the configuration configId
+    stored in fileName
+    """
+    results={}
+    if os.path.isfile(fileName):
+        with open(fileName,'rt') as f:
+            for line in f:
+                try:
+                    result=json.loads(line)
+                except ValueError:
+                    continue # Last line of an interrupted run
+                if result['config']==configId:
+                    results[result['job']]=result
+    return results
+
+def saveCSV(fileName,rows):
+    with open(fileName,'wt') as f:
+        csvWriter=csv.writer(f,delimiter=',',quoting=csv.QUOTE_MINIMAL)
+        csvWriter.writerows(rows)
+
+def writeOutputs(fluids,Loads,results):
+    """
+    Writes the CSV files of optimizeModel.py for each fluid
+    """
+    WHRSNames=WHRS(PropsSIStore='none',ResultStore='none')
+    names=next(iter(results.values()))['names']
+    for fluid in fluids:
+        code=WHRSNames.getFluidCode(fluid)
+        for iv in range(len(VW1s)):
+            saveCSV('{}_Best_{}.csv'.format(code,VNames1[iv]),
+                    [names]+[results[jobKey((fluid,iv,Load))]['maxValues'] for Load in Loads])
+        glob=results[jobKey((fluid,'Rank',None))]
+        GlobalMax=glob['maxValues']
+        saveCSV('{}_{}_OptimizeLoad.csv'.format(code,OptimizerName),
+                [names,GlobalMax]+[results[jobKey((fluid,'Rank',Load))]['maxValues'] for Load in Loads])
+        saveCSV('{}_{}_ChangedLoad.csv'.format(code,OptimizerName),[names,GlobalMax]+glob['changedLoad'])
+        print('Saved the optimizations of {} in {}_*.csv'.format(WHRSNames.getFluidName(fluid),code))
+
+#%% Main
+def main():
+    parser=argparse.ArgumentParser(description='Optimizations of optimizeModel.py in parallel')
+    parser.add_argument('--fluids',type=int,nargs='+',default=[6,14,15],help='Fluid Ids. Default: 6 14 15')
+    parser.add_argument('--LoadRange',type=int,nargs=2,default=[60,100],help='Default: 60 100')
+    parser.add_argument('--LoadStep',type=int,default=5,help='Default: 5')
+    parser.add_argument('--LoadStepInterval',type=float,default=0.5,
+                        help='Half width of the load intervals in LoadSteps, in [0,0.5]. Default: 0.5')
+    parser.add_argument('--nIter',type=int,default=20,help='Iterations of the Bayesian Optimization. Default: 20')
+    parser.add_argument('--initRandP',type=int,default=1,help='Initial random points. Default: 1')
+    parser.add_argument('--seed',type=int,default=2480,help='Base of the seeds of the jobs. Default: 2480')
+    parser.add_argument('--sameSeed',action='store_true',
+                        help='All the jobs use --seed as random state (like optimizeModel.py)')
+    parser.add_argument('--model',default=getFileModel(),
+                        help='CSV file of the rank model (see learnRanking.py). Default: {}'.format(getFileModel()))
+    parser.add_argument('--workers',type=int,default=os.cpu_count(),help='Processes. Default: number of CPUs')
+    parser.add_argument('--PropsSIStore',default='shared',choices=['memory','shared'],
+                        help='PropsSIStore of the WHRS objects of the workers. Default: shared')
+    parser.add_argument('--ResultStore',default='file',choices=['memory','file'],
+                        help='ResultStore of the WHRS objects of the workers. Default: file')
+    parser.add_argument('--ledger',default='optimizeParallelJobs.jsonl',
+                        help='File with the results of the finished jobs. Default: optimizeParallelJobs.jsonl')
+    parser.add_argument('--restart',action='store_true',help='Runs all the jobs again (ignores the ledger)')
+    args=parser.parse_args()
+
+    W=readRankModel(args.model)
+    Loads=list(range(args.LoadRange[0],args.LoadRange[1]+1,args.LoadStep))
+    jobs=getJobs(args.fluids,Loads)
+    config={'W':W,'LoadRange':args.LoadRange,'LoadStep':args.LoadStep,'LoadStepInterval':args.LoadStepInterval,
+            'nIter':args.nIter,'initRandP':args.initRandP,
+            'seeds':{jobKey(job):jobSeed(job,args.seed,args.sameSeed) for job in jobs}}
+    # The results of the ledger are reused only with the same configuration
+    config['id']=zlib.crc32(json.dumps(config,sort_keys=True).encode())
+
+    results={} if args.restart else readLedger(args.ledger,config['id'])
+    pending=[job for job in jobs if jobKey(job) not in results]
+    print('{} jobs: {} in {}, {} to run with {} workers'
+          .format(len(jobs),len(jobs)-len(pending),args.ledger,len(pending),args.workers))
+
+    start=time.time()
+    if len(pending)>0:
+        with open(args.ledger,'at') as ledger, \
+             ProcessPoolExecutor(args.workers,initializer=_initWorker,
+                                 initargs=(args.PropsSIStore,args.ResultStore)) as executor:
+            futures=[executor.submit(_runJob,job,config) for job in pending]
+            for future in as_completed(futures):
+                result=future.result()
+                ledger.write(json.dumps(result)+'\n')
+                ledger.flush()
+                results[result['job']]=result
+                print('{}/{} job {}: rankValue={:.4f} in {:.1f} s'
+                      .format(len(results),len(jobs),result['job'],result['maxValues'][11],result['maxValues'][12]))
+    print('Jobs finished in {:.1f} s'.format(time.time()-start))
+
+    writeOutputs(args.fluids,Loads,results)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Warm-up of the PropsSI file of WHRS.
+Evaluates a grid or a random sample of params_range for several fluids in
+parallel (PropsSIStore='shared') and stores all the PropsSI calls in the
+file that later runs (PropsSIStore='file') use.
+
+Ex: python warmUpPropSI.py --fluids 6 14 15 --samples 2000 --workers 8
+    python warmUpPropSI.py --grid 3 --check 100
+
+@author: quevedo
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from WHRS import WHRS
+
+inputNames=['Load','JW_pump','RC_Superheat','RC_Subcool',
+            'ORC_Superheat','ORC_Subcool','ORC_Pump','P_chamber']
+
+def genGrid(prange,nLevels):
+    """
+    Returns the nLevels^8 points of a regular grid of the inputs' ranges
+    """
+    levels=[]
+    for name in inputNames:
+        (low,high)=prange[name]
+        if nLevels==1:
+            levels.append([(low+high)/2])
+        else:
+            levels.append([low+(high-low)*k/(nLevels-1) for k in range(nLevels)])
+    return [list(x) for x in itertools.product(*levels)]
+
+def genSample(RG,prange,nSamples):
+    """
+    Returns nSamples points uniformly distributed in the inputs' ranges
+    """
+    return [[RG.uniform(prange[name][0],prange[name][1]) for name in inputNames]
+            for _ in range(nSamples)]
+
+#%% Workers
+WHRSWorker=None # WHRS object of each process
+
+def _initWorker(WHRSObj):
+    global WHRSWorker
+    WHRSWorker=WHRSObj
+
+def _evaluateChunk(chunk):
+    """
+    Evaluates the (fluid,inputs) of chunk. Returns a dict
+    {fluid: number of points with valid outputs}
+    """
+    valid={}
+    for (fluid,x) in chunk:
+        outputs=WHRSWorker(*x,fluid)
+        ok=all(math.isfinite(v) for v in outputs)
+        valid[fluid]=valid.get(fluid,0)+(1 if ok else 0)
+    WHRSWorker.flush() # The workers do not run atexit
+    return valid
+
+#%% Main
+def main():
+    parser=argparse.ArgumentParser(description='Precalculates the PropsSI calls of WHRS in parallel')
+    parser.add_argument('--fluids',type=int,nargs='+',default=None,
+                        help='Ids of the fluids (see WHRS.FluidNameCode). Default: all')
+    parser.add_argument('--samples',type=int,default=1000,
+                        help='Random points for each fluid. Default: 1000')
+    parser.add_argument('--grid',type=int,default=None,
+                        help='Levels of each input in a regular grid (grid^8 points for each fluid) instead of a random sample')
+    parser.add_argument('--seed',type=int,default=2480,help='Seed of the random sample. Default: 2480')
+    parser.add_argument('--workers',type=int,default=os.cpu_count(),help='Processes. Default: number of CPUs')
+    parser.add_argument('--chunk',type=int,default=50,help='Points sent to a worker at a time. Default: 50')
+    parser.add_argument('--backend',default='PropsSI',choices=['PropsSI','AbstractState'],
+                        help='PropsSIBackend of WHRS (each one has its own file). Default: PropsSI')
+    parser.add_argument('--quantization',type=float,default=None,
+                        help='Relative tolerance of T, P and H (PropsSIQuantization of WHRS), it must be the same used later. Default: None')
+    parser.add_argument('--check',type=int,default=0,
+                        help='New random points for each fluid used to measure the coverage after the warm-up. Default: 0')
+    args=parser.parse_args()
+
+    quantization=None
+    if args.quantization!=None:
+        quantization={'T':args.quantization,'P':args.quantization,'H':args.quantization}
+    WHRSObj=WHRS(PropsSIStore='shared',PropsSIBackend=args.backend,PropsSIQuantization=quantization,
+                 ResultStore='none') # Stored evaluations would skip their PropsSI calls
+    fluids=args.fluids if args.fluids!=None else list(range(len(WHRSObj.FluidNameCode)))
+    for fluid in fluids:
+        if fluid<0 or fluid>=len(WHRSObj.FluidNameCode):
+            parser.error('fluid Id {} is not valid'.format(fluid))
+
+    RG=random.Random()
+    RG.seed(args.seed)
+    if args.grid!=None:
+        points=genGrid(WHRSObj.params_range,args.grid)
+    else:
+        points=genSample(RG,WHRSObj.params_range,args.samples)
+    tasks=[(fluid,x) for fluid in fluids for x in points]
+    chunks=[tasks[i:i+args.chunk] for i in range(0,len(tasks),args.chunk)]
+
+    before=WHRSObj.countStoredPropSI()
+    print('Warm-up of {}: {} points x {} fluids, {} workers'
+          .format(WHRSObj.filePropSI,len(points),len(fluids),args.workers))
+    start=time.time()
+    valid={fluid:0 for fluid in fluids}
+    with ProcessPoolExecutor(args.workers,initializer=_initWorker,initargs=(WHRSObj,)) as executor:
+        for (it,chunkValid) in enumerate(executor.map(_evaluateChunk,chunks)):
+            for fluid,n in chunkValid.items():
+                valid[fluid]=valid[fluid]+n
+            if it % max(1,len(chunks)//10)==0 and it>0:
+                print('{:3}% of {} points'.format(int(it*100/len(chunks)),len(tasks)))
+    elapsed=time.time()-start
+    after=WHRSObj.countStoredPropSI()
+
+    # Report
+    print('Evaluated {} points in {:.1f} s ({:.1f} points/s)'.format(len(tasks),elapsed,len(tasks)/elapsed))
+    print('{:20} {:>8} {:>12} {:>12}'.format('Fluid','Valid','Stored calls','New calls'))
+    rows=[('Water','Water','')]
+    for fluid in fluids:
+        rows.append((WHRSObj.getFluidName(fluid),WHRSObj.getFluidCode(fluid),'{}/{}'.format(valid[fluid],len(points))))
+    for (name,code,nValid) in rows:
+        print('{:20} {:>8} {:>12} {:>12}'.format(name,nValid,after.get(code,0),after.get(code,0)-before.get(code,0)))
+
+    if args.check>0:
+        # Coverage: fraction of the PropsSI calls of new points found in the file
+        WHRSObj.close()
+        checkObj=WHRS(PropsSIStore='shared',PropsSIBackend=args.backend,PropsSIQuantization=quantization,
+                     ResultStore='none')
+        for fluid in fluids:
+            for x in genSample(RG,WHRSObj.params_range,args.check):
+                checkObj(*x,fluid)
+        stats=checkObj.getCacheStats()['store']
+        checkObj.close()
+        print('Coverage: {:.1%} of the PropsSI calls of {} new points were in the file'
+              .format(stats['hitRate'],args.check*len(fluids)))
+    WHRSObj.close()
+
+if __name__=='__main__':
+    main()